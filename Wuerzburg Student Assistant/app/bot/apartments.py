@@ -0,0 +1,128 @@
+import asyncio
+import logging
+import random
+import time
+from collections import OrderedDict
+from typing import Hashable, List, Optional
+from sqlalchemy import select
+from app.bot.db import get_db
+from app.core.config import get_settings
+from app.db.models import Apartment
+from app.db.notifications import add_change_listener
+
+logger = logging.getLogger(__name__)
+
+settings = get_settings()
+
+class ApartmentSampler:
+    """
+    Picks random apartments without sorting the table by random().
+
+    Only the apartment ids are kept in memory. They are loaded with one
+    index-only query, reloaded after a TTL or when apartments are ingested.
+    A sample then picks ids from memory and fetches just those rows by primary
+    key, so the cost per command does not grow with the table. Each user is
+    shown apartments they have not seen yet, until they have seen them all:
+    the ids are kept in one shuffled order and each user walks through it from
+    a random start, so only a position is remembered per user.
+    """
+    def __init__(self, ttl_seconds: float = settings.APARTMENT_POOL_TTL_SECONDS,
+                 max_users: int = settings.APARTMENT_SEEN_MAX_USERS) -> None:
+        """
+        Initialize an empty pool.
+
+        Args:
+            ttl_seconds (float, optional): Seconds before the ids are reloaded.
+                Defaults to APARTMENT_POOL_TTL_SECONDS.
+            max_users (int, optional): Users whose position in the shuffled ids is
+                remembered; the least recently active are forgotten first. Defaults to APARTMENT_SEEN_MAX_USERS.
+
+        Returns:
+            None
+        """
+        self.ttl_seconds = ttl_seconds
+        self.max_users = max_users
+        self._ids: List[int] = []
+        self._loaded_at: Optional[float] = None
+        self._dirty = False
+        self._load_lock = asyncio.Lock()
+        # Orders the ids the same way on every reload, new ids land at random positions
+        self._shuffle_key = random.getrandbits(64)
+        self._positions: "OrderedDict[Hashable, int]" = OrderedDict()
+
+    async def load(self) -> None:
+        """Load the ids of all apartments."""
+        async with get_db() as db:
+            result = await db.execute(select(Apartment.id))
+            ids = list(result.scalars().all())
+        ids.sort(key=lambda apartment_id: hash((self._shuffle_key, apartment_id)))
+        self._ids = ids
+        self._loaded_at = time.monotonic()
+        logger.info(f"Loaded apartment pool: {len(ids)} ids")
+
+    def invalidate(self, table: Optional[str] = None) -> None:
+        """Reload the ids before the next sample if apartments changed; safe to call from any thread."""
+        if table is None or table == Apartment.__tablename__:
+            self._dirty = True
+
+    def start_listening(self) -> None:
+        """Reload after apartments are written; other processes' writes arrive via the reference cache's listener."""
+        add_change_listener(self.invalidate)
+
+    async def sample(self, user_id: Hashable, k: int = settings.APARTMENT_SAMPLE_SIZE) -> List[Apartment]:
+        """
+        Get up to k random apartments the user has not been shown yet.
+
+        Once fewer than k unseen apartments are left, they are shown together
+        with apartments from a fresh round.
+
+        Args:
+            user_id (Hashable): The user to rotate apartments for
+            k (int, optional): Number of apartments. Defaults to APARTMENT_SAMPLE_SIZE.
+
+        Returns:
+            List[Apartment]: The apartments, in random order
+        """
+        await self._ensure_loaded()
+        ids = self._pick(user_id, k)
+        if not ids:
+            return []
+        async with get_db() as db:
+            result = await db.execute(select(Apartment).where(Apartment.id.in_(ids)))
+            apartments = {apartment.id: apartment for apartment in result.scalars().all()}
+        # Ids of apartments deleted since the pool was loaded are skipped
+        return [apartments[apartment_id] for apartment_id in ids if apartment_id in apartments]
+
+    def _pick(self, user_id: Hashable, k: int) -> List[int]:
+        pool = self._ids
+        position = self._positions.pop(user_id, None)
+        if not pool:
+            return []
+        if position is None:
+            position = random.randrange(len(pool))
+        k = min(k, len(pool))
+        # Wrapping around starts the next round
+        picked = [pool[(position + offset) % len(pool)] for offset in range(k)]
+        self._positions[user_id] = (position + k) % len(pool)
+        while len(self._positions) > self.max_users:
+            self._positions.popitem(last=False)
+        return picked
+
+    async def _ensure_loaded(self) -> None:
+        expired = self._loaded_at is None or time.monotonic() - self._loaded_at > self.ttl_seconds
+        if not (expired or self._dirty):
+            return
+        async with self._load_lock:
+            if self._loaded_at is not None and not self._dirty and time.monotonic() - self._loaded_at <= self.ttl_seconds:
+                return
+            self._dirty = False
+            try:
+                await self.load()
+            except Exception as e:
+                if self._loaded_at is None:
+                    raise
+                # Keep sampling from the current ids and retry after another TTL
+                self._loaded_at = time.monotonic()
+                logger.error(f"Error reloading apartment pool: {str(e)}")
+
+apartment_sampler = ApartmentSampler()
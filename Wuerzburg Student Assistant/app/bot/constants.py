@@ -5,6 +5,7 @@ ERROR_TIMEOUT = "⚠️ Request timed out. Please try again."
 ERROR_UNEXPECTED = "⚠️ An unexpected error occurred. Please try again later."
 ERROR_PROCESSING = "I apologize, but I encountered an error processing your request. Please try again!"
 INFO_NOT_AVAILABLE = "Information not available."
+ERROR_BUSY = "⏳ I'm answering a lot of questions right now. Please ask again in a minute!"
 
 # Welcome Message
 WELCOME_MESSAGE = """👋 Welcome to Würzburg Student Assistant Bot!
@@ -1,17 +1,49 @@
 from contextlib import asynccontextmanager
-from sqlalchemy import create_engine
-from sqlalchemy.orm import sessionmaker
+from typing import AsyncIterator, Optional
+from sqlalchemy.engine import URL, make_url
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession, async_sessionmaker
 from app.core.config import get_settings
+from app.db.engine import create_async_db_engine
 
 settings = get_settings()
-engine = create_engine(settings.DATABASE_URL)
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+
+# Async drivers used in place of the synchronous ones in DATABASE_URL
+ASYNC_DRIVERS = {
+    "postgresql": "postgresql+asyncpg",
+    "sqlite": "sqlite+aiosqlite"
+}
+
+def get_async_database_url() -> URL:
+    """Get ASYNC_DATABASE_URL, or DATABASE_URL with its async driver."""
+    if settings.ASYNC_DATABASE_URL:
+        return make_url(settings.ASYNC_DATABASE_URL)
+    url = make_url(settings.DATABASE_URL)
+    return url.set(drivername=ASYNC_DRIVERS.get(url.get_backend_name(), url.drivername))
+
+# Created on first use, so processes that import the bot without running it
+# (API workers in polling mode) open no async pool
+_engine: Optional[AsyncEngine] = None
+_session_factory: Optional[async_sessionmaker] = None
+
+def get_engine() -> AsyncEngine:
+    """Get the bot's async engine, creating it on first use."""
+    global _engine, _session_factory
+    if _engine is None:
+        _engine = create_async_db_engine(get_async_database_url())
+        _session_factory = async_sessionmaker(_engine, class_=AsyncSession, expire_on_commit=False, autoflush=False)
+    return _engine
+
+async def dispose_engine() -> None:
+    """Close the pooled connections of the async engine, if it was created."""
+    global _engine, _session_factory
+    if _engine is None:
+        return
+    engine, _engine, _session_factory = _engine, None, None
+    await engine.dispose()
 
 @asynccontextmanager
-async def get_db():
-    """Get a database session."""
-    db = SessionLocal()
-    try:
+async def get_db() -> AsyncIterator[AsyncSession]:
+    """Get an async database session."""
+    get_engine()
+    async with _session_factory() as db:
         yield db
-    finally:
-        db.close()
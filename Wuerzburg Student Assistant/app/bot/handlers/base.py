@@ -1,9 +1,21 @@
+import logging
 from telegram import Update
-from sqlalchemy.orm import Session
+from telegram.error import BadRequest
+from telegram.ext import ContextTypes
 from app.core.config import get_settings
-from app.db.models import GeneralInfo
+from app.bot.apartments import apartment_sampler
+from app.bot.pagination import page_keyboard, parse_page_callback
+from app.bot.reference_cache import reference_cache
+from app.bot.renderers import render_apartment
+from app.bot.sender import PRIORITY_BULK
 from app.bot.constants import DEVELOPMENT_MODE_MESSAGE, INFO_NOT_AVAILABLE
 
+logger = logging.getLogger(__name__)
+
+def _is_markdown_error(error: BadRequest) -> bool:
+    """Check whether Telegram rejected a message because its Markdown is malformed."""
+    return "can't parse entities" in str(error).lower()
+
 class BaseHandler:
     """Base class for all command handlers."""
     def __init__(self):
@@ -13,15 +25,15 @@ class BaseHandler:
     async def check_access(self, update: Update) -> bool:
         """Check if user has access in development mode."""
         if self.settings.DEVELOPMENT_MODE:
-            has_access = update.message.from_user.id == self.settings.DEVELOPER_USER_ID
+            has_access = update.effective_user.id == self.settings.DEVELOPER_USER_ID
             if not has_access:
-                await update.message.reply_text(DEVELOPMENT_MODE_MESSAGE)
+                await update.effective_message.reply_text(DEVELOPMENT_MODE_MESSAGE)
             return has_access
         return True
 
-    async def get_general_info_from_db(self, db: Session, title: str) -> str:
-        """Get information from database by title."""
-        info = db.query(GeneralInfo).filter(GeneralInfo.title == title).first()
+    async def get_general_info_from_db(self, title: str) -> str:
+        """Get information by title from the reference cache."""
+        info = await reference_cache.general_info(title)
         return info.description if info else INFO_NOT_AVAILABLE
 
     async def send_menu_message(self, update: Update, message: str) -> None:
@@ -30,9 +42,92 @@ class BaseHandler:
             return
         await update.message.reply_text(message)
 
-    async def send_info_message(self, update: Update, db: Session, title: str) -> None:
+    async def send_info_message(self, update: Update, title: str) -> None:
         """Send an info message to the user."""
         if not await self.check_access(update):
             return
-        response = await self.get_general_info_from_db(db, title)
+        response = await self.get_general_info_from_db(title)
         await update.message.reply_text(response)
+
+    async def send_rendered_list(self, update: Update, key: str) -> None:
+        """Send the first pre-rendered page of a list command, with buttons for the others."""
+        rendered = await reference_cache.rendered(key)
+        if not rendered.pages:
+            await update.message.reply_text(rendered.empty)
+            return
+        kwargs = dict(
+            disable_web_page_preview=True,
+            reply_markup=page_keyboard(key, 0, len(rendered.pages)),
+            # Lists may wait behind interactive replies when the bot is at its send limit
+            rate_limit_args=PRIORITY_BULK
+        )
+        try:
+            try:
+                await update.get_bot().send_message(
+                    update.effective_chat.id, rendered.pages[0], parse_mode='Markdown', **kwargs
+                )
+            except BadRequest as e:
+                if not _is_markdown_error(e):
+                    raise
+                logger.warning(f"Sending page 0 of {key} list without formatting: {e}")
+                await update.get_bot().send_message(update.effective_chat.id, rendered.pages[0], **kwargs)
+        except Exception as e:
+            logger.error(f"Error sending {key} list: {e}")
+
+    async def handle_list_page(self, update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
+        """Show another page of a list when its previous/next button is pressed."""
+        query = update.callback_query
+        if not await self.check_access(update):
+            await query.answer()
+            return
+        try:
+            key, page = parse_page_callback(query.data)
+            rendered = await reference_cache.rendered(key)
+        except (KeyError, ValueError):
+            await query.answer("This list is no longer available.")
+            return
+        if not rendered.pages:
+            await query.answer(rendered.empty)
+            return
+
+        # The list may have shrunk since the buttons were sent
+        page = min(page, len(rendered.pages) - 1)
+        kwargs = dict(disable_web_page_preview=True, reply_markup=page_keyboard(key, page, len(rendered.pages)))
+        try:
+            try:
+                await query.edit_message_text(rendered.pages[page], parse_mode='Markdown', **kwargs)
+            except BadRequest as e:
+                if not _is_markdown_error(e):
+                    raise
+                logger.warning(f"Showing page {page} of {key} list without formatting: {e}")
+                await query.edit_message_text(rendered.pages[page], **kwargs)
+        except BadRequest as e:
+            # Pressing the current page button leaves the message unchanged
+            if "not modified" not in str(e).lower():
+                logger.error(f"Error showing page {page} of {key} list: {e}")
+        await query.answer()
+
+    async def send_random_apartments(self, update: Update) -> None:
+        """Send random apartments the user has not been shown yet."""
+        apartments = await apartment_sampler.sample(update.effective_user.id)
+        if not apartments:
+            await update.message.reply_text("No apartments available at the moment.")
+            return
+
+        for apt in apartments:
+            text = render_apartment(apt)
+            try:
+                # Send image with caption if image_url exists
+                if apt.image_url:
+                    await update.message.reply_photo(
+                        photo=apt.image_url,
+                        caption=text,
+                        parse_mode='HTML'
+                    )
+                else:
+                    # Send text only if no image
+                    await update.message.reply_text(text)
+            except Exception as e:
+                logger.error(f"Error sending apartment message: {e}")
+                # Fallback to text-only if image sending fails
+                await update.message.reply_text(text)
@@ -1,75 +1,57 @@
 from telegram import Update
 from telegram.ext import ContextTypes
-from app.bot.db import get_db
 from .base import BaseHandler
 
 class GeneralInfoHandlers(BaseHandler):
     """Handlers for information commands."""
     async def handle_immigration_registration(self, update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
-        async with get_db() as db:
-            await self.send_info_message(update, db, "City Registration")
+        await self.send_info_message(update, "City Registration")
 
     async def handle_immigration_permit(self, update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
-        async with get_db() as db:
-            await self.send_info_message(update, db, "Residence Permit Application")
+        await self.send_info_message(update, "Residence Permit Application")
 
     async def handle_healthcare_doctor(self, update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
-        async with get_db() as db:
-            await self.send_info_message(update, db, "Visiting a Doctor")
+        await self.send_info_message(update, "Visiting a Doctor")
 
     async def handle_healthcare_emergency(self, update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
-        async with get_db() as db:
-            await self.send_info_message(update, db, "Medical On-Call Service")
+        await self.send_info_message(update, "Medical On-Call Service")
 
     async def handle_apartment_studentwerk(self, update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
-        async with get_db() as db:
-            await self.send_info_message(update, db, "Studentwerk Apartments")
+        await self.send_info_message(update, "Studentwerk Apartments")
 
     async def handle_apartment_company(self, update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
-        async with get_db() as db:
-            await self.send_info_message(update, db, "Apartments Under Company Management")
+        await self.send_info_message(update, "Apartments Under Company Management")
 
     async def handle_education_german(self, update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
-        async with get_db() as db:
-            await self.send_info_message(update, db, "German Language Courses")
+        await self.send_info_message(update, "German Language Courses")
 
     async def handle_education_scholarships(self, update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
-        async with get_db() as db:
-            await self.send_info_message(update, db, "Scholarships")
+        await self.send_info_message(update, "Scholarships")
 
     async def handle_education_erasmus(self, update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
-        async with get_db() as db:
-            await self.send_info_message(update, db, "Erasmus Semester Abroad")
+        await self.send_info_message(update, "Erasmus Semester Abroad")
 
     async def handle_sports_university(self, update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
-        async with get_db() as db:
-            await self.send_info_message(update, db, "University Sports Center")
+        await self.send_info_message(update, "University Sports Center")
 
     async def handle_lifetips_transport(self, update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
-        async with get_db() as db:
-            await self.send_info_message(update, db, "Free Public Transport")
+        await self.send_info_message(update, "Free Public Transport")
 
     async def handle_lifetips_deutschlandticket(self, update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
-        async with get_db() as db:
-            await self.send_info_message(update, db, "Deutschland Ticket")
+        await self.send_info_message(update, "Deutschland Ticket")
 
     async def handle_lifetips_waste(self, update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
-        async with get_db() as db:
-            await self.send_info_message(update, db, "Waste Separation")
+        await self.send_info_message(update, "Waste Separation")
             
     async def handle_lifetips_legal(self, update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
-        async with get_db() as db:
-            await self.send_info_message(update, db, "Free Legal Services")
+        await self.send_info_message(update, "Free Legal Services")
             
     async def handle_lifetips_rundfunk(self, update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
-       async with get_db() as db:
-            await self.send_info_message(update, db, "Radio and TV Tax (Rundfunkbeitrag)")
+        await self.send_info_message(update, "Radio and TV Tax (Rundfunkbeitrag)")
             
     async def handle_lifetips_daily(self, update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
-        async with get_db() as db:
-            await self.send_info_message(update, db, "Important Daily Life Info")
+        await self.send_info_message(update, "Important Daily Life Info")
             
     async def handle_newarrival(self, update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
         """Handle new arrival information."""
-        async with get_db() as db:
-            await self.send_info_message(update, db, "New Student Checklist")
\ No newline at end of file
+        await self.send_info_message(update, "New Student Checklist")
\ No newline at end of file
@@ -1,15 +1,15 @@
+import asyncio
 import logging
 import re
-from telegram import Update
+from telegram import Message, Update
 from telegram.ext import ContextTypes
-from telegram.error import NetworkError, TimedOut
-from app.services.rag_service import RAGService
+from telegram.error import BadRequest, NetworkError, TimedOut
+from app.services.registry import get_rag_service
 from app.utils.logger import log_conversation
 from app.bot.constants import ERROR_NETWORK, ERROR_TIMEOUT, ERROR_UNEXPECTED, ERROR_PROCESSING
 from .base import BaseHandler
 
 logger = logging.getLogger(__name__)
-rag_service = RAGService()
 
 class MessageHandlers(BaseHandler):
     """Handlers for messages and errors."""    
@@ -22,7 +22,24 @@ class MessageHandlers(BaseHandler):
         try:
             # Send typing action while processing
             await update.message.chat.send_action(action="typing")
-            answer, sources = rag_service.query(user_message)
+            sources, usage, tokens = await get_rag_service().astream(user_message)
+
+            # Post the first tokens right away and edit the message as more
+            # arrive, at most once per STREAM_EDIT_INTERVAL
+            loop = asyncio.get_running_loop()
+            reply = None
+            answer = ""
+            last_edit = 0.0
+            async for token in tokens:
+                answer += token
+                if not answer.strip():
+                    continue
+                if reply is None:
+                    reply = await update.message.reply_text(answer)
+                    last_edit = loop.time()
+                elif loop.time() - last_edit >= self.settings.STREAM_EDIT_INTERVAL:
+                    await self._edit_text(reply, answer)
+                    last_edit = loop.time()
             
             # Log the conversation
             log_conversation(
@@ -33,10 +50,13 @@ class MessageHandlers(BaseHandler):
             )
             
             escaped_answer = self._escape_markdown(answer)
-            await update.message.reply_text(
-                escaped_answer,
-                parse_mode='Markdown'
-            )
+            if reply is None:
+                await update.message.reply_text(
+                    escaped_answer,
+                    parse_mode='Markdown'
+                )
+            else:
+                await self._edit_text(reply, escaped_answer, parse_mode='Markdown')
         except Exception as e:
             logger.error(f"Error processing message: {e}")
             await update.message.reply_text(ERROR_PROCESSING)
@@ -58,6 +78,14 @@ class MessageHandlers(BaseHandler):
             except Exception as e:
                 logger.error(f"Error sending error message: {e}")
                 
+    async def _edit_text(self, message: Message, text: str, **kwargs) -> None:
+        """Edit a message, ignoring edits that would not change it."""
+        try:
+            await message.edit_text(text, **kwargs)
+        except BadRequest as e:
+            if "not modified" not in str(e).lower():
+                raise
+
     def _escape_markdown(self, text: str) -> str:
         """Escapes special characters for Markdown formatting."""
         escape_chars = r'\*_`\['
@@ -0,0 +1,109 @@
+from typing import List, Optional, Tuple
+from telegram import InlineKeyboardButton, InlineKeyboardMarkup
+from app.core.config import get_settings
+
+settings = get_settings()
+
+# Callback data of page buttons: "list:<list key>:<page index>"
+LIST_CALLBACK_PREFIX = "list:"
+ENTRY_SEPARATOR = "\n\n➖➖➖➖➖\n\n"
+
+def pack_pages(header: str, entries: List[str], page_size: int = settings.LIST_PAGE_SIZE,
+               limit: int = settings.TELEGRAM_MESSAGE_LIMIT) -> List[str]:
+    """
+    Join rendered entries into as few messages as possible.
+
+    Each page starts with the header and holds up to page_size entries, as long
+    as it stays within Telegram's message length limit. An entry that does not
+    fit in a message of its own is split at line breaks.
+
+    Args:
+        header (str): First line of every page
+        entries (List[str]): Rendered entries, in display order
+        page_size (int, optional): Maximum entries per page. Defaults to LIST_PAGE_SIZE.
+        limit (int, optional): Maximum characters per page. Defaults to TELEGRAM_MESSAGE_LIMIT.
+
+    Returns:
+        List[str]: The pages; empty if there are no entries
+    """
+    budget = limit - len(header) - len(ENTRY_SEPARATOR)
+    pages = []
+    current: List[str] = []
+    length = 0
+    for entry in entries:
+        for part in _split_entry(entry, budget):
+            added = len(part) + (len(ENTRY_SEPARATOR) if current else 0)
+            if current and (len(current) >= page_size or length + added > budget):
+                pages.append(header + ENTRY_SEPARATOR + ENTRY_SEPARATOR.join(current))
+                current, length, added = [], 0, len(part)
+            current.append(part)
+            length += added
+    if current:
+        pages.append(header + ENTRY_SEPARATOR + ENTRY_SEPARATOR.join(current))
+    return pages
+
+def _split_entry(entry: str, limit: int) -> List[str]:
+    """
+    Split an entry into parts of at most limit characters at line breaks.
+
+    Rendered entries keep each Markdown entity on one line, so parts never
+    end inside one. A single line longer than limit is plain text; it is cut
+    at its last space, or at limit if it has none.
+    """
+    if len(entry) <= limit:
+        return [entry]
+    parts = []
+    while len(entry) > limit:
+        cut = entry.rfind("\n", 0, limit + 1)
+        if cut <= 0:
+            cut = entry.rfind(" ", 0, limit + 1)
+        if cut <= 0:
+            cut = limit
+            # Keep an escaping backslash with the character it escapes
+            if entry[cut - 1] == "\\":
+                cut -= 1
+        parts.append(entry[:cut])
+        entry = entry[cut:].lstrip("\n ")
+    if entry:
+        parts.append(entry)
+    return parts
+
+def page_keyboard(key: str, page: int, total: int) -> Optional[InlineKeyboardMarkup]:
+    """
+    Build the previous/next buttons of a list page.
+
+    Args:
+        key (str): The list key, e.g. "places:cafe"
+        page (int): Index of the shown page
+        total (int): Number of pages
+
+    Returns:
+        Optional[InlineKeyboardMarkup]: The keyboard, or None for single-page lists
+    """
+    if total <= 1:
+        return None
+    buttons = []
+    if page > 0:
+        buttons.append(InlineKeyboardButton("◀️ Prev", callback_data=f"{LIST_CALLBACK_PREFIX}{key}:{page - 1}"))
+    buttons.append(InlineKeyboardButton(f"{page + 1}/{total}", callback_data=f"{LIST_CALLBACK_PREFIX}{key}:{page}"))
+    if page < total - 1:
+        buttons.append(InlineKeyboardButton("Next ▶️", callback_data=f"{LIST_CALLBACK_PREFIX}{key}:{page + 1}"))
+    return InlineKeyboardMarkup([buttons])
+
+def parse_page_callback(data: str) -> Tuple[str, int]:
+    """
+    Read the list key and page index from page button callback data.
+
+    Args:
+        data (str): Callback data created by `page_keyboard`
+
+    Returns:
+        Tuple[str, int]: The list key and page index
+
+    Raises:
+        ValueError: If the data is not page button callback data
+    """
+    if not data.startswith(LIST_CALLBACK_PREFIX):
+        raise ValueError(f"Not a list page callback: {data}")
+    key, page = data[len(LIST_CALLBACK_PREFIX):].rsplit(":", 1)
+    return key, int(page)
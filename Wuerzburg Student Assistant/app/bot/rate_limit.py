@@ -0,0 +1,77 @@
+import asyncio
+import time
+from typing import Dict, Hashable
+from app.core.config import get_settings
+
+settings = get_settings()
+
+class TokenBucket:
+    """Token bucket that lets `capacity` sends through at once and `rate` per second afterwards."""
+    def __init__(self, rate: float, capacity: int) -> None:
+        """
+        Initialize a full bucket.
+
+        Args:
+            rate (float): Tokens added per second
+            capacity (int): Maximum number of tokens
+
+        Returns:
+            None
+        """
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = float(capacity)
+        self.updated_at = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    def _refill(self) -> None:
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated_at) * self.rate)
+        self.updated_at = now
+
+    async def acquire(self) -> None:
+        """Wait until a token is available and take it; waiters are served in order."""
+        async with self._lock:
+            self._refill()
+            if self.tokens < 1:
+                await asyncio.sleep((1 - self.tokens) / self.rate)
+                self._refill()
+            self.tokens -= 1
+
+class ChatRateLimiter:
+    """One token bucket per chat, so a busy chat never delays the others."""
+    def __init__(self, rate: float = settings.CHAT_MESSAGES_PER_SECOND, capacity: int = settings.CHAT_MESSAGE_BURST,
+                 group_rate: float = settings.GROUP_MESSAGES_PER_MINUTE / 60) -> None:
+        """
+        Initialize the limiter.
+
+        Args:
+            rate (float, optional): Messages per second per private chat. Defaults to CHAT_MESSAGES_PER_SECOND.
+            capacity (int, optional): Burst size per chat. Defaults to CHAT_MESSAGE_BURST.
+            group_rate (float, optional): Messages per second per group chat.
+                Defaults to GROUP_MESSAGES_PER_MINUTE / 60.
+
+        Returns:
+            None
+        """
+        self.rate = rate
+        self.capacity = capacity
+        self.group_rate = group_rate
+        self._buckets: Dict[Hashable, TokenBucket] = {}
+
+    async def acquire(self, chat_id: Hashable) -> None:
+        """Wait until a message may be sent to the chat."""
+        bucket = self._buckets.get(chat_id)
+        if bucket is None:
+            self._prune()
+            # Group and channel ids are negative, or @usernames for public channels
+            is_group = not isinstance(chat_id, int) or chat_id < 0
+            bucket = self._buckets[chat_id] = TokenBucket(self.group_rate if is_group else self.rate, self.capacity)
+        await bucket.acquire()
+
+    def _prune(self) -> None:
+        # Full, idle buckets carry no state; drop them so the dict stays small
+        now = time.monotonic()
+        for chat_id, bucket in list(self._buckets.items()):
+            if not bucket._lock.locked() and bucket.tokens + (now - bucket.updated_at) * bucket.rate >= bucket.capacity:
+                del self._buckets[chat_id]
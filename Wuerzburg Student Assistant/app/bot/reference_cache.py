@@ -0,0 +1,163 @@
+import asyncio
+import logging
+import time
+from typing import Any, Dict, List, Optional
+from sqlalchemy import select
+from app.bot.db import get_async_database_url, get_db
+from app.core.config import get_settings
+from app.bot.renderers import RenderedList, render_all
+from app.db.models import Bank, GeneralInfo, Insurance, Place, TelecomProvider, UsefulApp, WhatsAppGroup
+from app.db.notifications import add_change_listener, dispatch_change, listen_for_changes
+
+logger = logging.getLogger(__name__)
+
+settings = get_settings()
+
+REFERENCE_MODELS = (GeneralInfo, Bank, TelecomProvider, UsefulApp, Insurance, Place, WhatsAppGroup)
+
+class ReferenceCache:
+    """
+    Read-through in-memory copy of the small reference tables used by bot commands.
+
+    All tables are loaded with one session on first use (or at startup via
+    `load`), and the messages of the list commands are rendered from them
+    right away. Afterwards lookups never touch the database: when the TTL has
+    passed or a change notification arrives, the current rows and messages
+    keep being served while a single background task reloads them.
+    """
+    def __init__(self, models: tuple = REFERENCE_MODELS, ttl_seconds: float = settings.REFERENCE_CACHE_TTL_SECONDS) -> None:
+        """
+        Initialize an empty cache.
+
+        Args:
+            models (tuple, optional): ORM models to cache. Defaults to REFERENCE_MODELS.
+            ttl_seconds (float, optional): Seconds before rows are reloaded.
+                Defaults to REFERENCE_CACHE_TTL_SECONDS.
+
+        Returns:
+            None
+        """
+        self.models = models
+        self.ttl_seconds = ttl_seconds
+        self._tables: Dict[str, List[Any]] = {}
+        self._general_info_by_title: Dict[str, Any] = {}
+        self._rendered: Dict[str, RenderedList] = {}
+        self._loaded_at: Optional[float] = None
+        self._dirty = False
+        self._load_lock = asyncio.Lock()
+        self._refresh_task: Optional[asyncio.Task] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._listener = None
+
+    @property
+    def tables(self) -> List[str]:
+        """Names of the cached tables."""
+        return [model.__tablename__ for model in self.models]
+
+    async def load(self) -> None:
+        """Load all cached tables with one session, render them and swap them in at once."""
+        self._loop = asyncio.get_running_loop()
+        tables = {}
+        async with get_db() as db:
+            for model in self.models:
+                result = await db.execute(select(model).order_by(model.id))
+                tables[model.__tablename__] = result.scalars().all()
+        general_info_by_title = {
+            info.title: info for info in tables.get(GeneralInfo.__tablename__, [])
+        }
+        rendered = render_all(tables)
+        self._tables, self._general_info_by_title, self._rendered = tables, general_info_by_title, rendered
+        self._loaded_at = time.monotonic()
+        logger.info(f"Loaded reference cache: {', '.join(f'{name}={len(rows)}' for name, rows in tables.items())}")
+
+    async def rows(self, model: Any) -> List[Any]:
+        """
+        Get all cached rows of a table, ordered by id.
+
+        Args:
+            model: A model from `models`
+
+        Returns:
+            List: The rows
+        """
+        await self._ensure_loaded()
+        return self._tables.get(model.__tablename__, [])
+
+    async def general_info(self, title: str) -> Optional[GeneralInfo]:
+        """Get the GeneralInfo row with the given title, if any."""
+        await self._ensure_loaded()
+        return self._general_info_by_title.get(title)
+
+    async def rendered(self, key: str) -> RenderedList:
+        """
+        Get the pre-rendered messages of a list command.
+
+        Args:
+            key (str): A list key from `render_all`, e.g. "places:cafe"
+
+        Returns:
+            RenderedList: The pages and empty-list text
+        """
+        await self._ensure_loaded()
+        return self._rendered[key]
+
+    def invalidate(self, table: Optional[str] = None) -> None:
+        """
+        Mark the cache as changed so it is reloaded in the background.
+
+        Safe to call from any thread.
+
+        Args:
+            table (Optional[str], optional): The changed table; changes to
+                tables that are not cached are ignored. Defaults to None (any).
+
+        Returns:
+            None
+        """
+        if table is not None and table not in self.tables:
+            return
+        self._dirty = True
+        if self._loop is not None and not self._loop.is_closed():
+            self._loop.call_soon_threadsafe(self._schedule_refresh)
+
+    async def start_listening(self) -> None:
+        """
+        Reload on writes made in this process and, on PostgreSQL, in other processes.
+
+        Notifications from other processes are passed to every change listener
+        of this process, not only to this cache.
+        """
+        add_change_listener(self.invalidate)
+        try:
+            self._listener = await listen_for_changes(get_async_database_url(), dispatch_change)
+        except Exception as e:
+            logger.error(f"Error listening for table changes, relying on cache TTL: {str(e)}")
+
+    async def stop_listening(self) -> None:
+        """Close the change notification connection."""
+        if self._listener is not None:
+            await self._listener.close()
+            self._listener = None
+
+    async def _ensure_loaded(self) -> None:
+        if self._loaded_at is None:
+            async with self._load_lock:
+                if self._loaded_at is None:
+                    await self.load()
+        elif self._dirty or time.monotonic() - self._loaded_at > self.ttl_seconds:
+            self._schedule_refresh()
+
+    def _schedule_refresh(self) -> None:
+        if self._refresh_task is None or self._refresh_task.done():
+            self._refresh_task = asyncio.get_running_loop().create_task(self._refresh())
+
+    async def _refresh(self) -> None:
+        self._dirty = False
+        try:
+            await self.load()
+        except Exception as e:
+            # Keep serving the current rows and retry after another TTL
+            self._loaded_at = time.monotonic()
+            logger.error(f"Error refreshing reference cache: {str(e)}")
+
+reference_cache = ReferenceCache()
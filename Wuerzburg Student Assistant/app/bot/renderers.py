@@ -0,0 +1,181 @@
+import re
+from typing import Any, Callable, Dict, List, NamedTuple
+from app.bot.pagination import pack_pages
+from app.db.models import Apartment, Bank, GeneralInfo, Insurance, Place, TelecomProvider, UsefulApp, WhatsAppGroup
+
+class RenderedList(NamedTuple):
+    """Final Telegram texts of a list command."""
+    empty: str
+    pages: List[str]  # Rendered entries packed into pages that start with the header
+
+# Place category -> emoji of its list command header
+PLACE_CATEGORIES = {
+    "restaurant": "🍽️",
+    "cafe": "☕",
+    "tourist attraction": "🎯",
+    "library": "📚",
+    "supermarket": "🛒",
+    "home goods": "🏠",
+    "drugstore": "💄"
+}
+
+def escape_markdown(value: Any) -> str:
+    """Escape a database value for use outside entities in legacy Markdown."""
+    return re.sub(r'([*_`\[])', r'\\\1', str(value))
+
+def bold(value: Any) -> str:
+    """Render a database value in bold; entity text cannot be escaped, so asterisks are dropped."""
+    return f"*{str(value).replace('*', '')}*"
+
+def render_apartment(apt: Apartment) -> str:
+    """Render an apartment message, used as text or photo caption."""
+    return (
+        f"🏢 {apt.title}\n\n"
+        f"📍 {apt.address}\n\n"
+        f"📅 Available from: {apt.available_from}\n\n"
+        f"💶 Price: €{int(apt.price)}\n\n"
+        f"📐 Size: {int(apt.size)}m²{f', {apt.rooms} rooms' if apt.rooms else ''}\n\n"
+        f"🔗 More details:\n{apt.details_link}\n"
+    )
+
+def render_group(group: WhatsAppGroup) -> str:
+    """Render a WhatsApp group message."""
+    return (
+        f"📱 {bold(group.name)}\n\n"
+        f"🏷️ Category: {escape_markdown(group.category)}\n\n"
+        f"ℹ️ {escape_markdown(group.description)}\n\n"
+        f"🔗 [Join Group]({group.invite_link})"
+    )
+
+def render_place(place: Place) -> str:
+    """Render a place message."""
+    message = (
+        f"🏢 {bold(place.name)}\n\n"
+        f"ℹ️ Description: {escape_markdown(place.description)}\n"
+        f"📍 Address: {escape_markdown(place.address)}\n"
+    )
+    if place.price_range:
+        message += f"💰 Price: {escape_markdown(place.price_range)}\n"
+    message += f"⭐ Rating: {escape_markdown(place.rating)}"
+    return message
+
+def render_health_insurance(insurance: Insurance) -> str:
+    """Render a health insurance message."""
+    return (
+        f"🏢 {bold(insurance.company_name)}\n\n"
+        f"📋 Type: {escape_markdown(insurance.category)}\n\n"
+        f"ℹ️ {escape_markdown(insurance.description)}\n\n"
+        f"🔗 [Visit Website]({insurance.company_url})"
+    )
+
+def render_private_insurance(insurance: Insurance) -> str:
+    """Render a private insurance message."""
+    return (
+        f"🏢 {bold(insurance.company_name)}\n\n"
+        f"ℹ️ {escape_markdown(insurance.description)}\n\n"
+        f"🔗 [Visit Website]({insurance.company_url})"
+    )
+
+def render_app(app: UsefulApp) -> str:
+    """Render a useful app message with its store links."""
+    message = (
+        f"📱 {bold(app.name)}\n\n"
+        f"🏷️ Category: {escape_markdown(app.category)}\n\n"
+        f"ℹ️ {escape_markdown(app.description)}\n\n"
+    )
+    store_links = []
+    if app.app_store_url:
+        store_links.append(f"[App Store]({app.app_store_url})")
+    if app.play_store_url:
+        store_links.append(f"[Play Store]({app.play_store_url})")
+    if store_links:
+        message += "🔗 " + " | ".join(store_links)
+    return message
+
+def render_telecom(provider: TelecomProvider) -> str:
+    """Render a telecom provider message."""
+    return (
+        f"📡 {bold(provider.name)}\n\n"
+        f"ℹ️ {escape_markdown(provider.description)}\n\n"
+        f"🔗 [Visit Website]({provider.website_url})"
+    )
+
+def render_bank(bank: Bank) -> str:
+    """Render a bank message."""
+    return (
+        f"🏦 {bold(bank.name)}\n\n"
+        f"ℹ️ {escape_markdown(bank.description)}\n\n"
+        f"💳 Free student plan: {'✅ Available' if bank.free_student_plan_available else '❌ Not available'}\n\n"
+        f"🔗 [Visit Website]({bank.website_url})"
+    )
+
+def _render_general_info(emoji: str) -> Callable[[GeneralInfo], str]:
+    """Render GeneralInfo rows as a titled message with the given emoji."""
+    return lambda info: f"{emoji} {bold(info.title)}\n\nℹ️ {escape_markdown(info.description)}"
+
+def _render(rows: List[Any], render: Callable[[Any], str], header: str, empty: str) -> RenderedList:
+    return RenderedList(empty=empty, pages=pack_pages(header, [render(row) for row in rows]))
+
+def render_all(tables: Dict[str, List[Any]]) -> Dict[str, RenderedList]:
+    """
+    Render the messages of every cached list command.
+
+    Args:
+        tables (Dict[str, List[Any]]): Rows per table name, ordered by id
+
+    Returns:
+        Dict[str, RenderedList]: Rendered pages per list key:
+            - "groups"
+            - "places:<category>" for every category in PLACE_CATEGORIES
+            - "insurance:health", "insurance:private"
+            - "apps", "telecom", "banks"
+            - "sports:skating", "sports:hiking", "sports:clubs"
+    """
+    places = tables.get(Place.__tablename__, [])
+    insurances = tables.get(Insurance.__tablename__, [])
+    general_info = tables.get(GeneralInfo.__tablename__, [])
+
+    rendered = {
+        "groups": _render(
+            tables.get(WhatsAppGroup.__tablename__, []), render_group,
+            "👥 Available Student WhatsApp Groups", "No WhatsApp groups available at the moment."
+        ),
+        "insurance:health": _render(
+            [insurance for insurance in insurances if insurance.category in ('Public Health Insurance', 'Private Health Insurance')],
+            render_health_insurance, "🏥 Health Insurance Options", "No health insurance information available."
+        ),
+        "insurance:private": _render(
+            [insurance for insurance in insurances if insurance.category == 'Private Insurance'],
+            render_private_insurance, "🔒 Private Insurance Options", "No private insurance information available."
+        ),
+        "apps": _render(
+            tables.get(UsefulApp.__tablename__, []), render_app,
+            "📱 Useful Apps for Students", "No app information available."
+        ),
+        "telecom": _render(
+            tables.get(TelecomProvider.__tablename__, []), render_telecom,
+            "📱 Telecom Providers", "No telecom provider information available."
+        ),
+        "banks": _render(
+            tables.get(Bank.__tablename__, []), render_bank,
+            "🏦 Bank Options for Students", "No bank information available."
+        ),
+        "sports:skating": _render(
+            [info for info in general_info if info.category == "Skating Places"], _render_general_info("🏟️"),
+            "⛸️ Skating Places in Würzburg", "No skating places information available."
+        ),
+        "sports:hiking": _render(
+            [info for info in general_info if info.category == "Hiking Trails"], _render_general_info("🏃‍♂️"),
+            "🏃‍♂️ Hiking Trails around Würzburg", "No hiking trails information available."
+        ),
+        "sports:clubs": _render(
+            [info for info in general_info if info.category == "Sports Clubs"], _render_general_info("🏆"),
+            "⚽ Sports Clubs in Würzburg", "No sports clubs information available."
+        )
+    }
+    for category, emoji in PLACE_CATEGORIES.items():
+        rendered[f"places:{category}"] = _render(
+            [place for place in places if place.category == category], render_place,
+            f"{emoji} {category.title()}", f"No {category.lower()} available at the moment."
+        )
+    return rendered
@@ -0,0 +1,125 @@
+import asyncio
+import itertools
+import logging
+import time
+from typing import Any, Callable, Coroutine, Dict, List, Optional, Union
+from telegram.error import RetryAfter
+from telegram.ext import BaseRateLimiter
+from app.bot.rate_limit import ChatRateLimiter, TokenBucket
+from app.core.config import get_settings
+
+logger = logging.getLogger(__name__)
+
+settings = get_settings()
+
+# Request priorities, passed as `rate_limit_args`; lower values are sent first
+PRIORITY_INTERACTIVE = 0  # Direct replies to what a user just did (the default)
+PRIORITY_BULK = 1  # Lists and other long outputs that may wait behind replies
+
+class OutboundScheduler(BaseRateLimiter[int]):
+    """
+    Rate limiter through which every Bot API request of the application is sent.
+
+    A request first waits for a token of its chat's bucket, so flooding one
+    chat never holds back the others, then joins a priority queue in which a
+    single dispatcher hands out tokens of the global bucket: interactive
+    replies go ahead of bulk output whenever the bot is at Telegram's overall
+    limit. A RetryAfter from Telegram pauses all sending for the requested
+    time before the request is retried.
+    """
+    def __init__(self, global_rate: float = settings.GLOBAL_MESSAGES_PER_SECOND,
+                 chat_limiter: Optional[ChatRateLimiter] = None,
+                 max_retries: int = settings.SEND_MAX_RETRIES) -> None:
+        """
+        Initialize the scheduler.
+
+        Args:
+            global_rate (float, optional): Requests per second across all chats.
+                Defaults to GLOBAL_MESSAGES_PER_SECOND.
+            chat_limiter (Optional[ChatRateLimiter], optional): Per-chat limits.
+                Defaults to a ChatRateLimiter with the CHAT_*/GROUP_* settings.
+            max_retries (int, optional): Retries after RetryAfter. Defaults to SEND_MAX_RETRIES.
+
+        Returns:
+            None
+        """
+        self.global_bucket = TokenBucket(global_rate, max(1, int(global_rate)))
+        self.chat_limiter = chat_limiter or ChatRateLimiter()
+        self.max_retries = max_retries
+        self._queue: Optional[asyncio.PriorityQueue] = None
+        self._sequence = itertools.count()
+        self._dispatcher: Optional[asyncio.Task] = None
+        self._paused_until = 0.0
+
+    async def initialize(self) -> None:
+        """Start the dispatcher."""
+        self._queue = asyncio.PriorityQueue()
+        self._dispatcher = asyncio.get_running_loop().create_task(self._dispatch())
+
+    async def shutdown(self) -> None:
+        """Stop the dispatcher."""
+        if self._dispatcher is not None:
+            self._dispatcher.cancel()
+            try:
+                await self._dispatcher
+            except asyncio.CancelledError:
+                pass
+            self._dispatcher = None
+
+    async def process_request(
+        self,
+        callback: Callable[..., Coroutine[Any, Any, Union[bool, Dict[str, Any], List[Dict[str, Any]]]]],
+        args: Any,
+        kwargs: Dict[str, Any],
+        endpoint: str,
+        data: Dict[str, Any],
+        rate_limit_args: Optional[int]
+    ) -> Union[bool, Dict[str, Any], List[Dict[str, Any]]]:
+        """
+        Send a request once its chat and the global limit allow it.
+
+        Args:
+            callback: Coroutine function making the request
+            args: Positional arguments of callback
+            kwargs: Keyword arguments of callback
+            endpoint (str): Bot API method, e.g. "sendMessage"
+            data (Dict[str, Any]): Parameters of the request
+            rate_limit_args (Optional[int]): Priority, PRIORITY_INTERACTIVE if None
+
+        Returns:
+            The result of callback
+
+        Raises:
+            RetryAfter: If Telegram still rejects the request after max_retries retries
+        """
+        priority = PRIORITY_INTERACTIVE if rate_limit_args is None else rate_limit_args
+        chat_id = data.get("chat_id")
+        for attempt in range(self.max_retries + 1):
+            if chat_id is not None:
+                await self.chat_limiter.acquire(chat_id)
+            await self._acquire_global(priority)
+            try:
+                return await callback(*args, **kwargs)
+            except RetryAfter as e:
+                if attempt == self.max_retries:
+                    raise
+                logger.warning(f"Telegram asked to retry {endpoint} after {e.retry_after}s, pausing sends")
+                self._paused_until = max(self._paused_until, time.monotonic() + e.retry_after)
+
+    async def _acquire_global(self, priority: int) -> None:
+        granted = asyncio.get_running_loop().create_future()
+        self._queue.put_nowait((priority, next(self._sequence), granted))
+        await granted
+
+    async def _dispatch(self) -> None:
+        while True:
+            priority, sequence, granted = await self._queue.get()
+            if granted.done():
+                # The request was cancelled while queued
+                continue
+            pause = self._paused_until - time.monotonic()
+            if pause > 0:
+                await asyncio.sleep(pause)
+            await self.global_bucket.acquire()
+            if not granted.done():
+                granted.set_result(None)
@@ -3,23 +3,25 @@ import asyncio
 from telegram import Update
 from telegram.ext import (
     Application,
+    CallbackQueryHandler,
     CommandHandler,
     MessageHandler,
     ContextTypes,
-    filters,
 )
-from telegram.error import NetworkError, TimedOut, RetryAfter
-from app.services.rag_service import RAGService
+from telegram.error import NetworkError, TimedOut
 from app.core.config import get_settings
 from app.utils.logger import setup_loggers
-from sqlalchemy import create_engine
-from sqlalchemy.orm import sessionmaker
-from contextlib import asynccontextmanager
 from app.bot.handlers.menus import MenuHandlers
 from app.bot.handlers.lists import ListHandlers
 from app.bot.handlers.info import GeneralInfoHandlers
 from app.bot.handlers.case_specific import CaseSpecificHandlers
 from app.bot.handlers.message import MessageHandlers
+from app.bot.apartments import apartment_sampler
+from app.bot.db import dispose_engine
+from app.bot.pagination import LIST_CALLBACK_PREFIX
+from app.bot.reference_cache import reference_cache
+from app.bot.sender import OutboundScheduler
+from app.bot.updates import RAG_FILTER, ChatOrderedUpdateProcessor
 from app.bot.constants import *
 
 # Enable logging
@@ -28,20 +30,8 @@ conversation_logger = setup_loggers()
 
 # Initialize services
 settings = get_settings()
-rag_service = RAGService()
-engine = create_engine(settings.DATABASE_URL)
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 message_handlers = MessageHandlers()
 
-@asynccontextmanager
-async def get_db():
-    """Creates a database session context manager."""
-    db = SessionLocal()
-    try:
-        yield db
-    finally:
-        db.close()
-
 async def check_access(update: Update) -> bool:
     """
     Checks if a user has access to the bot based on development mode settings.
@@ -54,7 +44,7 @@ async def check_access(update: Update) -> bool:
     """
     settings = get_settings()
     if settings.DEVELOPMENT_MODE:
-        return update.message.from_user.id == settings.DEVELOPER_USER_ID
+        return update.effective_user is not None and update.effective_user.id == settings.DEVELOPER_USER_ID
     return True
 
 MAX_RETRIES = 3
@@ -74,22 +64,19 @@ async def safe_send_message(update: Update, text: str, retries: int = MAX_RETRIE
     """
     for attempt in range(retries):
         try:
-            await update.message.reply_text(text)
+            await update.effective_message.reply_text(text)
             return
         except (NetworkError, TimedOut) as e:
             if attempt == retries - 1:  # Last attempt
                 logger.error(f"Failed to send message after {retries} attempts: {e}")
-                await update.message.reply_text(
+                await update.effective_message.reply_text(
                     "⚠️ Network issue detected. Please try again in a few moments."
                 )
                 return
             await asyncio.sleep(RETRY_DELAY * (attempt + 1))  # Exponential backoff
-        except RetryAfter as e:
-            await asyncio.sleep(e.retry_after)
-            continue
         except Exception as e:
             logger.error(f"Unexpected error while sending message: {e}")
-            await update.message.reply_text(
+            await update.effective_message.reply_text(
                 "⚠️ An unexpected error occurred. Please try again."
             )
             return
@@ -110,10 +97,27 @@ async def start(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
         return
     await safe_send_message(update, WELCOME_MESSAGE)
 
-def create_bot_application() -> Application:
+async def post_init(application: Application) -> None:
+    """Load the reference cache and apartment pool before the first update and keep them in sync with writes."""
+    await reference_cache.load()
+    await apartment_sampler.load()
+    apartment_sampler.start_listening()
+    await reference_cache.start_listening()
+
+async def post_shutdown(application: Application) -> None:
+    """Stop listening for table changes and close the bot's database connections."""
+    await reference_cache.stop_listening()
+    await dispose_engine()
+
+def create_bot_application(webhook: bool = False) -> Application:
     """
     Creates and configures the Telegram bot application with all handlers.
 
+    Args:
+        webhook (bool, optional): Build the application without an updater, as
+            updates are put into its update_queue by the webhook endpoint.
+            Defaults to False (polling).
+
     Returns:
         Application: Configured Telegram bot application instance.
             - Includes all command handlers
@@ -123,8 +127,22 @@ def create_bot_application() -> Application:
     if not settings.TELEGRAM_BOT_TOKEN:
         raise ValueError("TELEGRAM_BOT_TOKEN not set in environment variables")
 
-    # Create application
-    application = Application.builder().token(settings.TELEGRAM_BOT_TOKEN).build()
+    # Create application; updates of different chats are processed concurrently,
+    # and every Bot API request goes through the outbound scheduler, which also
+    # retries requests rejected with RetryAfter
+    builder = (
+        Application.builder()
+        .token(settings.TELEGRAM_BOT_TOKEN)
+        .concurrent_updates(ChatOrderedUpdateProcessor())
+        .rate_limiter(OutboundScheduler())
+        .post_init(post_init)
+        .post_shutdown(post_shutdown)
+    )
+    if settings.TELEGRAM_BASE_URL:
+        builder = builder.base_url(settings.TELEGRAM_BASE_URL)
+    if webhook:
+        builder = builder.updater(None)
+    application = builder.build()
     
     # Add error handler
     application.add_error_handler(message_handlers.error_handler)
@@ -177,7 +195,8 @@ def create_bot_application() -> Application:
     application.add_handler(CommandHandler("sports_skating", case_specific_handlers.handle_sports_skating))
     application.add_handler(CommandHandler("sports_hiking", case_specific_handlers.handle_sports_hiking))
     application.add_handler(CommandHandler("sports_clubs", case_specific_handlers.handle_sports_clubs))
-    application.add_handler(MessageHandler(filters.TEXT & ~filters.COMMAND, message_handlers.handle_message))
+    application.add_handler(CallbackQueryHandler(list_handlers.handle_list_page, pattern=f"^{LIST_CALLBACK_PREFIX}"))
+    application.add_handler(MessageHandler(RAG_FILTER, message_handlers.handle_message))
 
     logger.info("Bot application created and configured")
     return application
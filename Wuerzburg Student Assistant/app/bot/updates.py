@@ -0,0 +1,232 @@
+import asyncio
+import logging
+import sys
+from typing import Any, Awaitable, Dict, Hashable, Optional
+from telegram import Update
+from telegram.ext import BaseUpdateProcessor, filters
+from app.bot.constants import ERROR_BUSY
+from app.core.config import get_settings
+
+logger = logging.getLogger(__name__)
+
+settings = get_settings()
+
+# Updates answered by the RAG pipeline, i.e. handled by MessageHandlers.handle_message
+RAG_FILTER = filters.TEXT & ~filters.COMMAND
+
+class ChatOrderedUpdateProcessor(BaseUpdateProcessor):
+    """
+    Processes updates concurrently while keeping the updates of each chat in order.
+
+    An update first waits for the previous updates of its chat to finish, then
+    for a free slot among max_concurrent_updates. Questions for the RAG pipeline
+    additionally wait for one of max_rag slots before taking an update slot, so
+    slow answers never hold slots that menus and lists could use; once
+    max_rag_waiting questions are queued, new ones are answered with a busy
+    message instead. Waiting for a chat or for the RAG pipeline happens before a
+    slot is taken, so one busy chat cannot block the others.
+
+    PTB starts a task for every incoming update, so intake is bounded by
+    admitting or dropping updates as soon as their task starts: an update is
+    dropped without running its handlers once max_pending_updates are pending,
+    or max_pending_per_chat are pending for its chat. Dropped messages get the
+    busy message and dropped button presses are answered with it, then their
+    tasks end, so waiting tasks never exceed the pending limits.
+    """
+    def __init__(self, max_concurrent_updates: int = settings.BOT_MAX_CONCURRENT_UPDATES,
+                 max_pending_updates: int = settings.BOT_MAX_PENDING_UPDATES,
+                 max_pending_per_chat: int = settings.BOT_MAX_PENDING_PER_CHAT,
+                 max_rag: int = settings.BOT_MAX_CONCURRENT_RAG,
+                 max_rag_waiting: int = settings.BOT_MAX_WAITING_RAG,
+                 metrics_log_interval: float = settings.BOT_METRICS_LOG_INTERVAL) -> None:
+        """
+        Initialize the processor.
+
+        Args:
+            max_concurrent_updates (int, optional): Updates processed at once.
+                Defaults to BOT_MAX_CONCURRENT_UPDATES.
+            max_pending_updates (int, optional): Updates admitted at once, waiting or
+                running; more are dropped. Defaults to BOT_MAX_PENDING_UPDATES.
+            max_pending_per_chat (int, optional): Updates of one chat admitted at once;
+                more are dropped. Defaults to BOT_MAX_PENDING_PER_CHAT.
+            max_rag (int, optional): RAG questions answered at once. Defaults to BOT_MAX_CONCURRENT_RAG.
+            max_rag_waiting (int, optional): RAG questions that may wait for the pipeline.
+                Defaults to BOT_MAX_WAITING_RAG.
+            metrics_log_interval (float, optional): Seconds between metrics log lines,
+                0 to disable. Defaults to BOT_METRICS_LOG_INTERVAL.
+
+        Returns:
+            None
+        """
+        # Admission is decided in do_process_update without waiting, so the base
+        # class semaphore must never block; slots for running updates are ours
+        super().__init__(sys.maxsize)
+        self.max_running = max_concurrent_updates
+        self.max_pending = max(max_pending_updates, max_concurrent_updates)
+        self.max_pending_per_chat = max_pending_per_chat
+        self.max_rag = max_rag
+        self.max_rag_waiting = max_rag_waiting
+        self.metrics_log_interval = metrics_log_interval
+        self._slots = asyncio.Semaphore(max_concurrent_updates)
+        self._rag_slots = asyncio.Semaphore(max_rag)
+        self._chat_locks: Dict[Hashable, asyncio.Lock] = {}
+        self._chat_pending: Dict[Hashable, int] = {}
+        self._metrics_task: Optional[asyncio.Task] = None
+        self.pending = 0
+        self.running = 0
+        self.rag_waiting = 0
+        self.rag_running = 0
+        self.rag_rejected = 0
+        self.dropped = 0
+        self.processed = 0
+        self.max_pending_seen = 0
+
+    async def initialize(self) -> None:
+        """Start logging metrics."""
+        if self.metrics_log_interval > 0:
+            self._metrics_task = asyncio.get_running_loop().create_task(self._log_metrics())
+
+    async def shutdown(self) -> None:
+        """Stop logging metrics."""
+        if self._metrics_task is not None:
+            self._metrics_task.cancel()
+            try:
+                await self._metrics_task
+            except asyncio.CancelledError:
+                pass
+            self._metrics_task = None
+
+    async def do_process_update(self, update: object, coroutine: Awaitable[Any]) -> None:
+        """
+        Run the handlers of an update after the earlier updates of its chat.
+
+        The update is dropped instead, with a busy reply, if the bot or its
+        chat has too many pending updates.
+
+        Args:
+            update (object): The update
+            coroutine (Awaitable[Any]): Runs the handlers of the update
+
+        Returns:
+            None
+        """
+        key = self._chat_key(update)
+        if self.pending >= self.max_pending or (
+                key is not None and self._chat_pending.get(key, 0) >= self.max_pending_per_chat):
+            self.dropped += 1
+            coroutine.close()
+            await self._reply_busy(update)
+            return
+        self.pending += 1
+        self.max_pending_seen = max(self.max_pending_seen, self.pending)
+        try:
+            if key is None:
+                await self._run(update, coroutine)
+                return
+            self._chat_pending[key] = self._chat_pending.get(key, 0) + 1
+            lock = self._chat_locks.setdefault(key, asyncio.Lock())
+            try:
+                async with lock:
+                    await self._run(update, coroutine)
+            finally:
+                self._chat_pending[key] -= 1
+                if not self._chat_pending[key]:
+                    del self._chat_pending[key]
+                    del self._chat_locks[key]
+        finally:
+            self.pending -= 1
+            self.processed += 1
+
+    async def _run(self, update: object, coroutine: Awaitable[Any]) -> None:
+        if not (isinstance(update, Update) and RAG_FILTER.check_update(update)):
+            async with self._slots:
+                await self._timed(coroutine)
+            return
+
+        if self.rag_waiting >= self.max_rag_waiting:
+            # Shed load instead of letting the queue grow without bound
+            self.rag_rejected += 1
+            coroutine.close()
+            await self._reply_busy(update)
+            return
+
+        self.rag_waiting += 1
+        try:
+            await self._rag_slots.acquire()
+        finally:
+            self.rag_waiting -= 1
+        try:
+            self.rag_running += 1
+            async with self._slots:
+                await self._timed(coroutine)
+        finally:
+            self.rag_running -= 1
+            self._rag_slots.release()
+
+    async def _reply_busy(self, update: object) -> None:
+        """Tell the user an update was turned away; stops the loading spinner of buttons."""
+        if not isinstance(update, Update):
+            return
+        try:
+            if update.callback_query is not None:
+                await update.callback_query.answer(ERROR_BUSY)
+            elif update.effective_message is not None:
+                await update.effective_message.reply_text(ERROR_BUSY)
+        except Exception as e:
+            logger.error(f"Error sending busy message: {e}")
+
+    async def _timed(self, coroutine: Awaitable[Any]) -> None:
+        self.running += 1
+        try:
+            await coroutine
+        finally:
+            self.running -= 1
+
+    def _chat_key(self, update: object) -> Optional[Hashable]:
+        if not isinstance(update, Update):
+            return None
+        if update.effective_chat is not None:
+            return update.effective_chat.id
+        if update.effective_user is not None:
+            return ("user", update.effective_user.id)
+        return None
+
+    def stats(self) -> Dict[str, int]:
+        """
+        Get the update queue metrics.
+
+        Returns:
+            Dict[str, int]:
+                - pending (int): Updates admitted and not finished, waiting or running
+                - running (int): Updates whose handlers are running
+                - waiting (int): Updates waiting for their chat, the RAG pipeline or a slot
+                - chats (int): Chats with pending updates
+                - rag_running (int): Questions being answered
+                - rag_waiting (int): Questions waiting for the RAG pipeline
+                - rag_rejected (int): Questions turned away since start
+                - dropped (int): Updates dropped by the pending limits since start
+                - processed (int): Updates finished since start
+                - max_pending (int): Highest pending count since start
+        """
+        return {
+            "pending": self.pending,
+            "running": self.running,
+            "waiting": self.pending - self.running,
+            "chats": len(self._chat_pending),
+            "rag_running": self.rag_running,
+            "rag_waiting": self.rag_waiting,
+            "rag_rejected": self.rag_rejected,
+            "dropped": self.dropped,
+            "processed": self.processed,
+            "max_pending": self.max_pending_seen
+        }
+
+    async def _log_metrics(self) -> None:
+        last_processed = None
+        while True:
+            await asyncio.sleep(self.metrics_log_interval)
+            stats = self.stats()
+            # Stay quiet while the bot is idle
+            if stats["pending"] or stats["processed"] != last_processed:
+                logger.info(f"Update queue: {', '.join(f'{name}={value}' for name, value in stats.items())}")
+            last_processed = stats["processed"]
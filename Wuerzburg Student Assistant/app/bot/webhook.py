@@ -0,0 +1,101 @@
+import hmac
+import logging
+from typing import Dict, Optional
+from fastapi import APIRouter, Header, HTTPException, Request, Response
+from telegram import Update
+from telegram.ext import Application
+from app.bot.telegram_bot import create_bot_application
+from app.core.config import get_settings
+
+logger = logging.getLogger(__name__)
+
+settings = get_settings()
+
+router = APIRouter()
+
+# Bot application served by this process in webhook mode
+_application: Optional[Application] = None
+
+def webhook_url() -> str:
+    """Full URL Telegram posts updates to."""
+    return settings.WEBHOOK_URL.rstrip("/") + settings.WEBHOOK_PATH
+
+async def start_webhook_bot() -> Application:
+    """
+    Start the bot inside this process and register the webhook with Telegram.
+
+    Handlers run on the server's event loop and share the process-wide RAG
+    service with the API endpoints.
+
+    Returns:
+        Application: The running bot application
+
+    Raises:
+        ValueError: If WEBHOOK_URL or WEBHOOK_SECRET_TOKEN is not set
+    """
+    global _application
+    if not settings.WEBHOOK_URL:
+        raise ValueError("WEBHOOK_URL not set in environment variables")
+    if not settings.WEBHOOK_SECRET_TOKEN:
+        raise ValueError("WEBHOOK_SECRET_TOKEN not set in environment variables")
+
+    application = create_bot_application(webhook=True)
+    await application.initialize()
+    # post_init/post_shutdown are only called by run_polling/run_webhook
+    if application.post_init:
+        await application.post_init(application)
+    await application.start()
+    await application.bot.set_webhook(
+        url=webhook_url(),
+        secret_token=settings.WEBHOOK_SECRET_TOKEN,
+        allowed_updates=Update.ALL_TYPES
+    )
+    _application = application
+    logger.info(f"Bot receiving updates at {webhook_url()}")
+    return application
+
+async def stop_webhook_bot() -> None:
+    """
+    Stop the bot after the updates already received are processed.
+
+    The webhook stays registered, so Telegram keeps updates that arrive during
+    a restart and delivers them once the server is back.
+
+    Returns:
+        None
+    """
+    global _application
+    if _application is None:
+        return
+    application, _application = _application, None
+    await application.stop()
+    if application.post_shutdown:
+        await application.post_shutdown(application)
+    await application.shutdown()
+
+def webhook_bot_stats() -> Dict[str, int]:
+    """Update queue metrics of the bot served by this process, empty if none."""
+    if _application is None:
+        return {}
+    stats = _application.update_processor.stats()
+    stats["update_queue"] = _application.update_queue.qsize()
+    return stats
+
+@router.post(settings.WEBHOOK_PATH, include_in_schema=False)
+async def telegram_webhook(
+    request: Request,
+    secret_token: Optional[str] = Header(None, alias="X-Telegram-Bot-Api-Secret-Token")
+) -> Response:
+    """Hand an update from Telegram to the bot and acknowledge it right away."""
+    if _application is None:
+        raise HTTPException(status_code=503, detail="Bot is not running in webhook mode")
+    if not hmac.compare_digest((secret_token or "").encode(), settings.WEBHOOK_SECRET_TOKEN.encode()):
+        raise HTTPException(status_code=403, detail="Invalid secret token")
+    try:
+        update = Update.de_json(await request.json(), _application.bot)
+    except (KeyError, TypeError, ValueError):
+        update = None
+    if update is None:
+        raise HTTPException(status_code=400, detail="Invalid update")
+    await _application.update_queue.put(update)
+    return Response(status_code=200)
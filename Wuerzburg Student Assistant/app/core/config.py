@@ -1,18 +1,39 @@
 from pydantic_settings import BaseSettings
 from functools import lru_cache
+from typing import List
 
 class Settings(BaseSettings):
     PROJECT_NAME: str = "Würzburg Student Assistant"
     VERSION: str = "1.0.0"
     API_V1_STR: str = "/api/v1"
     VECTOR_STORE_PATH: str = "data/vector_store"
+    LOCAL_VECTOR_STORE_PATH: str = "data/vector_store_local"
+    LOCAL_EMBEDDING_MODEL_PATH: str = "data/local_embeddings.npz"
     GENERAL_INFO_PATH: str = "data/json_data/general_info.json"
+    EMBEDDING_CACHE_PATH: str = "data/embedding_cache.sqlite3"
     
     DATABASE_URL: str = ""
+    ASYNC_DATABASE_URL: str = ""  # Bot database URL; defaults to DATABASE_URL with asyncpg/aiosqlite
+
+    # Database Pool (per engine and process)
+    DB_POOL_SIZE: int = 5
+    DB_MAX_OVERFLOW: int = 10
+    DB_POOL_TIMEOUT: float = 30.0  # Seconds to wait for a free connection
+    DB_POOL_RECYCLE: int = 1800  # Seconds before a connection is replaced
+    DB_POOL_PRE_PING: bool = True
+    DB_STATEMENT_TIMEOUT_MS: int = 15000  # PostgreSQL statement_timeout; 0 disables
     
     OPENAI_API_KEY: str = ""
     
     TELEGRAM_BOT_TOKEN: str = ""
+    TELEGRAM_BASE_URL: str = ""  # Bot API URL prefix ending in "/bot"; empty for api.telegram.org, set to a stub for load tests
+
+    # Bot Deployment
+    BOT_MODE: str = "polling"  # "polling": run_bot.py polls Telegram; "webhook": the FastAPI app receives updates
+    BOT_POLL_INTERVAL: float = 0.0  # Seconds between polls; getUpdates already long-polls, so no pause is needed
+    WEBHOOK_URL: str = ""  # Public HTTPS base URL of the FastAPI app, e.g. https://bot.example.com
+    WEBHOOK_PATH: str = "/telegram/webhook"
+    WEBHOOK_SECRET_TOKEN: str = ""  # Sent by Telegram in X-Telegram-Bot-Api-Secret-Token; required in webhook mode
     
     # Development Mode
     DEVELOPMENT_MODE: bool = False
@@ -22,6 +43,83 @@ class Settings(BaseSettings):
     OPENAI_EMBEDDING_MODEL: str = "text-embedding-ada-002"  # Models: text-embedding-3-small, text-embedding-ada-002
     OPENAI_CHAT_MODEL: str = "gpt-3.5-turbo" # Models: gpt-3.5-turbo, gpt-4o-mini, gpt-4o
     MODEL_TEMPERATURE: float = 0.7
+
+    # Bot Reference Cache
+    REFERENCE_CACHE_TTL_SECONDS: int = 300  # Reload interval; writes via the API reload sooner
+
+    # Apartment Sampling
+    APARTMENT_SAMPLE_SIZE: int = 5  # Apartments shown per /apartment_private
+    APARTMENT_POOL_TTL_SECONDS: int = 300  # Reload interval of the apartment id pool; ingests reload sooner
+    APARTMENT_SEEN_MAX_USERS: int = 10000  # Users whose position in the apartment rotation is remembered
+
+    # Bot Lists
+    LIST_PAGE_SIZE: int = 10  # Entries per page of a list command
+    TELEGRAM_MESSAGE_LIMIT: int = 4096  # Maximum characters of a Telegram message
+
+    # Bot Rate Limit (Telegram allows about 30 messages/s overall, 1/s per chat and 20/min per group)
+    GLOBAL_MESSAGES_PER_SECOND: float = 30.0  # Outgoing requests per second across all chats
+    CHAT_MESSAGES_PER_SECOND: float = 1.0  # Sustained outgoing messages per private chat
+    GROUP_MESSAGES_PER_MINUTE: float = 20.0  # Sustained outgoing messages per group chat
+    CHAT_MESSAGE_BURST: int = 3  # Messages a chat may receive at once before being throttled
+    SEND_MAX_RETRIES: int = 3  # Retries of a request rejected with RetryAfter
+
+    # Bot Concurrency
+    BOT_MAX_CONCURRENT_UPDATES: int = 32  # Updates processed at once; updates of one chat always run in order
+    BOT_MAX_PENDING_UPDATES: int = 1024  # Updates accepted (waiting or running) before new ones are dropped
+    BOT_MAX_PENDING_PER_CHAT: int = 10  # Updates of one chat accepted before its new ones are dropped
+    BOT_MAX_CONCURRENT_RAG: int = 8  # Questions answered by the RAG pipeline at once
+    BOT_MAX_WAITING_RAG: int = 64  # Questions queued for the RAG pipeline before new ones are turned away
+    BOT_METRICS_LOG_INTERVAL: float = 60.0  # Seconds between update queue metrics log lines; 0 disables
+
+    # Streaming
+    STREAM_EDIT_INTERVAL: float = 1.0  # Minimum seconds between Telegram message edits while streaming
+
+    # Chunking
+    CHUNKED_SOURCES: List[str] = ["general_info"]  # Sources whose long documents are split before indexing
+    CHUNK_MAX_TOKENS: int = 200
+    CHUNK_OVERLAP_TOKENS: int = 40
+    PARENT_EXPAND_MIN_CHUNKS: int = 2  # Matching chunks of one document that trigger using the full document
+
+    # Embeddings
+    EMBEDDING_BACKEND: str = "openai"  # Backends: openai, local (offline TF-IDF + SVD)
+    LOCAL_EMBEDDING_DIMENSIONS: int = 256
+    LOCAL_EMBEDDING_FEATURES: int = 2 ** 18
+
+    # Retrieval
+    RETRIEVAL_MAX_DOCUMENTS: int = 8  # Candidates considered for the prompt context
+    CONTEXT_TOKEN_BUDGET: int = 800  # Maximum tokens of retrieved context in the prompt
+    INTENT_ROUTING_ENABLED: bool = True  # Search only the sources a question is about
+    HYBRID_SEARCH_ENABLED: bool = True  # Fuse BM25 keyword hits with dense hits
+    HYBRID_CANDIDATES: int = 10  # Candidates taken from each retriever before fusion
+    RRF_K: int = 60
+
+    # Vector Index
+    VECTOR_INDEX_TYPE: str = "flat"  # flat, ivf_flat, ivf_pq or hnsw; trained when the store is saved
+    IVF_NLIST: int = 0  # Inverted lists; 0 picks about sqrt(number of vectors)
+    IVF_NPROBE: int = 8  # Inverted lists visited per search
+    PQ_M: int = 64  # Sub-quantizers; lowered to a divisor of the embedding dimension if needed
+    PQ_NBITS: int = 8
+    PQ_RERANK: int = 4  # IVF-PQ candidates per result re-scored with exact vectors
+    HNSW_M: int = 32  # Graph neighbours per node
+    HNSW_EF_SEARCH: int = 64
+    FILTER_EXACT_FRACTION: float = 0.1  # Source-filtered searches over less than this share of the index scan exactly
+    VECTOR_STORE_KEEP_SECONDS: float = 3600.0  # Age before superseded store versions are deleted; the previous version is always kept
+    VECTOR_STORE_FLUSH_SECONDS: float = 5.0  # Seconds writes are collected before the store is saved; 0 saves on every write
+    VECTOR_STORE_RELOAD_SECONDS: float = 10.0  # Interval for loading versions saved by other processes (API workers, bot); 0 disables
+
+    # Batch Questions
+    BATCH_MAX_QUESTIONS: int = 100  # Questions accepted per /ask/batch request
+    BATCH_MAX_CONCURRENCY: int = 4  # Chat completions in flight per batch
+
+    # Embedding Cache
+    EMBEDDING_CACHE_ENABLED: bool = True
+    EMBEDDING_CACHE_MAX_QUERIES: int = 10000  # Question embeddings kept; least recently used are evicted
+
+    # Answer Cache
+    ANSWER_CACHE_ENABLED: bool = True
+    ANSWER_CACHE_MAX_ENTRIES: int = 1000
+    ANSWER_CACHE_TTL_SECONDS: int = 86400
+    ANSWER_CACHE_MAX_DISTANCE: float = 0.03  # Cosine distance for reusing an answer to a similar question
     
     class Config:
         env_file = ".env"
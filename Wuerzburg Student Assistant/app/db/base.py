@@ -1,11 +1,12 @@
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
-from sqlalchemy import create_engine
 from app.core.config import get_settings
+from app.db.engine import create_db_engine
 
 settings = get_settings()
 
-engine = create_engine(settings.DATABASE_URL)
+# The one synchronous engine of a process, shared by the API and RAGService
+engine = create_db_engine(settings.DATABASE_URL)
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 Base = declarative_base()
 
@@ -0,0 +1,137 @@
+import threading
+import time
+from typing import Any, Dict
+from sqlalchemy import create_engine
+from sqlalchemy.engine import URL, Engine, make_url
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+from sqlalchemy.ext.asyncio import AsyncEngine, create_async_engine
+from sqlalchemy.pool import AsyncAdaptedQueuePool, QueuePool
+from app.core.config import get_settings
+
+settings = get_settings()
+
+# Engines created in this process by name, for `pool_stats`
+_engines: Dict[str, Any] = {}
+
+class InstrumentedQueuePool(QueuePool):
+    """QueuePool that records how long checkouts wait for a connection, including pre-ping."""
+    def __init__(self, *args, **kwargs) -> None:
+        super().__init__(*args, **kwargs)
+        self._stats_lock = threading.Lock()
+        self.checkouts = 0
+        self.timeouts = 0
+        self.wait_seconds_total = 0.0
+        self.wait_seconds_max = 0.0
+
+    def connect(self) -> Any:
+        start = time.perf_counter()
+        try:
+            return super().connect()
+        except PoolTimeoutError:
+            with self._stats_lock:
+                self.timeouts += 1
+            raise
+        finally:
+            waited = time.perf_counter() - start
+            with self._stats_lock:
+                self.checkouts += 1
+                self.wait_seconds_total += waited
+                self.wait_seconds_max = max(self.wait_seconds_max, waited)
+
+class InstrumentedAsyncQueuePool(InstrumentedQueuePool, AsyncAdaptedQueuePool):
+    """InstrumentedQueuePool for async engines."""
+
+def _engine_options(url: URL, poolclass: type) -> Dict[str, Any]:
+    """
+    Build create_engine arguments from the DB_* pool settings.
+
+    Args:
+        url (URL): The database URL
+        poolclass (type): Pool class to use
+
+    Returns:
+        Dict[str, Any]: Keyword arguments for create_engine/create_async_engine
+    """
+    if url.get_backend_name() == "sqlite" and url.database in (None, "", ":memory:"):
+        # In-memory SQLite lives in a single connection; keep the default pool
+        return {}
+
+    options = {
+        "poolclass": poolclass,
+        "pool_size": settings.DB_POOL_SIZE,
+        "max_overflow": settings.DB_MAX_OVERFLOW,
+        "pool_timeout": settings.DB_POOL_TIMEOUT,
+        "pool_recycle": settings.DB_POOL_RECYCLE,
+        "pool_pre_ping": settings.DB_POOL_PRE_PING
+    }
+    if url.get_backend_name() == "postgresql" and settings.DB_STATEMENT_TIMEOUT_MS:
+        timeout = str(settings.DB_STATEMENT_TIMEOUT_MS)
+        if url.get_driver_name() == "asyncpg":
+            options["connect_args"] = {"server_settings": {"statement_timeout": timeout}}
+        else:
+            options["connect_args"] = {"options": f"-c statement_timeout={timeout}"}
+    return options
+
+def create_db_engine(url: str, name: str = "default") -> Engine:
+    """
+    Create a synchronous engine with the shared pool settings.
+
+    Args:
+        url (str): The database URL
+        name (str, optional): Name reported by `pool_stats`. Defaults to "default".
+
+    Returns:
+        Engine: The engine
+    """
+    parsed = make_url(url)
+    engine = create_engine(parsed, **_engine_options(parsed, InstrumentedQueuePool))
+    _engines[name] = engine
+    return engine
+
+def create_async_db_engine(url: URL, name: str = "async") -> AsyncEngine:
+    """
+    Create an async engine with the shared pool settings.
+
+    Args:
+        url (URL): The database URL, with an async driver
+        name (str, optional): Name reported by `pool_stats`. Defaults to "async".
+
+    Returns:
+        AsyncEngine: The engine
+    """
+    engine = create_async_engine(url, **_engine_options(url, InstrumentedAsyncQueuePool))
+    _engines[name] = engine
+    return engine
+
+def pool_stats() -> Dict[str, Dict[str, Any]]:
+    """
+    Get connection pool metrics of every engine created in this process.
+
+    Returns:
+        Dict[str, Dict[str, Any]]: Per engine name:
+            - size (int): Configured pool size
+            - checked_out (int): Connections currently in use
+            - checked_in (int): Idle connections in the pool
+            - overflow (int): Connections open beyond the pool size
+            - checkouts (int): Checkouts since start
+            - timeouts (int): Checkouts that gave up after DB_POOL_TIMEOUT
+            - wait_seconds_total (float): Time spent waiting for connections
+            - wait_seconds_max (float): Longest single wait
+    """
+    stats = {}
+    for name, engine in _engines.items():
+        pool = getattr(engine, "sync_engine", engine).pool
+        if not isinstance(pool, InstrumentedQueuePool):
+            stats[name] = {"status": pool.status()}
+            continue
+        stats[name] = {
+            "size": pool.size(),
+            "checked_out": pool.checkedout(),
+            "checked_in": pool.checkedin(),
+            "overflow": max(pool.overflow(), 0),
+            "checkouts": pool.checkouts,
+            "timeouts": pool.timeouts,
+            "wait_seconds_total": round(pool.wait_seconds_total, 6),
+            "wait_seconds_max": round(pool.wait_seconds_max, 6)
+        }
+    return stats
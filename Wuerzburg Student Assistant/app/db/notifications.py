@@ -0,0 +1,79 @@
+import logging
+from typing import Any, Callable, List, Optional
+from sqlalchemy import text
+from sqlalchemy.engine import URL
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.orm import Session
+
+logger = logging.getLogger(__name__)
+
+# PostgreSQL NOTIFY channel; the payload is the name of the changed table
+CHANGES_CHANNEL = "table_changes"
+
+# In-process callbacks, for readers running in the same process as the writer
+_listeners: List[Callable[[str], None]] = []
+
+def add_change_listener(callback: Callable[[str], None]) -> None:
+    """Call callback with the table name whenever `notify_table_changed` runs in this process."""
+    _listeners.append(callback)
+
+def notify_table_changed(db: Session, table: str) -> None:
+    """
+    Tell caches that rows of a table changed.
+
+    Sends a NOTIFY on CHANGES_CHANNEL when the database is PostgreSQL, so bot
+    processes listening with `listen_for_changes` pick it up, and calls the
+    in-process listeners. Failures are logged, never raised, as the write
+    itself has already been committed.
+
+    Args:
+        db (Session): Session that committed the write
+        table (str): Name of the changed table
+
+    Returns:
+        None
+    """
+    bind = db.get_bind()
+    if bind.dialect.name == "postgresql":
+        try:
+            # Own connection, so the session and its loaded objects are untouched
+            with bind.connect() as connection:
+                connection.execute(text("SELECT pg_notify(:channel, :table)"), {"channel": CHANGES_CHANNEL, "table": table})
+                connection.commit()
+        except SQLAlchemyError as e:
+            logger.error(f"Error notifying change of table {table}: {str(e)}")
+    dispatch_change(table)
+
+def dispatch_change(table: str) -> None:
+    """Call the in-process change listeners with the name of a changed table."""
+    for listener in list(_listeners):
+        try:
+            listener(table)
+        except Exception as e:
+            logger.error(f"Error in change listener for table {table}: {str(e)}")
+
+async def listen_for_changes(url: URL, callback: Callable[[str], None]) -> Optional[Any]:
+    """
+    Listen for table change notifications from other processes.
+
+    Opens a dedicated asyncpg connection, since LISTEN needs a connection
+    that is never returned to a pool. Does nothing for other databases.
+
+    Args:
+        url (URL): The database URL
+        callback (Callable[[str], None]): Called with the changed table name
+
+    Returns:
+        Optional[asyncpg.Connection]: The listening connection, to be closed on
+            shutdown, or None if the database does not support notifications
+    """
+    if url.get_backend_name() != "postgresql":
+        return None
+    import asyncpg
+
+    connection = await asyncpg.connect(url.set(drivername="postgresql").render_as_string(hide_password=False))
+    await connection.add_listener(CHANGES_CHANNEL, lambda conn, pid, channel, payload: callback(payload))
+    connection.add_termination_listener(
+        lambda conn: logger.warning("Table change listener disconnected, relying on cache TTL")
+    )
+    return connection
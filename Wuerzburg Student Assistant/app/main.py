@@ -1,12 +1,19 @@
-from fastapi import FastAPI, Depends, HTTPException
+from fastapi import FastAPI, Depends, HTTPException, BackgroundTasks
 from sqlalchemy.orm import Session
+from fastapi.responses import StreamingResponse
 from typing import List
+import asyncio
+import json
+import logging
 import uvicorn
 
+from app.bot.webhook import router as telegram_router, start_webhook_bot, stop_webhook_bot, webhook_bot_stats
 from app.core.config import get_settings
 from app.db.base import get_db
 from app.db import models
 from app.db.base import engine
+from app.db.engine import pool_stats
+from app.db.notifications import notify_table_changed
 from app.schemas.base import (
     Apartment, ApartmentCreate,
     Place, PlaceCreate,
@@ -16,9 +23,13 @@ from app.schemas.base import (
     Bank, BankCreate,
     TelecomProvider, TelecomProviderCreate,
     UsefulApp, UsefulAppCreate,
-    RAGQuery, RAGResponse
+    RAGQuery, RAGResponse,
+    RAGBatchQuery, RAGBatchItem, RAGBatchResponse
 )
-from app.services.rag_service import RAGService
+from app.services.documents import build_document
+from app.services.registry import get_rag_service, warm_up_services
+
+logger = logging.getLogger(__name__)
 
 # Create database tables
 models.Base.metadata.create_all(bind=engine)
@@ -29,19 +40,42 @@ app = FastAPI(
     openapi_url=f"{get_settings().API_V1_STR}/openapi.json"
 )
 
-# Initialize RAG service
-rag_service = RAGService()
+app.include_router(telegram_router)
+
+@app.on_event("startup")
+async def startup() -> None:
+    # Load the shared RAG service before the first request arrives; loading
+    # reads the store and may call the embedding API, so keep it off the loop
+    await asyncio.get_running_loop().run_in_executor(None, warm_up_services)
+    # In webhook mode the bot runs in this process and shares the RAG service
+    if get_settings().BOT_MODE == "webhook":
+        await start_webhook_bot()
+
+@app.on_event("shutdown")
+async def shutdown() -> None:
+    await stop_webhook_bot()
+    # Save index changes still waiting for VECTOR_STORE_FLUSH_SECONDS
+    await asyncio.get_running_loop().run_in_executor(None, get_rag_service().flush)
+
+def _index_document(document: dict) -> None:
+    """Embed a newly written record and add it to the live vector store; saved within VECTOR_STORE_FLUSH_SECONDS."""
+    try:
+        get_rag_service().upsert_documents([document])
+    except Exception as e:
+        logger.error(f"Error indexing {document['source']} {document['id']}: {e}")
 
 @app.get("/")
 async def root():
     return {"message": "Welcome to Würzburg Student Assistant API"}
 
 @app.post("/apartments/", response_model=Apartment)
-def create_apartment(apartment: ApartmentCreate, db: Session = Depends(get_db)):
+def create_apartment(apartment: ApartmentCreate, background_tasks: BackgroundTasks, db: Session = Depends(get_db)):
     db_apartment = models.Apartment(**apartment.model_dump())
     db.add(db_apartment)
     db.commit()
     db.refresh(db_apartment)
+    notify_table_changed(db, db_apartment.__tablename__)
+    background_tasks.add_task(_index_document, build_document(db_apartment))
     return db_apartment
 
 @app.get("/apartments/", response_model=List[Apartment])
@@ -50,11 +84,13 @@ def list_apartments(skip: int = 0, limit: int = 10, db: Session = Depends(get_db
     return apartments
 
 @app.post("/places/", response_model=Place)
-def create_place(place: PlaceCreate, db: Session = Depends(get_db)):
+def create_place(place: PlaceCreate, background_tasks: BackgroundTasks, db: Session = Depends(get_db)):
     db_place = models.Place(**place.model_dump())
     db.add(db_place)
     db.commit()
     db.refresh(db_place)
+    notify_table_changed(db, db_place.__tablename__)
+    background_tasks.add_task(_index_document, build_document(db_place))
     return db_place
 
 @app.get("/places/", response_model=List[Place])
@@ -74,11 +110,13 @@ def list_places(
 
 # WhatsApp groups endpoints
 @app.post("/whatsapp-groups/", response_model=WhatsAppGroup)
-def create_whatsapp_group(group: WhatsAppGroupCreate, db: Session = Depends(get_db)):
+def create_whatsapp_group(group: WhatsAppGroupCreate, background_tasks: BackgroundTasks, db: Session = Depends(get_db)):
     db_group = models.WhatsAppGroup(**group.model_dump())
     db.add(db_group)
     db.commit()
     db.refresh(db_group)
+    notify_table_changed(db, db_group.__tablename__)
+    background_tasks.add_task(_index_document, build_document(db_group))
     return db_group
 
 @app.get("/whatsapp-groups/", response_model=List[WhatsAppGroup])
@@ -94,11 +132,13 @@ def list_whatsapp_groups(
     return query.offset(skip).limit(limit).all()
 
 @app.post("/insurances/", response_model=Insurance)
-def create_insurance(insurance: InsuranceCreate, db: Session = Depends(get_db)):
+def create_insurance(insurance: InsuranceCreate, background_tasks: BackgroundTasks, db: Session = Depends(get_db)):
     db_insurance = models.Insurance(**insurance.model_dump())
     db.add(db_insurance)
     db.commit()
     db.refresh(db_insurance)
+    notify_table_changed(db, db_insurance.__tablename__)
+    background_tasks.add_task(_index_document, build_document(db_insurance))
     return db_insurance
 
 @app.get("/insurances/", response_model=List[Insurance])
@@ -114,11 +154,13 @@ def list_insurances(
     return query.offset(skip).limit(limit).all()
 
 @app.post("/general-info/", response_model=GeneralInfo)
-def create_general_info(info: GeneralInfoCreate, db: Session = Depends(get_db)):
+def create_general_info(info: GeneralInfoCreate, background_tasks: BackgroundTasks, db: Session = Depends(get_db)):
     db_info = models.GeneralInfo(**info.model_dump())
     db.add(db_info)
     db.commit()
     db.refresh(db_info)
+    notify_table_changed(db, db_info.__tablename__)
+    background_tasks.add_task(_index_document, build_document(db_info))
     return db_info
 
 @app.get("/general-info/", response_model=List[GeneralInfo])
@@ -134,11 +176,13 @@ def list_general_info(
     return query.offset(skip).limit(limit).all()
 
 @app.post("/banks/", response_model=Bank)
-def create_bank(bank: BankCreate, db: Session = Depends(get_db)):
+def create_bank(bank: BankCreate, background_tasks: BackgroundTasks, db: Session = Depends(get_db)):
     db_bank = models.Bank(**bank.model_dump())
     db.add(db_bank)
     db.commit()
     db.refresh(db_bank)
+    notify_table_changed(db, db_bank.__tablename__)
+    background_tasks.add_task(_index_document, build_document(db_bank))
     return db_bank
 
 @app.get("/banks/", response_model=List[Bank])
@@ -154,11 +198,13 @@ def list_banks(
     return query.offset(skip).limit(limit).all()
 
 @app.post("/telecom-providers/", response_model=TelecomProvider)
-def create_telecom_provider(provider: TelecomProviderCreate, db: Session = Depends(get_db)):
+def create_telecom_provider(provider: TelecomProviderCreate, background_tasks: BackgroundTasks, db: Session = Depends(get_db)):
     db_provider = models.TelecomProvider(**provider.model_dump())
     db.add(db_provider)
     db.commit()
     db.refresh(db_provider)
+    notify_table_changed(db, db_provider.__tablename__)
+    background_tasks.add_task(_index_document, build_document(db_provider))
     return db_provider
 
 @app.get("/telecom-providers/", response_model=List[TelecomProvider])
@@ -166,11 +212,13 @@ def list_telecom_providers(skip: int = 0, limit: int = 10, db: Session = Depends
     return db.query(models.TelecomProvider).offset(skip).limit(limit).all()
 
 @app.post("/useful-apps/", response_model=UsefulApp)
-def create_useful_app(app: UsefulAppCreate, db: Session = Depends(get_db)):
+def create_useful_app(app: UsefulAppCreate, background_tasks: BackgroundTasks, db: Session = Depends(get_db)):
     db_app = models.UsefulApp(**app.model_dump())
     db.add(db_app)
     db.commit()
     db.refresh(db_app)
+    notify_table_changed(db, db_app.__tablename__)
+    background_tasks.add_task(_index_document, build_document(db_app))
     return db_app
 
 @app.get("/useful-apps/", response_model=List[UsefulApp])
@@ -188,10 +236,60 @@ def list_useful_apps(
 @app.post("/ask/", response_model=RAGResponse)
 async def ask_question(query: RAGQuery):
     try:
-        answer, sources = rag_service.query(query.query)
-        return RAGResponse(answer=answer, sources=sources)
+        answer, sources, usage = await get_rag_service().aquery(query.query)
+        return RAGResponse(answer=answer, sources=sources, usage=usage)
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
+@app.post("/ask/batch", response_model=RAGBatchResponse)
+async def ask_questions(batch: RAGBatchQuery):
+    """Answer many questions at once; results keep the request order and failures are reported per item."""
+    max_questions = get_settings().BATCH_MAX_QUESTIONS
+    if len(batch.queries) > max_questions:
+        raise HTTPException(status_code=400, detail=f"At most {max_questions} questions per batch")
+    results = await get_rag_service().aquery_batch(batch.queries)
+    items = []
+    for query, result in zip(batch.queries, results):
+        if isinstance(result, Exception):
+            logger.error(f"Error answering batch question: {result}")
+            items.append(RAGBatchItem(query=query, error=str(result)))
+        else:
+            answer, sources, usage = result
+            items.append(RAGBatchItem(query=query, answer=answer, sources=sources, usage=usage))
+    return RAGBatchResponse(results=items)
+
+@app.post("/ask/stream")
+async def ask_question_stream(query: RAGQuery):
+    """Stream the answer as Server-Sent Events: token*, sources, usage, done (or error)."""
+    async def events():
+        try:
+            sources, usage, tokens = await get_rag_service().astream(query.query)
+            async for token in tokens:
+                yield f"event: token\ndata: {json.dumps({'text': token})}\n\n"
+            yield f"event: sources\ndata: {json.dumps(sources)}\n\n"
+            yield f"event: usage\ndata: {json.dumps(usage)}\n\n"
+            yield "event: done\ndata: {}\n\n"
+        except Exception as e:
+            logger.error(f"Error streaming answer: {e}")
+            yield f"event: error\ndata: {json.dumps({'detail': str(e)})}\n\n"
+
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+@app.get("/ask/cache-stats")
+def answer_cache_stats():
+    return get_rag_service().cache_stats()
+
+@app.get("/metrics/db-pool")
+def db_pool_stats():
+    return pool_stats()
+
+@app.get("/metrics/bot-updates")
+def bot_update_stats():
+    return webhook_bot_stats()
+
 if __name__ == "__main__":
     uvicorn.run(app, host="0.0.0.0", port=8000)
@@ -1,6 +1,6 @@
 from pydantic import BaseModel
 from datetime import datetime
-from typing import Optional
+from typing import Dict, List, Optional
 
 class ApartmentBase(BaseModel):
     title: str
@@ -147,4 +147,18 @@ class RAGQuery(BaseModel):
     query: str
 
 class RAGResponse(BaseModel):
-    answer: str
\ No newline at end of file
+    answer: str
+    usage: Dict[str, int] = {}
+
+class RAGBatchQuery(BaseModel):
+    queries: List[str]
+
+class RAGBatchItem(BaseModel):
+    query: str
+    answer: Optional[str] = None
+    sources: List[str] = []
+    usage: Dict[str, int] = {}
+    error: Optional[str] = None
+
+class RAGBatchResponse(BaseModel):
+    results: List[RAGBatchItem]
@@ -0,0 +1,172 @@
+import re
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, List, NamedTuple, Optional, Tuple
+import numpy as np
+
+class CacheEntry(NamedTuple):
+    answer: str
+    sources: List[str]
+    vector: np.ndarray
+    expires_at: float
+
+class AnswerCache:
+    """
+    Two-layer answer cache placed in front of the RAG chain.
+
+    The first layer matches normalized question text exactly. The second layer
+    reuses an answer when a new query embedding lies within a cosine distance
+    threshold of a cached one. Entries expire after a TTL and the least
+    recently used entry is evicted when the cache is full. Each `clear` starts
+    a new generation; answers generated before it are not stored.
+    """
+    def __init__(self, max_entries: int, ttl_seconds: float, max_distance: float) -> None:
+        """
+        Initialize an empty answer cache.
+
+        Args:
+            max_entries (int): Maximum number of cached answers
+            ttl_seconds (float): Lifetime of a cached answer in seconds
+            max_distance (float): Maximum cosine distance for a semantic hit
+
+        Returns:
+            None
+        """
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.max_distance = max_distance
+        self._entries: "OrderedDict[str, CacheEntry]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._matrix: Optional[np.ndarray] = None
+        self._matrix_keys: List[str] = []
+        # Bumped by clear(); read by callers before they retrieve documents
+        self.generation = 0
+        self.exact_hits = 0
+        self.semantic_hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def normalize(query: str) -> str:
+        """Lowercase a query, collapse whitespace and drop trailing punctuation."""
+        query = re.sub(r"\s+", " ", query.lower()).strip()
+        return query.rstrip("?!. ")
+
+    def get(self, query: str) -> Optional[Tuple[str, List[str]]]:
+        """
+        Look up an answer by exact normalized question text.
+
+        Args:
+            query (str): The user's question
+
+        Returns:
+            Optional[Tuple[str, List[str]]]: The cached answer and sources, or None
+        """
+        key = self.normalize(query)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            if entry.expires_at < time.monotonic():
+                self._remove(key)
+                return None
+            self._entries.move_to_end(key)
+            self.exact_hits += 1
+            return entry.answer, list(entry.sources)
+
+    def get_similar(self, embedding: List[float]) -> Optional[Tuple[str, List[str]]]:
+        """
+        Look up an answer whose query embedding is close to the given one.
+
+        Counts a miss when nothing is close enough, so callers should try `get`
+        first and only then fall back to this lookup.
+
+        Args:
+            embedding (List[float]): Embedding of the user's question
+
+        Returns:
+            Optional[Tuple[str, List[str]]]: The cached answer and sources, or None
+        """
+        vector = self._unit(embedding)
+        with self._lock:
+            self._expire()
+            if self._entries:
+                if self._matrix is None:
+                    self._matrix_keys = list(self._entries.keys())
+                    self._matrix = np.stack([self._entries[k].vector for k in self._matrix_keys])
+                similarities = self._matrix @ vector
+                best = int(np.argmax(similarities))
+                if 1.0 - float(similarities[best]) <= self.max_distance:
+                    key = self._matrix_keys[best]
+                    entry = self._entries[key]
+                    self._entries.move_to_end(key)
+                    self.semantic_hits += 1
+                    return entry.answer, list(entry.sources)
+            self.misses += 1
+            return None
+
+    def put(self, query: str, embedding: List[float], answer: str, sources: List[str],
+            generation: Optional[int] = None) -> None:
+        """
+        Store an answer for a question and its embedding.
+
+        Args:
+            query (str): The user's question
+            embedding (List[float]): Embedding of the user's question
+            answer (str): The generated answer
+            sources (List[str]): Source documents used for the answer
+            generation (Optional[int], optional): `generation` read before the
+                documents were retrieved; the answer is dropped if the cache
+                was cleared since. Defaults to None (always store).
+
+        Returns:
+            None
+        """
+        key = self.normalize(query)
+        entry = CacheEntry(
+            answer=answer,
+            sources=list(sources),
+            vector=self._unit(embedding),
+            expires_at=time.monotonic() + self.ttl_seconds
+        )
+        with self._lock:
+            if generation is not None and generation != self.generation:
+                # Generated from an index that has been updated meanwhile
+                return
+            self._entries[key] = entry
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+            self._matrix = None
+
+    def clear(self) -> None:
+        """Drop all cached answers, e.g. after the vector store was rebuilt."""
+        with self._lock:
+            self._entries.clear()
+            self._matrix = None
+            self.generation += 1
+
+    def stats(self) -> Dict[str, int]:
+        """Return hit/miss counters and the current number of entries."""
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "exact_hits": self.exact_hits,
+                "semantic_hits": self.semantic_hits,
+                "misses": self.misses
+            }
+
+    def _remove(self, key: str) -> None:
+        del self._entries[key]
+        self._matrix = None
+
+    def _expire(self) -> None:
+        now = time.monotonic()
+        for key in [k for k, entry in self._entries.items() if entry.expires_at < now]:
+            self._remove(key)
+
+    @staticmethod
+    def _unit(embedding: List[float]) -> np.ndarray:
+        vector = np.asarray(embedding, dtype=np.float32)
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm else vector
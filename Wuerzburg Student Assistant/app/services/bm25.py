@@ -0,0 +1,171 @@
+import json
+import math
+import os
+import re
+from collections import Counter
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+TOKEN_PATTERN = re.compile(r"\w+", re.UNICODE)
+
+def tokenize(text: str) -> List[str]:
+    """Split text into lowercase word tokens."""
+    return TOKEN_PATTERN.findall(text.lower())
+
+class BM25Index:
+    """
+    Incrementally updatable inverted index with Okapi BM25 scoring.
+
+    Documents are identified by their vector store docstore id, so BM25 hits
+    can be fused with dense hits and resolved through the same docstore.
+    """
+    def __init__(self, k1: float = 1.5, b: float = 0.75) -> None:
+        """
+        Create an empty index.
+
+        Args:
+            k1 (float, optional): Term frequency saturation. Defaults to 1.5.
+            b (float, optional): Document length normalization. Defaults to 0.75.
+
+        Returns:
+            None
+        """
+        self.k1 = k1
+        self.b = b
+        self.postings: Dict[str, Dict[str, int]] = {}
+        self.doc_lengths: Dict[str, int] = {}
+        # Terms of each document, so removal only touches its own postings
+        self.doc_terms: Dict[str, List[str]] = {}
+        self.total_length = 0
+
+    def __len__(self) -> int:
+        return len(self.doc_lengths)
+
+    def add(self, doc_id: str, text: str) -> None:
+        """
+        Add a document, replacing any previous version with the same id.
+
+        Args:
+            doc_id (str): The docstore id of the document
+            text (str): The document text
+
+        Returns:
+            None
+        """
+        self.remove(doc_id)
+        counts = Counter(tokenize(text))
+        for term, tf in counts.items():
+            self.postings.setdefault(term, {})[doc_id] = tf
+        length = sum(counts.values())
+        self.doc_terms[doc_id] = list(counts)
+        self.doc_lengths[doc_id] = length
+        self.total_length += length
+
+    def remove(self, doc_id: str) -> None:
+        """
+        Remove a document if it is indexed.
+
+        Args:
+            doc_id (str): The docstore id of the document
+
+        Returns:
+            None
+        """
+        length = self.doc_lengths.pop(doc_id, None)
+        if length is None:
+            return
+        self.total_length -= length
+        for term in self.doc_terms.pop(doc_id):
+            del self.postings[term][doc_id]
+            if not self.postings[term]:
+                del self.postings[term]
+
+    def search(self, query: str, k: int, doc_ids: Optional[Set[str]] = None) -> List[Tuple[str, float]]:
+        """
+        Score documents against a query.
+
+        Args:
+            query (str): The query text
+            k (int): Maximum number of results
+            doc_ids (Optional[Set[str]], optional): Only score these documents.
+                Defaults to None (all documents).
+
+        Returns:
+            List[Tuple[str, float]]: (docstore id, score) pairs, best first
+        """
+        if not self.doc_lengths:
+            return []
+        n_docs = len(self.doc_lengths)
+        average_length = self.total_length / n_docs
+        scores: Dict[str, float] = {}
+        for term in set(tokenize(query)):
+            docs = self.postings.get(term)
+            if not docs:
+                continue
+            idf = math.log(1 + (n_docs - len(docs) + 0.5) / (len(docs) + 0.5))
+            for doc_id, tf in docs.items():
+                if doc_ids is not None and doc_id not in doc_ids:
+                    continue
+                norm = self.k1 * (1 - self.b + self.b * self.doc_lengths[doc_id] / average_length)
+                scores[doc_id] = scores.get(doc_id, 0.0) + idf * tf * (self.k1 + 1) / (tf + norm)
+        return sorted(scores.items(), key=lambda item: item[1], reverse=True)[:k]
+
+    def save(self, path: str) -> None:
+        """
+        Persist the index as JSON, replacing the previous file atomically.
+
+        Args:
+            path (str): Destination file path
+
+        Returns:
+            None
+        """
+        data = {
+            "k1": self.k1,
+            "b": self.b,
+            "postings": self.postings,
+            "doc_lengths": self.doc_lengths
+        }
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(data, f, ensure_ascii=False, separators=(",", ":"))
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path: str) -> "BM25Index":
+        """Load an index saved with `save`."""
+        with open(path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+        index = cls(k1=data["k1"], b=data["b"])
+        index.postings = data["postings"]
+        index.doc_lengths = data["doc_lengths"]
+        index.total_length = sum(index.doc_lengths.values())
+        index.doc_terms = {doc_id: [] for doc_id in index.doc_lengths}
+        for term, docs in index.postings.items():
+            for doc_id in docs:
+                index.doc_terms[doc_id].append(term)
+        return index
+
+    @classmethod
+    def build(cls, documents: Iterable[Tuple[str, str]]) -> "BM25Index":
+        """Build an index from (docstore id, text) pairs."""
+        index = cls()
+        for doc_id, text in documents:
+            index.add(doc_id, text)
+        return index
+
+def reciprocal_rank_fusion(rankings: List[List[str]], k: int) -> List[str]:
+    """
+    Fuse several rankings of ids with reciprocal rank fusion.
+
+    Args:
+        rankings (List[List[str]]): Ranked id lists, best first
+        k (int): RRF smoothing constant
+
+    Returns:
+        List[str]: All ids ordered by fused score, best first
+    """
+    scores: Dict[str, float] = {}
+    for ranking in rankings:
+        for rank, doc_id in enumerate(ranking):
+            scores[doc_id] = scores.get(doc_id, 0.0) + 1.0 / (k + rank + 1)
+    return sorted(scores, key=scores.get, reverse=True)
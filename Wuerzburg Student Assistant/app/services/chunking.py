@@ -0,0 +1,81 @@
+from typing import List
+from app.services.context_packer import split_sentences
+from app.services.documents import document_key
+from app.services.prompts import count_tokens
+
+def chunk_text(text: str, max_tokens: int, overlap_tokens: int) -> List[str]:
+    """
+    Split text into sentence-aligned chunks of at most `max_tokens` tokens.
+
+    Each chunk starts with the last sentences of the previous chunk, up to
+    `overlap_tokens` tokens. A single sentence longer than `max_tokens`
+    becomes its own chunk.
+
+    Args:
+        text (str): The text to split
+        max_tokens (int): Maximum tokens per chunk
+        overlap_tokens (int): Tokens repeated from the end of the previous chunk
+
+    Returns:
+        List[str]: The chunks, in order
+    """
+    sentences = [(sentence, count_tokens(sentence)) for sentence in split_sentences(text)]
+    chunks = []
+    current = []
+    current_tokens = 0
+    for sentence, tokens in sentences:
+        if current and current_tokens + tokens > max_tokens:
+            chunks.append("".join(s for s, _ in current).strip())
+            # Carry the tail of this chunk over into the next one
+            overlap = []
+            overlap_used = 0
+            for previous, previous_tokens in reversed(current):
+                if overlap_used + previous_tokens > overlap_tokens:
+                    break
+                overlap.insert(0, (previous, previous_tokens))
+                overlap_used += previous_tokens
+            current = overlap
+            current_tokens = overlap_used
+        current.append((sentence, tokens))
+        current_tokens += tokens
+    if current:
+        chunks.append("".join(s for s, _ in current).strip())
+    return [chunk for chunk in chunks if chunk]
+
+def chunk_document(document: dict, max_tokens: int, overlap_tokens: int) -> List[dict]:
+    """
+    Split a long document into chunks for indexing.
+
+    The document's header lines (e.g. "General Info: <title>" and
+    "Category: <category>") are repeated at the top of every chunk so each
+    chunk embeds with its topic. Documents within `max_tokens` are returned
+    unchanged.
+
+    Args:
+        document (dict): Document as returned by `build_document`
+        max_tokens (int): Maximum tokens per chunk body
+        overlap_tokens (int): Tokens shared by consecutive chunks
+
+    Returns:
+        List[dict]: Documents with the keys of `build_document`, plus for chunks:
+            - chunk (int): Position of the chunk in the parent document
+            - parent (str): Document key of the parent document
+    """
+    if count_tokens(document["text"]) <= max_tokens:
+        return [document]
+
+    header, _, body = document["text"].partition("\nDescription: ")
+    if not body:
+        header, body = "", document["text"]
+    parent = document_key(document["source"], document["id"])
+    chunks = []
+    for position, chunk in enumerate(chunk_text(body, max_tokens, overlap_tokens)):
+        text = f"{header}\nDescription: {chunk}" if header else chunk
+        chunks.append({
+            "text": text,
+            "source": document["source"],
+            "id": document["id"],
+            "chunk": position,
+            "parent": parent
+        })
+    return chunks
@@ -0,0 +1,105 @@
+import re
+from typing import Dict, List, Set, Tuple
+from langchain.schema import Document
+from app.services.prompts import count_tokens
+
+# Sentence ends followed by whitespace, or line breaks. Dots inside URLs and
+# numbers are not boundaries.
+SENTENCE_BOUNDARY = re.compile(r"(?<=[.!?])\s+|\n+")
+
+# Separator tokens between documents in the prompt context
+SEPARATOR_TOKENS = 1
+
+def split_sentences(text: str) -> List[str]:
+    """
+    Split text into sentences, keeping trailing whitespace with each one.
+
+    Joining the result gives back the original text.
+
+    Args:
+        text (str): The text to split
+
+    Returns:
+        List[str]: The sentences of the text
+    """
+    sentences = []
+    start = 0
+    for match in SENTENCE_BOUNDARY.finditer(text):
+        sentences.append(text[start:match.end()])
+        start = match.end()
+    if start < len(text):
+        sentences.append(text[start:])
+    return sentences
+
+def truncate_to_tokens(text: str, max_tokens: int) -> str:
+    """
+    Cut text at the last sentence boundary that keeps it within a token budget.
+
+    Args:
+        text (str): The text to truncate
+        max_tokens (int): Maximum number of tokens
+
+    Returns:
+        str: The longest sentence prefix within the budget (may be empty)
+    """
+    kept = []
+    used = 0
+    for sentence in split_sentences(text):
+        tokens = count_tokens(sentence)
+        if used + tokens > max_tokens:
+            break
+        kept.append(sentence)
+        used += tokens
+    return "".join(kept).rstrip()
+
+def pack_documents(documents: List[Document], budget: int, min_truncated_tokens: int = 50) -> List[Document]:
+    """
+    Select documents for the prompt context within a token budget.
+
+    Documents are taken in ranking order until the budget is used up.
+    Sentences already included from the same record (e.g. the overlap of two
+    chunks) are dropped, documents with nothing new are skipped, and a
+    document that does not fit is cut at a sentence boundary if at least
+    `min_truncated_tokens` remain.
+
+    Args:
+        documents (List[Document]): Retrieved documents, best first
+        budget (int): Maximum number of context tokens
+        min_truncated_tokens (int, optional): Smallest useful truncated
+            document. Defaults to 50.
+
+    Returns:
+        List[Document]: The packed documents, best first
+    """
+    packed = []
+    used = 0
+    seen: Dict[Tuple, Set[str]] = {}
+    for doc in documents:
+        record = (doc.metadata.get("source"), doc.metadata.get("id"))
+        record_seen = seen.setdefault(record, set())
+        sentences = [
+            sentence for sentence in split_sentences(doc.page_content)
+            if sentence.strip() not in record_seen
+        ]
+        text = "".join(sentences).strip()
+        if not text:
+            continue
+
+        remaining = budget - used - (SEPARATOR_TOKENS if packed else 0)
+        tokens = count_tokens(text)
+        metadata = dict(doc.metadata)
+        if tokens > remaining:
+            if remaining < min_truncated_tokens:
+                break
+            text = truncate_to_tokens(text, remaining)
+            if not text:
+                break
+            tokens = count_tokens(text)
+            metadata["truncated"] = True
+
+        record_seen.update(sentence.strip() for sentence in split_sentences(text))
+        packed.append(Document(page_content=text, metadata=metadata))
+        used += tokens + (SEPARATOR_TOKENS if len(packed) > 1 else 0)
+        if used >= budget:
+            break
+    return packed
@@ -0,0 +1,88 @@
+from typing import Any, Callable, Dict, Tuple
+from app.db.models import Apartment, Place, WhatsAppGroup, Insurance, GeneralInfo, Bank, TelecomProvider, UsefulApp
+
+def _format_apartment(apt: Apartment) -> str:
+    doc = f"Apartment: {apt.title}\nLocation: {apt.address}\n"
+    doc += f"Details: {apt.rooms} rooms, {apt.size}m², Rent: €{apt.price}\n"
+    doc += f"Description: {apt.details_link}\n"
+    return doc
+
+def _format_place(place: Place) -> str:
+    doc = f"Place: {place.name}\nType: {place.category}\n"
+    doc += f"Location: {place.address}\n"
+    doc += f"Price Range: {place.price_range}, Rating: {place.rating}\n"
+    doc += f"Description: {place.description}"
+    return doc
+
+def _format_whatsapp_group(group: WhatsAppGroup) -> str:
+    doc = f"WhatsApp Group: {group.name}\nCategory: {group.category}\n"
+    doc += f"Description: {group.description}\nInvite Link: {group.invite_link}"
+    return doc
+
+def _format_insurance(insurance: Insurance) -> str:
+    doc = f"Insurance: {insurance.company_name}\nCategory: {insurance.category}\n"
+    doc += f"Description: {insurance.description}\nWebsite: {insurance.company_url}"
+    return doc
+
+def _format_general_info(info: GeneralInfo) -> str:
+    doc = f"General Info: {info.title}\nCategory: {info.category}\n"
+    doc += f"Description: {info.description}"
+    return doc
+
+def _format_bank(bank: Bank) -> str:
+    doc = f"Bank: {bank.name}\n"
+    doc += f"Description: {bank.description}\nWebsite: {bank.website_url}\n"
+    doc += f"Free Student Plan Available: {bank.free_student_plan_available}"
+    return doc
+
+def _format_telecom_provider(provider: TelecomProvider) -> str:
+    doc = f"Telecom Provider: {provider.name}\n"
+    doc += f"Description: {provider.description}\nWebsite: {provider.website_url}"
+    return doc
+
+def _format_useful_app(app: UsefulApp) -> str:
+    doc = f"Useful App: {app.name}\nCategory: {app.category}\n"
+    doc += f"Description: {app.description}\nApp Store URL: {app.app_store_url}\n"
+    doc += f"Play Store URL: {app.play_store_url}"
+    return doc
+
+# Model -> (source name, formatter), in the order documents are indexed
+DOCUMENT_FORMATTERS: Dict[Any, Tuple[str, Callable[[Any], str]]] = {
+    Apartment: ("apartments", _format_apartment),
+    Place: ("places", _format_place),
+    WhatsAppGroup: ("whatsapp_groups", _format_whatsapp_group),
+    Insurance: ("insurances", _format_insurance),
+    GeneralInfo: ("general_info", _format_general_info),
+    Bank: ("banks", _format_bank),
+    TelecomProvider: ("telecom_providers", _format_telecom_provider),
+    UsefulApp: ("useful_apps", _format_useful_app),
+}
+
+def document_key(source: str, record_id: int) -> str:
+    """
+    Build the stable document id of a database record.
+
+    Args:
+        source (str): The table name source of the record
+        record_id (int): The unique identifier of the record
+
+    Returns:
+        str: Document id in the form "<source>:<id>"
+    """
+    return f"{source}:{record_id}"
+
+def build_document(record: Any) -> dict:
+    """
+    Format a database record into a document for RAG processing.
+
+    Args:
+        record (Any): An instance of one of the models in DOCUMENT_FORMATTERS
+
+    Returns:
+        dict: Document with the following structure:
+            - text (str): The formatted content of the document
+            - source (str): The table name source of the document
+            - id (int): The unique identifier of the record
+    """
+    source, formatter = DOCUMENT_FORMATTERS[type(record)]
+    return {"text": formatter(record), "source": source, "id": record.id}
@@ -0,0 +1,224 @@
+import asyncio
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+from typing import Dict, List
+import numpy as np
+from langchain.embeddings.base import Embeddings
+
+class EmbeddingCache:
+    """
+    Content-addressed embedding store backed by a local SQLite file.
+
+    Vectors are stored as raw float32 blobs keyed by (model name, sha256 of
+    the text), so unchanged text is never sent to the embedding API twice.
+    Document vectors are kept for good, as they are bounded by the corpus.
+    Query vectors live in a separate table that keeps only the max_queries
+    most recently used ones.
+    """
+    def __init__(self, path: str, max_queries: int = 10000) -> None:
+        """
+        Open (or create) the cache database.
+
+        Args:
+            path (str): Path of the SQLite file
+            max_queries (int, optional): Query vectors kept, least recently used
+                are evicted first. Defaults to 10000.
+
+        Returns:
+            None
+        """
+        self.max_queries = max_queries
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS embeddings ("
+            "model TEXT NOT NULL, "
+            "hash TEXT NOT NULL, "
+            "vector BLOB NOT NULL, "
+            "PRIMARY KEY (model, hash)"
+            ") WITHOUT ROWID"
+        )
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS query_embeddings ("
+            "model TEXT NOT NULL, "
+            "hash TEXT NOT NULL, "
+            "vector BLOB NOT NULL, "
+            "used_at REAL NOT NULL, "
+            "PRIMARY KEY (model, hash)"
+            ")"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS query_embeddings_used_at ON query_embeddings (used_at)")
+        self._conn.commit()
+
+    @staticmethod
+    def hash_text(text: str) -> str:
+        """Return the sha256 hex digest of a text."""
+        return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+    def get_many(self, model: str, hashes: List[str], queries: bool = False) -> Dict[str, List[float]]:
+        """
+        Fetch cached vectors for the given text hashes.
+
+        Args:
+            model (str): Embedding model name
+            hashes (List[str]): Text hashes to look up
+            queries (bool, optional): Look up query vectors and mark them as
+                recently used. Defaults to False (document vectors).
+
+        Returns:
+            Dict[str, List[float]]: Vectors found in the cache, keyed by hash
+        """
+        table = "query_embeddings" if queries else "embeddings"
+        found = {}
+        with self._lock:
+            # Stay well below SQLite's bound parameter limit
+            for start in range(0, len(hashes), 500):
+                batch = hashes[start:start + 500]
+                placeholders = ",".join("?" * len(batch))
+                rows = self._conn.execute(
+                    f"SELECT hash, vector FROM {table} WHERE model = ? AND hash IN ({placeholders})",
+                    [model, *batch]
+                )
+                for text_hash, blob in rows:
+                    found[text_hash] = np.frombuffer(blob, dtype=np.float32).tolist()
+            if queries and found:
+                now = time.time()
+                self._conn.executemany(
+                    "UPDATE query_embeddings SET used_at = ? WHERE model = ? AND hash = ?",
+                    [(now, model, text_hash) for text_hash in found]
+                )
+                self._conn.commit()
+        return found
+
+    def put_many(self, model: str, vectors: Dict[str, List[float]], queries: bool = False) -> None:
+        """
+        Store vectors for the given text hashes.
+
+        Args:
+            model (str): Embedding model name
+            vectors (Dict[str, List[float]]): Vectors keyed by text hash
+            queries (bool, optional): Store query vectors, evicting the least
+                recently used beyond max_queries. Defaults to False (document vectors).
+
+        Returns:
+            None
+        """
+        blobs = [
+            (model, text_hash, np.asarray(vector, dtype=np.float32).tobytes())
+            for text_hash, vector in vectors.items()
+        ]
+        with self._lock:
+            if queries:
+                now = time.time()
+                self._conn.executemany(
+                    "INSERT OR REPLACE INTO query_embeddings (model, hash, vector, used_at) VALUES (?, ?, ?, ?)",
+                    [row + (now,) for row in blobs]
+                )
+                (count,) = self._conn.execute("SELECT COUNT(*) FROM query_embeddings").fetchone()
+                if count > self.max_queries:
+                    self._conn.execute(
+                        "DELETE FROM query_embeddings WHERE rowid IN "
+                        "(SELECT rowid FROM query_embeddings ORDER BY used_at LIMIT ?)",
+                        (count - self.max_queries,)
+                    )
+            else:
+                self._conn.executemany(
+                    "INSERT OR REPLACE INTO embeddings (model, hash, vector) VALUES (?, ?, ?)",
+                    blobs
+                )
+            self._conn.commit()
+
+class CachedEmbeddings(Embeddings):
+    """
+    Embeddings wrapper that consults an EmbeddingCache before calling the model.
+
+    `embed_query` uses the cache's bounded query table. With queries=True,
+    `embed_documents` embeds batches of questions and uses it as well, see
+    `query_embeddings`.
+    """
+    def __init__(self, embeddings: Embeddings, cache: EmbeddingCache, model_name: str,
+                 queries: bool = False) -> None:
+        """
+        Wrap an embeddings backend with a persistent cache.
+
+        Args:
+            embeddings (Embeddings): The underlying embeddings backend
+            cache (EmbeddingCache): The cache to read from and write to
+            model_name (str): Model name used as part of the cache key
+            queries (bool, optional): Cache `embed_documents` results as query
+                vectors. Defaults to False.
+
+        Returns:
+            None
+        """
+        self.embeddings = embeddings
+        self.cache = cache
+        self.model_name = model_name
+        self.queries = queries
+
+    def _split(self, texts: List[str], queries: bool):
+        hashes = [self.cache.hash_text(text) for text in texts]
+        found = self.cache.get_many(self.model_name, list(set(hashes)), queries)
+        # Embed each distinct uncached text only once
+        missing = {}
+        for text, text_hash in zip(texts, hashes):
+            if text_hash not in found and text_hash not in missing:
+                missing[text_hash] = text
+        return hashes, found, missing
+
+    def _merge(self, hashes, found, missing, vectors, queries: bool) -> List[List[float]]:
+        new_vectors = dict(zip(missing.keys(), vectors))
+        if new_vectors:
+            self.cache.put_many(self.model_name, new_vectors, queries)
+            found.update(new_vectors)
+        return [found[text_hash] for text_hash in hashes]
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        """Embed documents, calling the backend only for uncached text."""
+        hashes, found, missing = self._split(texts, self.queries)
+        vectors = self.embeddings.embed_documents(list(missing.values())) if missing else []
+        return self._merge(hashes, found, missing, vectors, self.queries)
+
+    def embed_query(self, text: str) -> List[float]:
+        """Embed a query, calling the backend only if it is not cached."""
+        hashes, found, missing = self._split([text], True)
+        vectors = [self.embeddings.embed_query(text)] if missing else []
+        return self._merge(hashes, found, missing, vectors, True)[0]
+
+    async def aembed_documents(self, texts: List[str]) -> List[List[float]]:
+        """Async variant of `embed_documents`; cache I/O runs in the default executor."""
+        loop = asyncio.get_running_loop()
+        hashes, found, missing = await loop.run_in_executor(None, self._split, texts, self.queries)
+        vectors = await self.embeddings.aembed_documents(list(missing.values())) if missing else []
+        return await loop.run_in_executor(None, self._merge, hashes, found, missing, vectors, self.queries)
+
+    async def aembed_query(self, text: str) -> List[float]:
+        """Async variant of `embed_query`; cache I/O runs in the default executor."""
+        loop = asyncio.get_running_loop()
+        hashes, found, missing = await loop.run_in_executor(None, self._split, [text], True)
+        vectors = [await self.embeddings.aembed_query(text)] if missing else []
+        return (await loop.run_in_executor(None, self._merge, hashes, found, missing, vectors, True))[0]
+
+def query_embeddings(embeddings: Embeddings) -> Embeddings:
+    """
+    Get the embeddings to embed questions with.
+
+    Batches of questions embedded with `embed_documents` are then cached in
+    the bounded query table rather than with the documents.
+
+    Args:
+        embeddings (Embeddings): Embeddings, possibly wrapped in CachedEmbeddings
+
+    Returns:
+        Embeddings: A CachedEmbeddings using the query table, or the given embeddings
+    """
+    if not isinstance(embeddings, CachedEmbeddings):
+        return embeddings
+    return CachedEmbeddings(embeddings.embeddings, embeddings.cache, embeddings.model_name, queries=True)
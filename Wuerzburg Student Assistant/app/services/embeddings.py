@@ -0,0 +1,287 @@
+import hashlib
+import logging
+import os
+import re
+import zlib
+from typing import Callable, List, Optional, Tuple
+import numpy as np
+from langchain.embeddings import OpenAIEmbeddings
+from langchain.embeddings.base import Embeddings
+from app.core.config import get_settings
+from app.services.embedding_cache import CachedEmbeddings, EmbeddingCache
+
+settings = get_settings()
+logger = logging.getLogger(__name__)
+
+TOKEN_PATTERN = re.compile(r"\w+", re.UNICODE)
+# Randomized SVD: extra sampled directions, power iterations, and nonzero
+# entries multiplied per step to bound temporary memory
+SVD_OVERSAMPLES = 10
+SVD_POWER_ITERATIONS = 8
+SVD_CHUNK_SIZE = 1 << 16
+
+class LocalEmbeddings(Embeddings):
+    """
+    Offline CPU embeddings based on latent semantic analysis.
+
+    Tokens (unigrams and bigrams) are hashed into a fixed feature space,
+    weighted with sublinear TF-IDF and projected onto the top singular vectors
+    of the corpus TF-IDF matrix, found with a randomized truncated SVD of the
+    sparse matrix. Encoding is a handful of vectorized NumPy operations per
+    batch and needs no network access.
+    """
+    def __init__(self, columns: np.ndarray, idf: np.ndarray, components: np.ndarray, n_features: int) -> None:
+        """
+        Create embeddings from fitted model arrays.
+
+        Args:
+            columns (np.ndarray): Sorted hashed feature ids seen in the corpus
+            idf (np.ndarray): IDF weight for each entry of `columns`
+            components (np.ndarray): Projection matrix of shape (len(columns), dimensions)
+            n_features (int): Size of the hashed feature space
+
+        Returns:
+            None
+        """
+        self.columns = columns.astype(np.int64)
+        self.idf = idf.astype(np.float32)
+        self.components = components.astype(np.float32)
+        self.n_features = n_features
+        digest = hashlib.sha256(self.components.tobytes()).hexdigest()[:12]
+        self.model_name = f"local-lsa-{self.components.shape[1]}-{digest}"
+
+    @property
+    def fitted(self) -> bool:
+        """Whether the model was fitted on a corpus with any tokens."""
+        return len(self.columns) > 0
+
+    @staticmethod
+    def _tokenize(text: str) -> List[str]:
+        words = TOKEN_PATTERN.findall(text.lower())
+        return words + [f"{a} {b}" for a, b in zip(words, words[1:])]
+
+    @staticmethod
+    def _hash_features(texts: List[str], n_features: int) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """Return (row, feature, sublinear tf) triples for a batch of texts."""
+        rows, features = [], []
+        for row, text in enumerate(texts):
+            tokens = LocalEmbeddings._tokenize(text)
+            rows.extend([row] * len(tokens))
+            features.extend(zlib.crc32(token.encode("utf-8")) % n_features for token in tokens)
+        if not rows:
+            empty = np.zeros(0, dtype=np.int64)
+            return empty, empty, np.zeros(0, dtype=np.float32)
+        # Collapse repeated (row, feature) pairs into counts
+        pairs = np.asarray(rows, dtype=np.int64) * n_features + np.asarray(features, dtype=np.int64)
+        unique, counts = np.unique(pairs, return_counts=True)
+        tf = 1.0 + np.log(counts.astype(np.float32))
+        return unique // n_features, unique % n_features, tf
+
+    @classmethod
+    def fit(cls, texts: List[str], dimensions: int, n_features: int) -> "LocalEmbeddings":
+        """
+        Fit the TF-IDF weights and SVD projection on a corpus.
+
+        Args:
+            texts (List[str]): Corpus documents
+            dimensions (int): Target embedding size (capped by the corpus rank)
+            n_features (int): Size of the hashed feature space
+
+        Returns:
+            LocalEmbeddings: The fitted embeddings; unfitted (every text
+                embeds to zeros) if the corpus has no tokens
+        """
+        rows, features, tf = cls._hash_features(texts, n_features)
+        if not len(rows):
+            # Nothing to fit on, e.g. an empty database; every text embeds to zeros
+            logger.warning("Local embeddings fitted on an empty corpus")
+            empty = np.zeros(0, dtype=np.int64)
+            return cls(empty, empty, np.zeros((0, dimensions), dtype=np.float32), n_features)
+
+        columns, column_index = np.unique(features, return_inverse=True)
+        document_frequency = np.bincount(column_index, minlength=len(columns))
+        idf = np.log((1 + len(texts)) / (1 + document_frequency)) + 1.0
+
+        # Sparse TF-IDF matrix restricted to features that occur in the
+        # corpus, as (row, column, value) triples with unit-length rows
+        values = (tf * idf[column_index]).astype(np.float32)
+        norms = np.sqrt(np.bincount(rows, weights=values ** 2, minlength=len(texts)))
+        values /= norms[rows].astype(np.float32)
+
+        rank = min(dimensions, len(texts), len(columns))
+        components = cls._truncated_svd(rows, column_index, values, (len(texts), len(columns)), rank)
+        return cls(columns, idf, components, n_features)
+
+    @staticmethod
+    def _truncated_svd(
+        rows: np.ndarray, columns: np.ndarray, values: np.ndarray, shape: Tuple[int, int], rank: int
+    ) -> np.ndarray:
+        """
+        Find the top right singular vectors of a sparse matrix.
+
+        Randomized range finder with power iterations (Halko et al.); only
+        products with the sparse matrix and dense matrices of `rank` plus a
+        few columns are formed.
+
+        Args:
+            rows (np.ndarray): Sorted row of each nonzero entry
+            columns (np.ndarray): Column of each nonzero entry
+            values (np.ndarray): Value of each nonzero entry
+            shape (Tuple[int, int]): Shape of the matrix
+            rank (int): Number of singular vectors to return
+
+        Returns:
+            np.ndarray: Singular vectors as columns, shape (shape[1], rank)
+        """
+        by_column = np.argsort(columns, kind="stable")
+        column_rows, column_values = rows[by_column], values[by_column]
+        sorted_columns = columns[by_column]
+
+        def dot(matrix: np.ndarray) -> np.ndarray:
+            return LocalEmbeddings._segment_sums(rows, columns, values, matrix, shape[0])
+
+        def transpose_dot(matrix: np.ndarray) -> np.ndarray:
+            return LocalEmbeddings._segment_sums(sorted_columns, column_rows, column_values, matrix, shape[1])
+
+        samples = min(rank + SVD_OVERSAMPLES, *shape)
+        random = np.random.default_rng(0)
+        basis, _ = np.linalg.qr(dot(random.standard_normal((shape[1], samples)).astype(np.float32)))
+        for _ in range(SVD_POWER_ITERATIONS):
+            basis, _ = np.linalg.qr(dot(transpose_dot(basis)))
+
+        # Singular vectors of the small matrix basis.T @ A via its Gram matrix
+        small = transpose_dot(basis)
+        eigenvalues, eigenvectors = np.linalg.eigh(small.T @ small)
+        order = np.argsort(eigenvalues)[::-1][:rank]
+        singular_values = np.sqrt(np.maximum(eigenvalues[order], 0.0))
+        scale = np.divide(1.0, singular_values, out=np.zeros_like(singular_values), where=singular_values > 1e-6)
+        return (small @ eigenvectors[:, order]) * scale
+
+    @staticmethod
+    def _segment_sums(
+        index: np.ndarray, other: np.ndarray, values: np.ndarray, matrix: np.ndarray, size: int
+    ) -> np.ndarray:
+        """Multiply a sparse matrix, given as triples sorted by `index`, with a dense one."""
+        result = np.zeros((size, matrix.shape[1]), dtype=np.float32)
+        for start in range(0, len(index), SVD_CHUNK_SIZE):
+            chunk = slice(start, start + SVD_CHUNK_SIZE)
+            products = values[chunk, None] * matrix[other[chunk]]
+            # Heads are unique within a chunk; a run split across chunks adds up
+            heads = np.flatnonzero(np.diff(index[chunk], prepend=-1))
+            result[index[chunk][heads]] += np.add.reduceat(products, heads, axis=0)
+        return result
+
+    @classmethod
+    def load(cls, path: str) -> "LocalEmbeddings":
+        """Load a fitted model saved with `save`."""
+        with np.load(path) as data:
+            return cls(data["columns"], data["idf"], data["components"], int(data["n_features"]))
+
+    def save(self, path: str) -> None:
+        """Save the fitted model arrays to an .npz file."""
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with open(path, "wb") as f:
+            np.savez(f, columns=self.columns, idf=self.idf, components=self.components, n_features=self.n_features)
+
+    def encode(self, texts: List[str]) -> np.ndarray:
+        """
+        Embed a batch of texts.
+
+        Args:
+            texts (List[str]): Texts to embed
+
+        Returns:
+            np.ndarray: Unit-length float32 vectors of shape (len(texts), dimensions)
+        """
+        if not self.fitted:
+            return np.zeros((len(texts), self.components.shape[1]), dtype=np.float32)
+        rows, features, tf = self._hash_features(texts, self.n_features)
+        # Drop features never seen while fitting, they have no projection
+        positions = np.searchsorted(self.columns, features)
+        positions = np.minimum(positions, len(self.columns) - 1)
+        known = self.columns[positions] == features
+        rows, positions = rows[known], positions[known]
+        weights = tf[known] * self.idf[positions]
+
+        norms = np.sqrt(np.bincount(rows, weights=weights ** 2, minlength=len(texts)))
+        weights = weights / norms[rows]
+        vectors = np.zeros((len(texts), self.components.shape[1]), dtype=np.float32)
+        np.add.at(vectors, rows, weights[:, None] * self.components[positions])
+
+        lengths = np.linalg.norm(vectors, axis=1, keepdims=True)
+        return vectors / np.where(lengths == 0, 1.0, lengths)
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        """Embed search documents."""
+        return self.encode(texts).tolist()
+
+    def embed_query(self, text: str) -> List[float]:
+        """Embed query text."""
+        return self.encode([text])[0].tolist()
+
+    async def aembed_documents(self, texts: List[str]) -> List[List[float]]:
+        """Embed search documents; local encoding is fast enough to run inline."""
+        return self.embed_documents(texts)
+
+    async def aembed_query(self, text: str) -> List[float]:
+        """Embed query text; local encoding is fast enough to run inline."""
+        return self.embed_query(text)
+
+def create_embeddings(corpus_loader: Callable[[], List[str]]) -> Embeddings:
+    """
+    Create the embeddings backend selected by `EMBEDDING_BACKEND`.
+
+    Args:
+        corpus_loader (Callable[[], List[str]]): Returns the corpus used to fit
+            the local backend when no fitted model exists yet
+
+    Returns:
+        Embeddings: "openai" returns OpenAI embeddings (wrapped in the on-disk
+            embedding cache if enabled), "local" returns LocalEmbeddings
+
+    Raises:
+        ValueError: If the configured backend is unknown
+    """
+    if settings.EMBEDDING_BACKEND == "openai":
+        embeddings = OpenAIEmbeddings(
+            openai_api_key=settings.OPENAI_API_KEY,
+            model=settings.OPENAI_EMBEDDING_MODEL
+        )
+        if settings.EMBEDDING_CACHE_ENABLED:
+            # Only text that was never embedded before reaches the API
+            embeddings = CachedEmbeddings(
+                embeddings,
+                EmbeddingCache(settings.EMBEDDING_CACHE_PATH, settings.EMBEDDING_CACHE_MAX_QUERIES),
+                settings.OPENAI_EMBEDDING_MODEL
+            )
+        return embeddings
+
+    if settings.EMBEDDING_BACKEND == "local":
+        if os.path.exists(settings.LOCAL_EMBEDDING_MODEL_PATH):
+            return LocalEmbeddings.load(settings.LOCAL_EMBEDDING_MODEL_PATH)
+        embeddings = LocalEmbeddings.fit(
+            corpus_loader(),
+            dimensions=settings.LOCAL_EMBEDDING_DIMENSIONS,
+            n_features=settings.LOCAL_EMBEDDING_FEATURES
+        )
+        # Fitted again on the next start, once there is data
+        if embeddings.fitted:
+            embeddings.save(settings.LOCAL_EMBEDDING_MODEL_PATH)
+        return embeddings
+
+    raise ValueError(f"Unknown EMBEDDING_BACKEND: {settings.EMBEDDING_BACKEND}")
+
+def get_vector_store_path() -> str:
+    """
+    Get the vector store directory for the configured embedding backend.
+
+    Backends produce vectors of different sizes, so each keeps its own index.
+
+    Returns:
+        str: Path of the vector store directory
+    """
+    if settings.EMBEDDING_BACKEND == "local":
+        return settings.LOCAL_VECTOR_STORE_PATH
+    return settings.VECTOR_STORE_PATH
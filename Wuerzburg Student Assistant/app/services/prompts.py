@@ -0,0 +1,101 @@
+import logging
+from functools import lru_cache
+from typing import Dict, List, Optional, Tuple
+import tiktoken
+from langchain.schema import BaseMessage, Document, HumanMessage, SystemMessage
+from app.core.config import get_settings
+
+logger = logging.getLogger(__name__)
+settings = get_settings()
+
+# Static system prompt: answering rules and response formatting instructions.
+# It never contains the question, so only the raw question is embedded.
+SYSTEM_PROMPT = """You are the Würzburg Student Assistant. Use the provided context to answer the user's question.
+If you don't know the answer, just say that you don't know, don't try to make up an answer.
+
+Please structure your response in a clear and readable way:
+- Use emojis where appropriate to make the text more engaging
+- Use simple bullet points (•) for lists if needed
+- Keep paragraphs short and well-organized
+- Put any links on their own separate lines without any special formatting
+- Don't use any special Markdown formatting or styling
+- Use plain text only"""
+
+SYSTEM_MESSAGE = SystemMessage(content=SYSTEM_PROMPT)
+
+USER_TEMPLATE = """Context:
+{context}
+
+Question: {question}"""
+
+@lru_cache()
+def get_encoding() -> Optional[tiktoken.Encoding]:
+    """
+    Get the tiktoken encoding of the configured chat model.
+
+    Returns:
+        Optional[tiktoken.Encoding]: The encoding, or None if its BPE file is
+            neither cached locally nor downloadable (e.g. offline)
+    """
+    try:
+        try:
+            return tiktoken.encoding_for_model(settings.OPENAI_CHAT_MODEL)
+        except KeyError:
+            return tiktoken.get_encoding("cl100k_base")
+    except Exception as e:
+        logger.warning(f"tiktoken encoding unavailable, estimating token counts: {e}")
+        return None
+
+def count_tokens(text: str) -> int:
+    """Count the tokens of a text for the configured chat model."""
+    encoding = get_encoding()
+    if encoding is None:
+        # Roughly four characters per token for English text
+        return (len(text) + 3) // 4
+    return len(encoding.encode(text))
+
+@lru_cache()
+def system_prompt_tokens() -> int:
+    """Count the system prompt tokens once."""
+    return count_tokens(SYSTEM_PROMPT)
+
+def empty_usage() -> Dict[str, int]:
+    """
+    Get a token usage report with all parts set to zero.
+
+    Returns:
+        Dict[str, int]: Token counts of the system prompt, retrieved context,
+            question, generated completion and embedded query text
+    """
+    return {
+        "system_tokens": 0,
+        "context_tokens": 0,
+        "question_tokens": 0,
+        "completion_tokens": 0,
+        "embedding_tokens": 0
+    }
+
+def build_prompt(question: str, documents: List[Document]) -> Tuple[List[BaseMessage], Dict[str, int]]:
+    """
+    Build the chat messages for a question and its retrieved documents.
+
+    Args:
+        question (str): The raw user question
+        documents (List[Document]): Documents to answer from
+
+    Returns:
+        Tuple[List[BaseMessage], Dict[str, int]]: A tuple containing:
+            - List[BaseMessage]: The shared system message and the user message
+            - Dict[str, int]: Token usage of each prompt part, see `empty_usage`
+    """
+    context = "\n\n".join(doc.page_content for doc in documents)
+    usage = empty_usage()
+    usage["system_tokens"] = system_prompt_tokens()
+    usage["context_tokens"] = count_tokens(context)
+    usage["question_tokens"] = count_tokens(question)
+    usage["embedding_tokens"] = usage["question_tokens"]
+    messages = [
+        SYSTEM_MESSAGE,
+        HumanMessage(content=USER_TEMPLATE.format(context=context, question=question))
+    ]
+    return messages, usage
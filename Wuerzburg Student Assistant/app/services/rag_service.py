@@ -1,37 +1,97 @@
-from typing import List, Tuple
-from langchain.embeddings import OpenAIEmbeddings
+from typing import Any, AsyncIterator, Callable, Dict, FrozenSet, List, NamedTuple, Optional, Tuple, Union
+from functools import partial
 from langchain.vectorstores import FAISS
-from langchain.chains import RetrievalQA
 from langchain.chat_models import ChatOpenAI
+from langchain.schema import Document
 from app.core.config import get_settings
-from sqlalchemy import create_engine
-from sqlalchemy.orm import sessionmaker
-from app.db.models import Apartment, Place, WhatsAppGroup, Insurance, GeneralInfo, Bank, TelecomProvider, UsefulApp
+from app.services.answer_cache import AnswerCache
+from app.services.bm25 import BM25Index, reciprocal_rank_fusion
+from app.services.chunking import chunk_document
+from app.services.context_packer import pack_documents
+from app.services.prompts import build_prompt, count_tokens, empty_usage
+from app.services.router import route_query
+from app.services.embedding_cache import query_embeddings
+from app.services.embeddings import create_embeddings, get_vector_store_path
+from app.services.documents import DOCUMENT_FORMATTERS, build_document, document_key
+from app.services.vector_store import IndexConfig, MmapVectorStore, store_lock
+from app.db.base import SessionLocal
+import asyncio
 import json
+import logging
 import os
+import threading
+import time
+import numpy as np
+
+logger = logging.getLogger(__name__)
 
 settings = get_settings()
 
+EMPTY_DOCUMENT_KEY = document_key("empty", 0)
+BM25_INDEX_FILE = "bm25.json"
+PARENTS_FILE = "parents.json"
+LEGACY_INDEX_FILES = ("index.faiss", "index.pkl")
+
+class IndexState(NamedTuple):
+    """A vector store with the lookups kept alongside it; its parts are changed in place."""
+    vector_store: MmapVectorStore
+    parents: Dict[str, str]  # Document key -> full text of documents split into chunks
+    bm25_index: Optional[BM25Index]
+    doc_ids: Dict[str, List[str]]  # Document key -> docstore ids of its vectors
+
 class RAGService:
     def __init__(self) -> None:
         """
         Initialize the RAG service with necessary components.
 
-        Sets up embeddings, vector store, database connection, and loads general info.
+        Sets up the embeddings backend selected in settings, answer cache,
+        vector store, and loads general info. Database reads use the shared
+        engine from app.db.base.
         No parameters required as it uses environment settings.
 
         Returns:
             None
         """
-        self.embeddings = OpenAIEmbeddings(
-            openai_api_key=settings.OPENAI_API_KEY,
-            model=settings.OPENAI_EMBEDDING_MODEL
+        self.embeddings = create_embeddings(
+            lambda: [doc["text"] for doc in self._get_db_content()]
+        )
+        # Questions are cached apart from documents, in a bounded table
+        self.query_embeddings = query_embeddings(self.embeddings)
+        self.vector_store_path = get_vector_store_path()
+        self.index_config = IndexConfig(
+            type=settings.VECTOR_INDEX_TYPE,
+            nlist=settings.IVF_NLIST,
+            nprobe=settings.IVF_NPROBE,
+            pq_m=settings.PQ_M,
+            pq_nbits=settings.PQ_NBITS,
+            hnsw_m=settings.HNSW_M,
+            ef_search=settings.HNSW_EF_SEARCH,
+            rerank=settings.PQ_RERANK,
+            exact_fraction=settings.FILTER_EXACT_FRACTION
         )
         self.vector_store = None
-        self.qa_chain = None
-        self.db_engine = create_engine(settings.DATABASE_URL)
-        self.SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=self.db_engine)
+        self.bm25_index = None
+        self.llm = None
+        # Guards the live index against concurrent searches and updates
+        self._index_lock = threading.RLock()
+        # Stable document key ("<source>:<id>") -> docstore ids of its vectors
+        self._doc_ids: Dict[str, List[str]] = {}
+        # Document key -> full text of documents that were split into chunks
+        self._parents: Dict[str, str] = {}
+        # Changes not saved yet, replayed onto the saved version by `flush`
+        self._pending: List[Callable[[IndexState], Any]] = []
+        self._flush_timer: Optional[threading.Timer] = None
+        self._flush_timer_lock = threading.Lock()
+        self.answer_cache = None
+        if settings.ANSWER_CACHE_ENABLED:
+            self.answer_cache = AnswerCache(
+                max_entries=settings.ANSWER_CACHE_MAX_ENTRIES,
+                ttl_seconds=settings.ANSWER_CACHE_TTL_SECONDS,
+                max_distance=settings.ANSWER_CACHE_MAX_DISTANCE
+            )
         self._initialize_vector_store()
+        if settings.VECTOR_STORE_RELOAD_SECONDS > 0:
+            threading.Thread(target=self._watch_store, name="vector-store-watcher", daemon=True).start()
         with open(settings.GENERAL_INFO_PATH, 'r', encoding='utf-8') as f:
             self.data = json.load(f)
 
@@ -48,153 +108,740 @@ class RAGService:
                 - source (str): The table name source of the document
                 - id (int): The unique identifier of the record
         """
-        db = self.SessionLocal()
+        db = SessionLocal()
         try:
-            # Fetch data from all tables
-            apartments = db.query(Apartment).all()
-            places = db.query(Place).all()
-            whatsapp_groups = db.query(WhatsAppGroup).all()
-            insurances = db.query(Insurance).all()
-            general_info = db.query(GeneralInfo).all()
-            banks = db.query(Bank).all()
-            telecom_providers = db.query(TelecomProvider).all()
-            useful_apps = db.query(UsefulApp).all()
-
             documents = []
-            
-            # Format apartment data
-            for apt in apartments:
-                doc = f"Apartment: {apt.title}\nLocation: {apt.address}\n"
-                doc += f"Details: {apt.rooms} rooms, {apt.size}m², Rent: €{apt.price}\n"
-                doc += f"Description: {apt.details_link}\n"
-                documents.append({"text": doc, "source": "apartments", "id": apt.id})
-
-            # Format places data
-            for place in places:
-                doc = f"Place: {place.name}\nType: {place.category}\n"
-                doc += f"Location: {place.address}\n"
-                doc += f"Price Range: {place.price_range}, Rating: {place.rating}\n"
-                doc += f"Description: {place.description}"
-                documents.append({"text": doc, "source": "places", "id": place.id})
-
-            # Format WhatsApp groups data
-            for group in whatsapp_groups:
-                doc = f"WhatsApp Group: {group.name}\nCategory: {group.category}\n"
-                doc += f"Description: {group.description}\nInvite Link: {group.invite_link}"
-                documents.append({"text": doc, "source": "whatsapp_groups", "id": group.id})
-
-            # Format insurance data
-            for insurance in insurances:
-                doc = f"Insurance: {insurance.company_name}\nCategory: {insurance.category}\n"
-                doc += f"Description: {insurance.description}\nWebsite: {insurance.company_url}"
-                documents.append({"text": doc, "source": "insurances", "id": insurance.id})
-
-            # Format general info data
-            for info in general_info:
-                doc = f"General Info: {info.title}\nCategory: {info.category}\n"
-                doc += f"Description: {info.description}"
-                documents.append({"text": doc, "source": "general_info", "id": info.id})
-
-            # Format bank data
-            for bank in banks:
-                doc = f"Bank: {bank.name}\n"
-                doc += f"Description: {bank.description}\nWebsite: {bank.website_url}\n"
-                doc += f"Free Student Plan Available: {bank.free_student_plan_available}"
-                documents.append({"text": doc, "source": "banks", "id": bank.id})
-
-            # Format telecom provider data
-            for provider in telecom_providers:
-                doc = f"Telecom Provider: {provider.name}\n"
-                doc += f"Description: {provider.description}\nWebsite: {provider.website_url}"
-                documents.append({"text": doc, "source": "telecom_providers", "id": provider.id})
-
-            # Format useful app data
-            for app in useful_apps:
-                doc = f"Useful App: {app.name}\nCategory: {app.category}\n"
-                doc += f"Description: {app.description}\nApp Store URL: {app.app_store_url}\n"
-                doc += f"Play Store URL: {app.play_store_url}"
-                documents.append({"text": doc, "source": "useful_apps", "id": app.id})
-
+            for model in DOCUMENT_FORMATTERS:
+                documents.extend(build_document(record) for record in db.query(model).all())
             return documents
         finally:
             db.close()
 
     def _initialize_vector_store(self) -> None:
         """
-        Initialize or load the FAISS vector store.
+        Initialize or load the vector store.
 
-        Checks for existing vector store and loads it, or creates a new one
-        from database content if none exists. Also initializes the QA chain.
+        Memory-maps an existing store, migrates a legacy pickled FAISS store
+        once, or creates a new one from database content if none exists.
+        Stored documents that are not chunked as configured, e.g. in migrated
+        stores, are chunked again before use. The approximate index selected by VECTOR_INDEX_TYPE is trained whenever
+        the store is saved, and rebuilt on load if its settings changed.
+        Loads or builds the BM25 index over the same documents for hybrid
+        search; it is saved in each store version together with the parent
+        texts of chunked documents. Versions saved later by other processes
+        are picked up every VECTOR_STORE_RELOAD_SECONDS, see
+        `reload_if_changed`. Also initializes the chat model that answers over
+        documents retrieved in `query`.
 
         Returns:
             None
         """
-        faiss_path = settings.VECTOR_STORE_PATH
+        store_path = self.vector_store_path
         
-        # Check if FAISS index already exists
-        if os.path.exists(faiss_path) and os.path.isdir(faiss_path) and len(os.listdir(faiss_path)) > 0:
-            # Load existing vector store
-            self.vector_store = FAISS.load_local(faiss_path, self.embeddings)
-        else:
-            # Create new vector store from database content
-            documents = self._get_db_content()
-            
-            if not documents:
-                documents = [{"text": "No data available yet", "source": "empty", "id": 0}]
-            
-            texts = [doc["text"] for doc in documents]
-            metadatas = [{"source": doc["source"], "id": doc["id"]} for doc in documents]
-            
-            self.vector_store = FAISS.from_texts(
-                texts,
-                self.embeddings,
-                metadatas=metadatas
-            )
-            # Save the vector store
-            os.makedirs(faiss_path, exist_ok=True)
-            self.vector_store.save_local(faiss_path)
+        # Workers starting together build or migrate the store only once
+        with store_lock(store_path):
+            if MmapVectorStore.exists(store_path):
+                # Load existing vector store; vectors stay on disk until searched
+                state = self._read_store()
+                bm25_missing = settings.HYBRID_SEARCH_ENABLED and not os.path.exists(
+                    os.path.join(state.vector_store.version_path, BM25_INDEX_FILE)
+                )
+                rechunked = self._rechunk_documents(state)
+                self._use_state(state)
+                if state.vector_store.needs_rebuild() or bm25_missing or rechunked:
+                    self._persist_vector_store(state)
+            elif all(os.path.exists(os.path.join(store_path, name)) for name in LEGACY_INDEX_FILES):
+                self._migrate_legacy_store(store_path)
+                state = self._read_store()
+                self._rechunk_documents(state)
+                self._use_state(state)
+                self._persist_vector_store(state)
+            else:
+                # Create new vector store from database content
+                documents = self._get_db_content()
+
+                if not documents:
+                    documents = [{"text": "No data available yet", "source": "empty", "id": 0}]
+
+                texts, metadatas, ids, parents = self._prepare_documents(documents)
+
+                vectors = self.embeddings.embed_documents(texts)
+                store = MmapVectorStore(len(vectors[0]), self.index_config)
+                store.add(ids, texts, metadatas, vectors)
+                bm25_index = BM25Index.build(zip(ids, texts)) if settings.HYBRID_SEARCH_ENABLED else None
+                state = IndexState(store, parents, bm25_index, self._map_doc_ids(store))
+                self._use_state(state)
+                # Save the vector store
+                self._persist_vector_store(state)
+
+        # Cached answers were generated from the previous index
+        if self.answer_cache:
+            self.answer_cache.clear()
         
-        # Initialize QA chain
-        self.qa_chain = RetrievalQA.from_chain_type(
-            llm=ChatOpenAI(
-                temperature=settings.MODEL_TEMPERATURE,
-                model_name=settings.OPENAI_CHAT_MODEL,
-                openai_api_key=settings.OPENAI_API_KEY
-            ),
-            chain_type="stuff",
-            retriever=self.vector_store.as_retriever(
-                search_kwargs={"k": 3}
+        # Initialize the chat model; retrieval happens once in `query` so the
+        # same documents feed both the prompt and the returned sources
+        self.llm = ChatOpenAI(
+            temperature=settings.MODEL_TEMPERATURE,
+            model_name=settings.OPENAI_CHAT_MODEL,
+            openai_api_key=settings.OPENAI_API_KEY
+        )
+
+    def _migrate_legacy_store(self, path: str) -> MmapVectorStore:
+        """
+        Convert a pickled LangChain FAISS store into the memory-mapped format.
+
+        Entries are re-keyed to their document keys, so the store can be
+        updated incrementally; long documents are chunked afterwards by
+        `_rechunk_documents`. The legacy files are removed, so later startups
+        never unpickle.
+
+        Args:
+            path (str): Directory holding index.faiss and index.pkl
+
+        Returns:
+            MmapVectorStore: The converted store, saved under the same directory
+        """
+        legacy = FAISS.load_local(path, self.embeddings)
+        ids, texts, metadatas = [], [], []
+        seen = set()
+        for position in range(legacy.index.ntotal):
+            docstore_id = legacy.index_to_docstore_id[position]
+            doc = legacy.docstore.search(docstore_id)
+            key = document_key(doc.metadata["source"], doc.metadata["id"])
+            if "chunk" in doc.metadata:
+                key = f"{key}#{doc.metadata['chunk']}"
+            ids.append(key if key not in seen else docstore_id)
+            seen.add(key)
+            texts.append(doc.page_content)
+            metadatas.append(doc.metadata)
+
+        store = MmapVectorStore(legacy.index.d, self.index_config)
+        store.add(ids, texts, metadatas, legacy.index.reconstruct_n(0, legacy.index.ntotal))
+        store.save(path)
+        for name in LEGACY_INDEX_FILES + (BM25_INDEX_FILE,):
+            if os.path.exists(os.path.join(path, name)):
+                os.remove(os.path.join(path, name))
+        return store
+
+    def _rechunk_documents(self, state: IndexState) -> bool:
+        """
+        Chunk stored documents again where their entries differ from the chunking settings.
+
+        Stores migrated from the legacy format or saved before chunking, or
+        with other CHUNK_* settings, hold whole documents or outdated chunks.
+        Only documents whose chunks changed are embedded again.
+
+        Args:
+            state (IndexState): The loaded store, changed in place
+
+        Returns:
+            bool: Whether any document was chunked again
+        """
+        documents = []
+        for key, docstore_ids in state.doc_ids.items():
+            if key.split(":", 1)[0] not in settings.CHUNKED_SOURCES:
+                continue
+            entries = sorted(
+                (state.vector_store.get(docstore_id) for docstore_id in docstore_ids),
+                key=lambda doc: doc.metadata.get("chunk", 0)
             )
+            if key in state.parents:
+                text = state.parents[key]
+            elif len(entries) == 1 and "chunk" not in entries[0].metadata:
+                text = entries[0].page_content
+            else:
+                # Chunks without the full text cannot be split differently
+                continue
+            metadata = entries[0].metadata
+            document = {"text": text, "source": metadata["source"], "id": metadata["id"]}
+            chunks = chunk_document(document, settings.CHUNK_MAX_TOKENS, settings.CHUNK_OVERLAP_TOKENS)
+            if [chunk["text"] for chunk in chunks] != [entry.page_content for entry in entries]:
+                documents.append(document)
+        if not documents:
+            return False
+
+        logger.info(f"Chunking {len(documents)} stored documents again")
+        texts, metadatas, ids, parents = self._prepare_documents(documents)
+        vectors = self.embeddings.embed_documents(texts)
+        keys = [document_key(document["source"], document["id"]) for document in documents]
+        self._add_entries(keys, texts, metadatas, ids, vectors, parents, state)
+        return True
+
+    def _prepare_documents(self, documents: List[dict]) -> Tuple[List[str], List[dict], List[str], Dict[str, str]]:
+        """
+        Turn documents into index entries, chunking long ones.
+
+        Documents of CHUNKED_SOURCES longer than CHUNK_MAX_TOKENS are split
+        into overlapping chunks with ids "<key>#<n>".
+
+        Args:
+            documents (List[dict]): Documents as returned by `build_document`
+
+        Returns:
+            Tuple[List[str], List[dict], List[str], Dict[str, str]]: Texts,
+                metadatas and docstore ids of the entries, and the full text of
+                each chunked document by document key
+        """
+        texts, metadatas, ids = [], [], []
+        parents = {}
+        for document in documents:
+            key = document_key(document["source"], document["id"])
+            entries = [document]
+            if document["source"] in settings.CHUNKED_SOURCES:
+                entries = chunk_document(document, settings.CHUNK_MAX_TOKENS, settings.CHUNK_OVERLAP_TOKENS)
+            if len(entries) > 1:
+                parents[key] = document["text"]
+            for entry in entries:
+                metadata = {"source": entry["source"], "id": entry["id"]}
+                docstore_id = key
+                if "chunk" in entry:
+                    metadata.update(chunk=entry["chunk"], parent=entry["parent"])
+                    docstore_id = f"{key}#{entry['chunk']}"
+                texts.append(entry["text"])
+                metadatas.append(metadata)
+                ids.append(docstore_id)
+        return texts, metadatas, ids, parents
+
+    def upsert_documents(self, documents: List[dict]) -> None:
+        """
+        Add or replace documents in the live vector store.
+
+        Only the given documents are embedded. Previous vectors of the same
+        records are removed. Searches in this process see the change at once;
+        it is saved for other processes by `flush`, after waiting
+        VECTOR_STORE_FLUSH_SECONDS for more changes to save together.
+
+        Args:
+            documents (List[dict]): Documents as returned by `build_document`
+
+        Returns:
+            None
+        """
+        if not documents:
+            return
+        keys = [document_key(doc["source"], doc["id"]) for doc in documents]
+        texts, metadatas, ids, parents = self._prepare_documents(documents)
+        vectors = self.embeddings.embed_documents(texts)
+
+        change = partial(self._add_entries, keys, texts, metadatas, ids, vectors, parents)
+        with self._index_lock:
+            change(self._live_state())
+            self._pending.append(change)
+        self._schedule_flush()
+        if self.answer_cache:
+            self.answer_cache.clear()
+
+    def _add_entries(
+        self, keys: List[str], texts: List[str], metadatas: List[dict], ids: List[str],
+        vectors: List[List[float]], parents: Dict[str, str], state: IndexState
+    ) -> None:
+        self._delete_keys(keys + [EMPTY_DOCUMENT_KEY], state)
+        state.parents.update(parents)
+        state.vector_store.add(ids, texts, metadatas, vectors)
+        for docstore_id, text, metadata in zip(ids, texts, metadatas):
+            key = document_key(metadata["source"], metadata["id"])
+            state.doc_ids.setdefault(key, []).append(docstore_id)
+            if state.bm25_index is not None:
+                state.bm25_index.add(docstore_id, text)
+
+    def _delete_keys(self, keys: List[str], state: IndexState) -> bool:
+        docstore_ids = []
+        for key in keys:
+            state.parents.pop(key, None)
+            docstore_ids.extend(state.doc_ids.pop(key, []))
+        if docstore_ids:
+            state.vector_store.delete(docstore_ids)
+            if state.bm25_index is not None:
+                for docstore_id in docstore_ids:
+                    state.bm25_index.remove(docstore_id)
+        return bool(docstore_ids)
+
+    def _schedule_flush(self) -> None:
+        if settings.VECTOR_STORE_FLUSH_SECONDS <= 0:
+            self.flush()
+            return
+        with self._flush_timer_lock:
+            if self._flush_timer is None:
+                self._flush_timer = threading.Timer(settings.VECTOR_STORE_FLUSH_SECONDS, self._flush_later)
+                self._flush_timer.daemon = True
+                self._flush_timer.start()
+
+    def _flush_later(self) -> None:
+        with self._flush_timer_lock:
+            self._flush_timer = None
+        try:
+            self.flush()
+        except Exception as e:
+            logger.error(f"Error saving vector store: {str(e)}")
+
+    def flush(self) -> None:
+        """
+        Save the changes made since the last save as a new store version.
+
+        The new version is built from the current saved version, which may
+        come from another process, with the pending changes applied on top.
+        Searches keep using the live index while it is written; the index
+        lock is only held to swap in the saved version. Holds the store lock,
+        so saves of different processes never overwrite each other.
+
+        Returns:
+            None
+        """
+        with store_lock(self.vector_store_path):
+            with self._index_lock:
+                pending = list(self._pending)
+            if not pending:
+                return
+            merged = not self._is_current()
+            state = self._read_store()
+            for change in pending:
+                change(state)
+            self._persist_vector_store(state)
+            with self._index_lock:
+                # Changes made while saving are live already; keep them for the next flush
+                newer = self._pending[len(pending):]
+                self._use_state(state)
+                for change in newer:
+                    change(state)
+                self._pending = newer
+        if merged and self.answer_cache:
+            self.answer_cache.clear()
+
+    def reload_if_changed(self) -> bool:
+        """
+        Load the store version another process saved, if there is a newer one.
+
+        Skipped while this process has unsaved changes; `flush` merges them
+        with the newer version instead. Clears the answer cache on reload.
+
+        Returns:
+            bool: Whether a newer version was loaded
+        """
+        loaded = self.vector_store.version_path
+        if self._pending or self._is_current():
+            return False
+        state = self._read_store()
+        with self._index_lock:
+            # A flush of this process may have switched versions meanwhile
+            if self._pending or self.vector_store.version_path != loaded:
+                return False
+            self._use_state(state)
+        if self.answer_cache:
+            self.answer_cache.clear()
+        logger.info(f"Reloaded vector store version {os.path.basename(state.vector_store.version_path)}")
+        return True
+
+    def _watch_store(self) -> None:
+        while True:
+            time.sleep(settings.VECTOR_STORE_RELOAD_SECONDS)
+            try:
+                self.reload_if_changed()
+            except Exception as e:
+                logger.error(f"Error reloading vector store: {str(e)}")
+
+    def _is_current(self) -> bool:
+        """Check whether the loaded store version is the one ``CURRENT`` names."""
+        version = MmapVectorStore.current_version(self.vector_store_path)
+        return version is None or version == os.path.basename(self.vector_store.version_path or "")
+
+    def _persist_vector_store(self, state: IndexState) -> None:
+        # Writes a new version, including the BM25 index and parent texts, and
+        # switches to it atomically, so other processes never read a partially
+        # written index or keyword files that belong to another version
+        state.vector_store.save(
+            self.vector_store_path, partial(self._write_version_files, state), settings.VECTOR_STORE_KEEP_SECONDS
         )
 
+    @staticmethod
+    def _write_version_files(state: IndexState, version_path: str) -> None:
+        if state.bm25_index is not None:
+            state.bm25_index.save(os.path.join(version_path, BM25_INDEX_FILE))
+        with open(os.path.join(version_path, PARENTS_FILE), "w", encoding="utf-8") as f:
+            json.dump(state.parents, f, ensure_ascii=False)
+
+    def _read_store(self) -> IndexState:
+        """
+        Load the current store version with its parent texts and BM25 index.
 
-    def query(self, query: str) -> Tuple[str, List[str]]:
+        Stores saved before these files moved into the version directory
+        still have them next to it. A missing BM25 index is built in memory;
+        saved versions are never modified.
+
+        Returns:
+            IndexState: The store with the full text of chunked documents, the
+                BM25 index if hybrid search is enabled, and the docstore ids
+                of each document
+        """
+        store = MmapVectorStore.load(self.vector_store_path, self.index_config)
+        parents = {}
+        parents_path = self._version_file(store, PARENTS_FILE)
+        if parents_path:
+            with open(parents_path, "r", encoding="utf-8") as f:
+                parents = json.load(f)
+
+        bm25_index = None
+        if settings.HYBRID_SEARCH_ENABLED:
+            bm25_path = self._version_file(store, BM25_INDEX_FILE)
+            if bm25_path:
+                bm25_index = BM25Index.load(bm25_path)
+            else:
+                bm25_index = BM25Index.build(
+                    (docstore_id, store.get(docstore_id).page_content) for docstore_id in store.ids
+                )
+        return IndexState(store, parents, bm25_index, self._map_doc_ids(store))
+
+    def _version_file(self, store: MmapVectorStore, name: str) -> Optional[str]:
+        for directory in (store.version_path, self.vector_store_path):
+            path = os.path.join(directory, name)
+            if os.path.exists(path):
+                return path
+        return None
+
+    @staticmethod
+    def _map_doc_ids(store: MmapVectorStore) -> Dict[str, List[str]]:
+        # Docstore ids are document keys, with a "#<n>" suffix for chunks
+        doc_ids: Dict[str, List[str]] = {}
+        for docstore_id in store.ids:
+            doc_ids.setdefault(docstore_id.split("#", 1)[0], []).append(docstore_id)
+        return doc_ids
+
+    def _live_state(self) -> IndexState:
+        return IndexState(self.vector_store, self._parents, self.bm25_index, self._doc_ids)
+
+    def _use_state(self, state: IndexState) -> None:
+        self.vector_store = state.vector_store
+        self._parents = state.parents
+        self.bm25_index = state.bm25_index
+        self._doc_ids = state.doc_ids
+
+    def query(self, query: str) -> Tuple[str, List[str], Dict[str, int]]:
         """
         Process a query through the RAG system.
 
+        Only the raw question is embedded and searched; formatting instructions
+        live in the shared system prompt. Repeated and near-identical questions
+        are served from the answer cache without calling the model.
+
         Args:
             query (str): The user's question or query text
-            category (str, optional): Category context for the query. Defaults to None.
 
         Returns:
-            Tuple[str, List[str]]: A tuple containing:
+            Tuple[str, List[str], Dict[str, int]]: A tuple containing:
                 - str: The generated answer to the query
                 - List[str]: List of source documents used for the answer
+                - Dict[str, int]: Token usage per prompt part, see `empty_usage`
         """
-        query = f"""{query}
-        Please structure your response in a clear and readable way:
-        - Use emojis where appropriate to make the text more engaging
-        - Use simple bullet points (•) for lists if needed
-        - Keep paragraphs short and well-organized
-        - Put any links on their own separate lines without any special formatting
-        - Don't use any special Markdown formatting or styling
-        - Use plain text only
+        generation = self._cache_generation()
+        cached = self._cached_answer(query)
+        if cached:
+            return cached
+
+        # Embed and search once, then answer over the retrieved documents
+        embedding = self.query_embeddings.embed_query(query)
+        cached = self._cached_answer(query, embedding)
+        if cached:
+            return cached
+
+        docs = self._search(query, embedding)
+        messages, usage = build_prompt(query, docs)
+        answer = self.llm.invoke(messages).content
+        sources = [doc.page_content for doc in docs]
+
+        usage["completion_tokens"] = count_tokens(answer)
+        if self.answer_cache:
+            self.answer_cache.put(query, embedding, answer, sources, generation)
+        return answer, sources, usage
+
+    async def aquery(self, query: str) -> Tuple[str, List[str], Dict[str, int]]:
         """
-        
-        result = self.qa_chain({"query": query})
-                
-        # Get source documents
-        docs = self.vector_store.similarity_search(query, k=3)
+        Process a query through the RAG system without blocking the event loop.
+
+        Embedding and chat completion use the async OpenAI clients, while the
+        CPU-bound vector search runs in the default executor. Uses the same
+        answer cache as `query`.
+
+        Args:
+            query (str): The user's question or query text
+
+        Returns:
+            Tuple[str, List[str], Dict[str, int]]: A tuple containing:
+                - str: The generated answer to the query
+                - List[str]: List of source documents used for the answer
+                - Dict[str, int]: Token usage per prompt part, see `empty_usage`
+        """
+        generation = self._cache_generation()
+        cached = self._cached_answer(query)
+        if cached:
+            return cached
+
+        embedding = await self.query_embeddings.aembed_query(query)
+        cached = self._cached_answer(query, embedding)
+        if cached:
+            return cached
+
+        docs = await self._asearch(query, embedding)
+        return await self._agenerate(query, embedding, docs, generation)
+
+    async def aquery_batch(self, queries: List[str]) -> List[Union[Tuple[str, List[str], Dict[str, int]], Exception]]:
+        """
+        Process many queries through the RAG system at once.
+
+        Questions missing from the answer cache are embedded in one batched
+        call and searched with one matrix search per routed source set. The
+        chat completions then run with at most BATCH_MAX_CONCURRENCY in flight.
+        Repeated questions are answered once.
+
+        Args:
+            queries (List[str]): The questions, in order
+
+        Returns:
+            List[Union[Tuple[str, List[str], Dict[str, int]], Exception]]: One
+                result per query, in order: the (answer, sources, usage) tuple
+                returned by `aquery`, or the exception that query failed with
+        """
+        generation = self._cache_generation()
+        unique = list(dict.fromkeys(queries))
+        results: Dict[str, Any] = {query: self._cached_answer(query) for query in unique}
+        pending = [query for query in unique if results[query] is None]
+
+        if pending:
+            try:
+                embeddings = await self.query_embeddings.aembed_documents(pending)
+            except Exception as e:
+                embeddings = None
+                results.update((query, e) for query in pending)
+
+            if embeddings is not None:
+                to_search = []
+                for query, embedding in zip(pending, embeddings):
+                    results[query] = self._cached_answer(query, embedding)
+                    if results[query] is None:
+                        to_search.append((query, embedding))
+                await self._aanswer_batch(to_search, results, generation)
+
+        return [results[query] for query in queries]
+
+    async def _aanswer_batch(
+        self, items: List[Tuple[str, List[float]]], results: Dict[str, Any], generation: int
+    ) -> None:
+        """Search for and answer embedded queries, storing each answer or exception in results."""
+        if not items:
+            return
+        loop = asyncio.get_running_loop()
+        try:
+            docs_per_query = await loop.run_in_executor(
+                None,
+                partial(self._search_many, [query for query, _ in items], [embedding for _, embedding in items])
+            )
+        except Exception as e:
+            results.update((query, e) for query, _ in items)
+            return
+
+        semaphore = asyncio.Semaphore(settings.BATCH_MAX_CONCURRENCY)
+
+        async def answer(query: str, embedding: List[float], docs: List[Any]) -> None:
+            async with semaphore:
+                try:
+                    results[query] = await self._agenerate(query, embedding, docs, generation)
+                except Exception as e:
+                    results[query] = e
+
+        await asyncio.gather(*(
+            answer(query, embedding, docs)
+            for (query, embedding), docs in zip(items, docs_per_query)
+        ))
+
+    async def _agenerate(
+        self, query: str, embedding: List[float], docs: List[Any], generation: int
+    ) -> Tuple[str, List[str], Dict[str, int]]:
+        """Answer a query over retrieved documents and add the answer to the cache of that generation."""
+        messages, usage = build_prompt(query, docs)
+        answer = (await self.llm.ainvoke(messages)).content
+        sources = [doc.page_content for doc in docs]
+
+        usage["completion_tokens"] = count_tokens(answer)
+        if self.answer_cache:
+            self.answer_cache.put(query, embedding, answer, sources, generation)
+        return answer, sources, usage
+
+    async def astream(self, query: str) -> Tuple[List[str], Dict[str, int], AsyncIterator[str]]:
+        """
+        Process a query through the RAG system and stream the answer.
+
+        Retrieval completes before this method returns; the answer is then
+        generated token by token. A cached answer is yielded as a single chunk.
+        The complete answer is added to the answer cache once streaming ends.
+
+        Args:
+            query (str): The user's question or query text
+
+        Returns:
+            Tuple[List[str], Dict[str, int], AsyncIterator[str]]: A tuple containing:
+                - List[str]: List of source documents used for the answer
+                - Dict[str, int]: Token usage per prompt part; completion_tokens
+                  is filled in once the stream is exhausted
+                - AsyncIterator[str]: Chunks of the generated answer
+        """
+        generation = self._cache_generation()
+        cached = self._cached_answer(query)
+        if cached:
+            return cached[1], cached[2], self._single_chunk(cached[0])
+
+        embedding = await self.query_embeddings.aembed_query(query)
+        cached = self._cached_answer(query, embedding)
+        if cached:
+            return cached[1], cached[2], self._single_chunk(cached[0])
+
+        docs = await self._asearch(query, embedding)
+        messages, usage = build_prompt(query, docs)
         sources = [doc.page_content for doc in docs]
 
-        return result["result"], sources
\ No newline at end of file
+        async def tokens() -> AsyncIterator[str]:
+            chunks = []
+            async for chunk in self.llm.astream(messages):
+                if chunk.content:
+                    chunks.append(chunk.content)
+                    yield chunk.content
+            answer = "".join(chunks)
+            usage["completion_tokens"] = count_tokens(answer)
+            if self.answer_cache:
+                self.answer_cache.put(query, embedding, answer, sources, generation)
+
+        return sources, usage, tokens()
+
+    def _cache_generation(self) -> int:
+        """Answer cache generation to store answers under, read before retrieval."""
+        return self.answer_cache.generation if self.answer_cache else 0
+
+    def _cached_answer(
+        self, query: str, embedding: Optional[List[float]] = None
+    ) -> Optional[Tuple[str, List[str], Dict[str, int]]]:
+        """Look up the answer cache by text, or by embedding if one is given."""
+        if not self.answer_cache:
+            return None
+        if embedding is None:
+            cached = self.answer_cache.get(query)
+        else:
+            cached = self.answer_cache.get_similar(embedding)
+        if cached is None:
+            return None
+        usage = empty_usage()
+        if embedding is not None:
+            usage["embedding_tokens"] = count_tokens(query)
+        return cached[0], cached[1], usage
+
+    @staticmethod
+    async def _single_chunk(text: str) -> AsyncIterator[str]:
+        yield text
+
+    async def _asearch(self, query: str, embedding: List[float]) -> List[Any]:
+        """Run `_search` in the default executor."""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(None, partial(self._search, query, embedding))
+
+    def _search(self, query: str, embedding: List[float]) -> List[Any]:
+        """
+        Retrieve the documents to answer a query from.
+
+        The question is routed to the relevant document sources first and only
+        their documents are searched. Dense hits are fused with BM25
+        keyword hits on the raw question using reciprocal rank fusion, so
+        exact names are found at a small k. The top RETRIEVAL_MAX_DOCUMENTS
+        are then packed into CONTEXT_TOKEN_BUDGET tokens.
+
+        Args:
+            query (str): The raw user question, used for routing and keyword search
+            embedding (List[float]): The query embedding, used for dense search
+
+        Returns:
+            List[Document]: The packed documents, best first
+        """
+        return self._search_many([query], [embedding])[0]
+
+    def _search_many(self, queries: List[str], embeddings: List[List[float]]) -> List[List[Any]]:
+        """
+        Retrieve documents for several queries as `_search` does.
+
+        Queries routed to the same sources share one matrix search.
+
+        Args:
+            queries (List[str]): The raw user questions
+            embeddings (List[List[float]]): The query embeddings, in the same order
+
+        Returns:
+            List[List[Document]]: The packed documents of each query, best first
+        """
+        max_documents = settings.RETRIEVAL_MAX_DOCUMENTS
+        n_candidates = max(settings.HYBRID_CANDIDATES, max_documents) if self.bm25_index is not None else max_documents
+        groups: Dict[Optional[FrozenSet[str]], List[int]] = {}
+        for position, query in enumerate(queries):
+            sources = route_query(query) if settings.INTENT_ROUTING_ENABLED else None
+            groups.setdefault(frozenset(sources) if sources is not None else None, []).append(position)
+
+        docs_per_query: List[List[Any]] = [[] for _ in queries]
+        with self._index_lock:
+            for sources, positions in groups.items():
+                vectors = np.array([embeddings[position] for position in positions], dtype=np.float32)
+                hits = self.vector_store.search(vectors, n_candidates, sources)
+                allowed_ids = None
+                if self.bm25_index is not None and sources is not None:
+                    allowed_ids = self.vector_store.ids_for_sources(sources)
+                for position, query_hits in zip(positions, hits):
+                    ranked_ids = [docstore_id for docstore_id, _ in query_hits]
+                    if self.bm25_index is not None:
+                        keyword_ids = [
+                            docstore_id
+                            for docstore_id, _ in self.bm25_index.search(queries[position], n_candidates, allowed_ids)
+                        ]
+                        ranked_ids = reciprocal_rank_fusion([ranked_ids, keyword_ids], k=settings.RRF_K)
+                    docs_per_query[position] = [
+                        self.vector_store.get(docstore_id) for docstore_id in ranked_ids[:max_documents]
+                    ]
+        return [
+            pack_documents(self._expand_parents(docs), settings.CONTEXT_TOKEN_BUDGET)
+            for docs in docs_per_query
+        ]
+
+    def _expand_parents(self, docs: List[Any]) -> List[Any]:
+        """
+        Replace chunks with their parent document when several of them matched.
+
+        A single matching chunk is kept as is. When at least
+        PARENT_EXPAND_MIN_CHUNKS chunks of the same parent were retrieved, the
+        question spans the document, so the full parent text takes the place
+        of its best-ranked chunk and the other chunks are dropped.
+
+        Args:
+            docs (List[Document]): Retrieved documents, best first
+
+        Returns:
+            List[Document]: Documents with chunks expanded where needed
+        """
+        chunk_counts: Dict[str, int] = {}
+        for doc in docs:
+            parent = doc.metadata.get("parent")
+            if parent:
+                chunk_counts[parent] = chunk_counts.get(parent, 0) + 1
+
+        expanded = []
+        emitted = set()
+        for doc in docs:
+            parent = doc.metadata.get("parent")
+            if parent and chunk_counts[parent] >= settings.PARENT_EXPAND_MIN_CHUNKS and parent in self._parents:
+                if parent in emitted:
+                    continue
+                emitted.add(parent)
+                metadata = {"source": doc.metadata["source"], "id": doc.metadata["id"]}
+                doc = Document(page_content=self._parents[parent], metadata=metadata)
+            expanded.append(doc)
+        return expanded
+
+    def cache_stats(self) -> Dict[str, int]:
+        """
+        Get answer cache counters.
+
+        Returns:
+            Dict[str, int]: Entry count and exact/semantic hit and miss counters,
+                empty if the cache is disabled
+        """
+        return self.answer_cache.stats() if self.answer_cache else {}
@@ -0,0 +1,36 @@
+import logging
+import threading
+from typing import Optional
+from app.services.rag_service import RAGService
+
+logger = logging.getLogger(__name__)
+
+_lock = threading.Lock()
+_rag_service: Optional[RAGService] = None
+
+def get_rag_service() -> RAGService:
+    """
+    Get the process-wide RAG service, building it on first use.
+
+    The vector store, docstore and database engine are loaded only once per
+    process no matter how many modules ask for the service.
+
+    Returns:
+        RAGService: The shared RAG service instance
+    """
+    global _rag_service
+    if _rag_service is None:
+        with _lock:
+            if _rag_service is None:
+                logger.info("Initializing shared RAG service")
+                _rag_service = RAGService()
+    return _rag_service
+
+def warm_up_services() -> None:
+    """
+    Build all shared services eagerly so the first request does not pay for it.
+
+    Returns:
+        None
+    """
+    get_rag_service()
@@ -0,0 +1,55 @@
+from typing import Dict, List, Optional, Set
+from app.services.bm25 import tokenize
+
+# Keywords per document source, following the bot's command taxonomy
+# (/apartment, /places, /groups, /insurance, /lifetips_bank, ...)
+SOURCE_KEYWORDS: Dict[str, List[str]] = {
+    "apartments": [
+        "apartment", "apartments", "flat", "flats", "room", "rooms", "wg", "wohnung",
+        "zimmer", "rent", "housing", "accommodation", "miete", "untermiete", "sublet",
+    ],
+    "places": [
+        "place", "places", "restaurant", "restaurants", "cafe", "cafes", "café", "coffee",
+        "eat", "food", "dinner", "lunch", "breakfast", "attraction", "attractions",
+        "sightseeing", "museum", "library", "libraries", "supermarket", "supermarkets",
+        "grocery", "groceries", "drugstore", "drugstores", "dm", "rossmann", "shop", "shopping",
+    ],
+    "whatsapp_groups": ["whatsapp", "group", "groups", "community", "communities", "chat"],
+    "insurances": [
+        "insurance", "insurances", "insured", "versicherung", "krankenkasse", "aok", "tk",
+        "barmer", "dak", "liability", "haftpflicht",
+    ],
+    "banks": ["bank", "banks", "banking", "account", "konto", "girokonto", "sparkasse", "iban", "card"],
+    "telecom_providers": [
+        "sim", "phone", "mobile", "telecom", "contract", "tariff", "vodafone", "telekom", "o2",
+        "internet", "wifi", "data",
+    ],
+    "useful_apps": ["app", "apps", "application", "applications", "download"],
+}
+
+# General info covers immigration, healthcare, sports, education and life tips,
+# which overlap with most questions, so it is always searched
+ALWAYS_SEARCHED_SOURCES = {"general_info"}
+
+_KEYWORD_SOURCES: Dict[str, Set[str]] = {}
+for _source, _keywords in SOURCE_KEYWORDS.items():
+    for _keyword in _keywords:
+        _KEYWORD_SOURCES.setdefault(_keyword, set()).add(_source)
+
+def route_query(query: str) -> Optional[Set[str]]:
+    """
+    Pick the document sources a question is about.
+
+    Args:
+        query (str): The raw user question
+
+    Returns:
+        Optional[Set[str]]: Sources to search, or None to search all sources
+            when no keyword matched
+    """
+    sources = set()
+    for token in tokenize(query):
+        sources |= _KEYWORD_SOURCES.get(token, set())
+    if not sources:
+        return None
+    return sources | ALWAYS_SEARCHED_SOURCES
@@ -0,0 +1,522 @@
+import json
+import logging
+import math
+import mmap
+import os
+import shutil
+import time
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, FrozenSet, Iterable, Iterator, List, NamedTuple, Optional, Set, Tuple
+import faiss
+import numpy as np
+from langchain.schema import Document
+
+try:
+    import fcntl
+except ImportError:
+    # Windows: saves are not serialized across processes
+    fcntl = None
+
+logger = logging.getLogger(__name__)
+
+CURRENT_FILE = "CURRENT"
+LOCK_FILE = "LOCK"
+MANIFEST_FILE = "manifest.json"
+VECTORS_FILE = "vectors.npy"
+NORMS_FILE = "norms.npy"
+DOCS_FILE = "docs.jsonl"
+OFFSETS_FILE = "docs.offsets.npy"
+INDEX_FILE = "index.faiss"
+INDEX_TYPES = ("flat", "ivf_flat", "ivf_pq", "hnsw")
+# IndexConfig fields that change the saved index rather than only searches
+BUILD_FIELDS = ("type", "nlist", "pq_m", "pq_nbits", "hnsw_m")
+
+class IndexConfig(NamedTuple):
+    """Approximate nearest neighbour index settings; "flat" searches exactly."""
+    type: str = "flat"
+    nlist: int = 0
+    nprobe: int = 8
+    pq_m: int = 64
+    pq_nbits: int = 8
+    hnsw_m: int = 32
+    ef_search: int = 64
+    rerank: int = 4
+    # Filtered searches over fewer than this share of the saved rows skip the index
+    exact_fraction: float = 0.1
+
+def build_index(vectors: np.ndarray, config: IndexConfig) -> Optional[Any]:
+    """
+    Train an approximate FAISS index and add the vectors to it.
+
+    Vector ids are their row numbers. IVF indexes use `config.nlist` lists,
+    or about sqrt(rows) when it is 0. PQ uses the largest number of
+    sub-vectors up to `config.pq_m` that divides the dimension.
+
+    Args:
+        vectors (np.ndarray): float32 matrix of shape (rows, dimension)
+        config (IndexConfig): The index settings
+
+    Returns:
+        Optional[faiss.Index]: The index, or None for "flat" and when there
+            are too few vectors to train the requested index
+
+    Raises:
+        ValueError: If the index type is unknown
+    """
+    if config.type not in INDEX_TYPES:
+        raise ValueError(f"Unknown vector index type: {config.type}")
+    n_vectors, dimension = vectors.shape
+    if config.type == "flat" or n_vectors == 0:
+        return None
+
+    nlist = config.nlist or max(1, int(math.sqrt(n_vectors)))
+    min_vectors = nlist if config.type == "ivf_flat" else 2 ** config.pq_nbits
+    if config.type != "hnsw" and n_vectors < max(nlist, min_vectors):
+        logger.warning(f"{n_vectors} vectors are too few to train {config.type} with {nlist} lists, searching exactly")
+        return None
+
+    if config.type == "hnsw":
+        description = f"HNSW{config.hnsw_m}"
+    elif config.type == "ivf_flat":
+        description = f"IVF{nlist},Flat"
+    else:
+        # Sub-vectors must split the dimension evenly
+        pq_m = max(m for m in range(1, config.pq_m + 1) if dimension % m == 0)
+        if pq_m != config.pq_m:
+            logger.warning(f"PQ_M={config.pq_m} does not divide the embedding dimension {dimension}, using {pq_m}")
+        description = f"IVF{nlist},PQ{pq_m}x{config.pq_nbits}"
+
+    index = faiss.index_factory(dimension, description)
+    index.train(vectors)
+    index.add(vectors)
+    return index
+
+@contextmanager
+def store_lock(path: str) -> Iterator[None]:
+    """
+    Hold an exclusive lock on a store directory, shared by all processes.
+
+    Writers hold it from reading ``CURRENT`` until they have switched it, so
+    saves of different processes never overwrite each other.
+
+    Args:
+        path (str): The store directory
+
+    Yields:
+        None
+    """
+    os.makedirs(path, exist_ok=True)
+    with open(os.path.join(path, LOCK_FILE), "a") as f:
+        if fcntl is not None:
+            fcntl.flock(f.fileno(), fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            if fcntl is not None:
+                fcntl.flock(f.fileno(), fcntl.LOCK_UN)
+
+def search_params(config: IndexConfig, selector: Optional[Any] = None) -> Optional[Any]:
+    """Build FAISS search parameters for an index type, optionally restricted to some ids."""
+    if config.type == "hnsw":
+        return faiss.SearchParametersHNSW(sel=selector, efSearch=config.ef_search)
+    if config.type in ("ivf_flat", "ivf_pq"):
+        return faiss.SearchParametersIVF(sel=selector, nprobe=config.nprobe)
+    return None
+
+class MmapVectorStore:
+    """
+    Pickle-free vector store whose files are memory-mapped on load.
+
+    A store directory holds immutable versions (``v<timestamp>/``) and a
+    ``CURRENT`` file naming the live one. Each version contains:
+
+    - ``vectors.npy``: float32 matrix (rows x dimension), memory-mapped
+    - ``norms.npy``: squared L2 norm of each row, memory-mapped
+    - ``docs.jsonl``: one JSON document per row (text and metadata)
+    - ``docs.offsets.npy``: byte offset of each row in ``docs.jsonl``
+    - ``manifest.json``: dimension, index type, docstore id and source of each row
+    - ``index.faiss``: optional approximate index over the rows, see `build_index`
+    - any files written by the caller of `save`, such as keyword indexes that
+      must switch together with the vectors
+
+    Worker processes that load the same version share its pages through the
+    OS page cache. Added rows live in memory and are searched exactly; deleted
+    rows are filtered out of search results until `save` writes a new
+    compacted version, retrains the index and switches ``CURRENT`` to it.
+    Processes that save to the same directory hold `store_lock` and load the
+    current version first if another process switched ``CURRENT`` meanwhile.
+    """
+    def __init__(self, dimension: int, config: IndexConfig = IndexConfig()) -> None:
+        """
+        Create an empty in-memory store.
+
+        Args:
+            dimension (int): Size of the stored vectors
+            config (IndexConfig, optional): Index built on `save`. Defaults to flat.
+
+        Returns:
+            None
+        """
+        self.dimension = dimension
+        self.config = config
+        # Type of the index of the loaded version, "flat" if it has none
+        self.index_type = "flat"
+        self._saved_config: Optional[dict] = None
+        self._trained_rows = 0
+        self._version_path: Optional[str] = None
+        self._index = None
+        self._base_vectors = np.zeros((0, dimension), dtype=np.float32)
+        self._base_norms = np.zeros(0, dtype=np.float32)
+        self._base_docs: Optional[mmap.mmap] = None
+        self._base_offsets = np.zeros(1, dtype=np.int64)
+        self._base_count = 0
+        self._extra_vectors = np.zeros((0, dimension), dtype=np.float32)
+        self._extra_docs: List[Document] = []
+        self._ids: List[str] = []
+        self._sources: List[str] = []
+        self._alive = np.zeros(0, dtype=bool)
+        self._row_of: Dict[str, int] = {}
+        self._rows_cache: Dict[Optional[FrozenSet[str]], np.ndarray] = {}
+        self._params_cache: Dict[Optional[FrozenSet[str]], Any] = {}
+
+    @staticmethod
+    def exists(path: str) -> bool:
+        """Check whether a saved store exists at the given directory."""
+        return os.path.exists(os.path.join(path, CURRENT_FILE))
+
+    @staticmethod
+    def current_version(path: str) -> Optional[str]:
+        """Name of the version ``CURRENT`` points to, None if the store was never saved."""
+        try:
+            with open(os.path.join(path, CURRENT_FILE), "r", encoding="utf-8") as f:
+                return f.read().strip()
+        except FileNotFoundError:
+            return None
+
+    @classmethod
+    def load(cls, path: str, config: IndexConfig = IndexConfig()) -> "MmapVectorStore":
+        """
+        Open the current version of a saved store.
+
+        The saved index is used as is; see `needs_rebuild`.
+
+        Args:
+            path (str): The store directory
+            config (IndexConfig, optional): Index settings for searches and
+                later saves. Defaults to flat.
+
+        Returns:
+            MmapVectorStore: The store, backed by memory-mapped files
+        """
+        version_path = os.path.join(path, cls.current_version(path))
+        with open(os.path.join(version_path, MANIFEST_FILE), "r", encoding="utf-8") as f:
+            manifest = json.load(f)
+        store = cls(manifest["dimension"], config)
+        store._open(version_path, manifest)
+        return store
+
+    def _open(self, version_path: str, manifest: dict) -> None:
+        self._base_vectors = np.load(os.path.join(version_path, VECTORS_FILE), mmap_mode="r")
+        self._base_norms = np.load(os.path.join(version_path, NORMS_FILE), mmap_mode="r")
+        self._base_offsets = np.load(os.path.join(version_path, OFFSETS_FILE))
+        self._base_docs = None
+        with open(os.path.join(version_path, DOCS_FILE), "rb") as f:
+            if os.fstat(f.fileno()).st_size:
+                self._base_docs = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        self._base_count = len(manifest["ids"])
+        self.index_type = manifest.get("index_type", "flat")
+        self._saved_config = manifest.get("index_config")
+        self._trained_rows = manifest.get("trained_rows", 0)
+        self._version_path = version_path
+        self._index = None
+        if self.index_type != "flat":
+            self._index = faiss.read_index(os.path.join(version_path, INDEX_FILE), faiss.IO_FLAG_MMAP)
+        self._extra_vectors = np.zeros((0, self.dimension), dtype=np.float32)
+        self._extra_docs = []
+        self._ids = list(manifest["ids"])
+        self._sources = list(manifest["sources"])
+        self._alive = np.ones(self._base_count, dtype=bool)
+        self._row_of = {docstore_id: row for row, docstore_id in enumerate(self._ids)}
+        self._rows_cache = {}
+        self._params_cache = {}
+
+    @property
+    def version_path(self) -> Optional[str]:
+        """Directory of the loaded version, None if the store was never saved or loaded."""
+        return self._version_path
+
+    def needs_rebuild(self) -> bool:
+        """Check whether the loaded version was built with other index settings than `config`."""
+        if self._saved_config is None:
+            return self.config.type != "flat"
+        return any(self._saved_config.get(field) != getattr(self.config, field) for field in BUILD_FIELDS)
+
+    def __len__(self) -> int:
+        return len(self._row_of)
+
+    @property
+    def ids(self) -> List[str]:
+        """Docstore ids of all live documents, in row order."""
+        return [docstore_id for docstore_id, alive in zip(self._ids, self._alive) if alive]
+
+    def ids_for_sources(self, sources: Iterable[str]) -> Set[str]:
+        """Docstore ids of the live documents of the given sources."""
+        return {self._ids[row] for row in self._rows(frozenset(sources))}
+
+    def add(self, ids: List[str], texts: List[str], metadatas: List[dict], vectors: List[List[float]]) -> None:
+        """
+        Add documents, replacing documents that have the same docstore ids.
+
+        Args:
+            ids (List[str]): Docstore ids
+            texts (List[str]): Document texts
+            metadatas (List[dict]): Document metadata, including "source"
+            vectors (List[List[float]]): Document embeddings
+
+        Returns:
+            None
+        """
+        self.delete([docstore_id for docstore_id in ids if docstore_id in self._row_of])
+        matrix = np.asarray(vectors, dtype=np.float32).reshape(len(ids), self.dimension)
+        self._extra_vectors = np.vstack([self._extra_vectors, matrix])
+        for docstore_id, text, metadata in zip(ids, texts, metadatas):
+            self._row_of[docstore_id] = len(self._ids)
+            self._ids.append(docstore_id)
+            self._sources.append(metadata.get("source", ""))
+            self._extra_docs.append(Document(page_content=text, metadata=dict(metadata)))
+        self._alive = np.concatenate([self._alive, np.ones(len(ids), dtype=bool)])
+        self._rows_cache = {}
+        self._params_cache = {}
+
+    def delete(self, ids: Iterable[str]) -> None:
+        """
+        Delete documents by docstore id; unknown ids are ignored.
+
+        Args:
+            ids (Iterable[str]): Docstore ids to delete
+
+        Returns:
+            None
+        """
+        for docstore_id in ids:
+            row = self._row_of.pop(docstore_id, None)
+            if row is not None:
+                self._alive[row] = False
+        self._rows_cache = {}
+        self._params_cache = {}
+
+    def get(self, docstore_id: str) -> Document:
+        """
+        Read a document by docstore id.
+
+        Args:
+            docstore_id (str): The docstore id
+
+        Returns:
+            Document: The document
+
+        Raises:
+            KeyError: If the id is not in the store
+        """
+        row = self._row_of[docstore_id]
+        if row >= self._base_count:
+            return self._extra_docs[row - self._base_count]
+        start, end = self._base_offsets[row], self._base_offsets[row + 1]
+        record = json.loads(self._base_docs[start:end])
+        return Document(page_content=record["text"], metadata=record["metadata"])
+
+    def get_vectors(self, ids: List[str]) -> np.ndarray:
+        """Get the stored vectors of documents by docstore id."""
+        return self._vectors_at(np.array([self._row_of[docstore_id] for docstore_id in ids], dtype=np.int64))
+
+    def search(self, vectors: np.ndarray, k: int, sources: Optional[Set[str]] = None) -> List[List[Tuple[str, float]]]:
+        """
+        Find the nearest documents by squared L2 distance.
+
+        Saved rows are searched through the approximate index if the loaded
+        version has one, and exactly otherwise; rows added since are always
+        searched exactly. Filtering inside an IVF or HNSW index finds few of
+        the allowed rows when they are a small share of the index, so such
+        searches, and searches that return fewer than k rows, scan the allowed
+        rows exactly instead. IVF-PQ candidates are re-scored with the exact
+        vectors. Deleted rows never appear in the results.
+
+        Args:
+            vectors (np.ndarray): Query vectors of shape (queries, dimension)
+            k (int): Number of results per query
+            sources (Optional[Set[str]], optional): Only search documents of these
+                sources. Defaults to None (all documents).
+
+        Returns:
+            List[List[Tuple[str, float]]]: (docstore id, distance) pairs per
+                query, nearest first
+        """
+        queries = np.asarray(vectors, dtype=np.float32).reshape(-1, self.dimension)
+        key = frozenset(sources) if sources is not None else None
+        rows = self._rows(key)
+        if len(rows) == 0:
+            return [[] for _ in range(len(queries))]
+
+        if self._index is None:
+            distances, candidates = self._exact_search(queries, rows, k)
+        else:
+            base_rows = rows[rows < self._base_count]
+            extra_rows = rows[rows >= self._base_count]
+            distances, candidates = self._index_search(queries, base_rows, k, key)
+            if len(extra_rows):
+                extra_distances, extra_candidates = self._exact_search(queries, extra_rows, k)
+                distances = np.hstack([distances, extra_distances])
+                candidates = np.hstack([candidates, extra_candidates])
+
+        results = []
+        for query_distances, query_rows in zip(distances, candidates):
+            order = np.argsort(query_distances, kind="stable")[:k]
+            results.append([
+                (self._ids[query_rows[i]], float(query_distances[i]))
+                for i in order
+                if query_rows[i] != -1
+            ])
+        return results
+
+    def _exact_search(self, queries: np.ndarray, rows: np.ndarray, k: int) -> Tuple[np.ndarray, np.ndarray]:
+        """Return the distances and rows of the k nearest of the given rows, unsorted."""
+        if len(rows) == self._base_count and rows[-1] == self._base_count - 1:
+            # Scan the memory-mapped matrix directly, without copying it
+            matrix, norms = self._base_vectors, self._base_norms
+        else:
+            matrix = self._vectors_at(rows)
+            norms = np.einsum("ij,ij->i", matrix, matrix)
+        distances = norms[None, :] - 2.0 * (queries @ matrix.T) + np.einsum("ij,ij->i", queries, queries)[:, None]
+        k = min(k, len(rows))
+        top = np.argpartition(distances, k - 1, axis=1)[:, :k]
+        return np.take_along_axis(distances, top, axis=1), rows[top]
+
+    def _index_search(
+        self, queries: np.ndarray, base_rows: np.ndarray, k: int, key: Optional[FrozenSet[str]]
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        """Search saved rows through the approximate index, skipping rows not in base_rows."""
+        if len(base_rows) == 0:
+            return np.zeros((len(queries), 0), dtype=np.float32), np.zeros((len(queries), 0), dtype=np.int64)
+        if len(base_rows) < self._base_count * self.config.exact_fraction:
+            return self._exact_search(queries, base_rows, k)
+        params = self._params_cache.get(key)
+        if params is None:
+            selector = None
+            if len(base_rows) < self._base_count:
+                # Deleted rows and other sources are filtered inside the index
+                selector = faiss.IDSelectorBatch(base_rows.astype(np.int64))
+            params = (search_params(self.config._replace(type=self.index_type), selector), selector)
+            self._params_cache[key] = params
+        rerank = self.index_type == "ivf_pq" and self.config.rerank > 1
+        distances, rows = self._index.search(queries, k * self.config.rerank if rerank else k, params=params[0])
+        if rerank:
+            # PQ distances are coarse; re-score candidates with the memory-mapped vectors
+            vectors = self._base_vectors[np.where(rows == -1, 0, rows)]
+            distances = ((vectors - queries[:, None, :]) ** 2).sum(axis=2)
+        if ((rows != -1).sum(axis=1) < min(k, len(base_rows))).any():
+            # The filter left too few of the visited rows
+            return self._exact_search(queries, base_rows, k)
+        return np.where(rows == -1, np.inf, distances), rows
+
+    def save(
+        self, path: str, write_extra: Optional[Callable[[str], None]] = None, keep_seconds: float = 3600.0
+    ) -> None:
+        """
+        Write the live documents as a new version and make it current.
+
+        Other processes keep reading the version they loaded. After ``CURRENT``
+        points to the new version, the previous one is kept, and older ones
+        are removed once they are more than keep_seconds old, so processes
+        that loaded them have time to switch. A trained index with the same
+        settings is refilled rather than retrained, until the store has grown
+        to twice the trained size.
+
+        Args:
+            path (str): The store directory
+            write_extra (Optional[Callable[[str], None]], optional): Called with
+                the new version directory before it becomes current, to write
+                files that belong to this version. Defaults to None.
+            keep_seconds (float, optional): Grace period before superseded
+                versions are removed. Defaults to 3600.
+
+        Returns:
+            None
+        """
+        os.makedirs(path, exist_ok=True)
+        version = f"v{time.time_ns()}"
+        version_path = os.path.join(path, version)
+        os.makedirs(version_path)
+
+        rows = self._rows(None)
+        matrix = self._vectors_at(rows)
+        np.save(os.path.join(version_path, VECTORS_FILE), matrix)
+        np.save(os.path.join(version_path, NORMS_FILE), np.einsum("ij,ij->i", matrix, matrix))
+        offsets = [0]
+        with open(os.path.join(version_path, DOCS_FILE), "wb") as f:
+            for row in rows:
+                doc = self.get(self._ids[row])
+                line = json.dumps({"text": doc.page_content, "metadata": doc.metadata}, ensure_ascii=False)
+                offsets.append(offsets[-1] + f.write(line.encode("utf-8") + b"\n"))
+        np.save(os.path.join(version_path, OFFSETS_FILE), np.asarray(offsets, dtype=np.int64))
+        trained_rows = self._trained_rows
+        trained_path = os.path.join(self._version_path or "", INDEX_FILE)
+        if (self._index is not None and not self.needs_rebuild() and len(rows) <= 2 * trained_rows
+                and os.path.exists(trained_path)):
+            index = faiss.read_index(trained_path)
+            index.reset()
+            index.add(matrix)
+        else:
+            index = build_index(matrix, self.config)
+            trained_rows = len(rows)
+        if index is not None:
+            faiss.write_index(index, os.path.join(version_path, INDEX_FILE))
+        manifest = {
+            "dimension": self.dimension,
+            "index_type": self.config.type if index is not None else "flat",
+            "index_config": self.config._asdict(),
+            "trained_rows": trained_rows,
+            "ids": [self._ids[row] for row in rows],
+            "sources": [self._sources[row] for row in rows]
+        }
+        with open(os.path.join(version_path, MANIFEST_FILE), "w", encoding="utf-8") as f:
+            json.dump(manifest, f, ensure_ascii=False)
+        if write_extra is not None:
+            write_extra(version_path)
+
+        current_path = os.path.join(path, CURRENT_FILE)
+        previous = self.current_version(path)
+        with open(f"{current_path}.tmp", "w", encoding="utf-8") as f:
+            f.write(version)
+        os.replace(f"{current_path}.tmp", current_path)
+        self._remove_old_versions(path, keep={version, previous}, keep_seconds=keep_seconds)
+
+        self._open(version_path, manifest)
+
+    @staticmethod
+    def _remove_old_versions(path: str, keep: Set[Optional[str]], keep_seconds: float) -> None:
+        """Remove version directories not in keep that were created more than keep_seconds ago."""
+        cutoff = time.time_ns() - int(keep_seconds * 1e9)
+        for name in os.listdir(path):
+            if name in keep or not name.startswith("v") or not name[1:].isdigit():
+                continue
+            if int(name[1:]) < cutoff and os.path.isdir(os.path.join(path, name)):
+                shutil.rmtree(os.path.join(path, name), ignore_errors=True)
+
+    def _rows(self, sources: Optional[FrozenSet[str]]) -> np.ndarray:
+        """Live rows, optionally of some sources only; cached until the next change."""
+        rows = self._rows_cache.get(sources)
+        if rows is None:
+            rows = np.flatnonzero(self._alive)
+            if sources is not None:
+                rows = np.array([row for row in rows if self._sources[row] in sources], dtype=np.int64)
+            self._rows_cache[sources] = rows
+        return rows
+
+    def _vectors_at(self, rows: np.ndarray) -> np.ndarray:
+        base_rows = rows[rows < self._base_count]
+        extra_rows = rows[rows >= self._base_count] - self._base_count
+        matrix = np.empty((len(rows), self.dimension), dtype=np.float32)
+        order = np.argsort(rows, kind="stable")
+        matrix[order[:len(base_rows)]] = self._base_vectors[np.sort(base_rows)]
+        matrix[order[len(base_rows):]] = self._extra_vectors[np.sort(extra_rows)]
+        return matrix
@@ -1,5 +1,7 @@
-import asyncio
+import uvicorn
 from app.bot.telegram_bot import create_bot_application
+from app.core.config import get_settings
+from app.services.registry import warm_up_services
 import logging
 from app.utils.logger import setup_loggers
 import sys
@@ -10,16 +12,23 @@ logger.setLevel(logging.INFO)
 conversation_logger = setup_loggers()
 
 def main():
+    settings = get_settings()
+    if settings.BOT_MODE == "webhook":
+        # The bot is served by the API app, which shares its RAG service
+        print("Starting API server with webhook bot...")
+        uvicorn.run("app.main:app", host="0.0.0.0", port=8000)
+        return
+
     application = None
     try:
         application = create_bot_application()
+        print("Loading RAG service...")
+        warm_up_services()
         print("Starting bot...")
-        application.run_polling(poll_interval=3)
+        application.run_polling(poll_interval=settings.BOT_POLL_INTERVAL)
     except Exception as e:
         print(f"Error starting bot: {e}")
-        if application:
-            application.shutdown()
         raise e
 
 if __name__ == '__main__':
-    asyncio.run(main())
+    main()
@@ -0,0 +1,100 @@
+###########################################################
+# This block appends the root project path to the         #
+# system path for access to project files and modules.    #
+###########################################################
+import sys
+import os
+
+sys.path.insert(0, os.path.abspath(
+    os.path.join(os.path.dirname(__file__), '..')))
+###########################################################
+
+import argparse
+import asyncio
+import json
+import logging
+from typing import List
+
+from app.core.config import get_settings
+from app.services.registry import get_rag_service
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+settings = get_settings()
+
+def load_questions(path: str) -> List[str]:
+    """
+    Loads questions from a text file with one question per line, or a JSON list.
+
+    Args:
+        path (str): Path of the questions file.
+
+    Returns:
+        List[str]: The non-empty questions, in file order.
+    """
+    with open(path, 'r', encoding='utf-8') as f:
+        content = f.read()
+    if path.endswith('.json'):
+        return [question for question in json.loads(content) if question.strip()]
+    return [line.strip() for line in content.splitlines() if line.strip()]
+
+async def answer_questions(questions: List[str], batch_size: int) -> List[dict]:
+    """
+    Answers questions in batches with the shared RAG service.
+
+    Args:
+        questions (List[str]): The questions to answer.
+        batch_size (int): Questions sent to the service at once.
+
+    Returns:
+        List[dict]: One record per question, in order, with the keys query,
+            answer, sources, usage and error (None unless the question failed).
+    """
+    rag_service = get_rag_service()
+    records = []
+    for start in range(0, len(questions), batch_size):
+        batch = questions[start:start + batch_size]
+        logger.info(f"Answering questions {start + 1}-{start + len(batch)} of {len(questions)}")
+        for query, result in zip(batch, await rag_service.aquery_batch(batch)):
+            if isinstance(result, Exception):
+                logger.error(f"Error answering {query!r}: {str(result)}")
+                records.append({"query": query, "answer": None, "sources": [], "usage": {}, "error": str(result)})
+            else:
+                answer, sources, usage = result
+                records.append({"query": query, "answer": answer, "sources": sources, "usage": usage, "error": None})
+    return records
+
+def main() -> None:
+    """
+    Main execution function that answers a question list offline.
+
+    Writes one JSON record per question (JSON Lines) to the output file, or to
+    stdout if none is given. Exits with status 1 if any question failed.
+
+    Returns:
+        None
+    """
+    parser = argparse.ArgumentParser(description="Answer a list of questions with the RAG service.")
+    parser.add_argument("questions", help="Text file with one question per line, or a JSON list")
+    parser.add_argument("--output", help="JSON Lines file to write the answers to (default: stdout)")
+    parser.add_argument("--batch-size", type=int, default=settings.BATCH_MAX_QUESTIONS)
+    args = parser.parse_args()
+
+    records = asyncio.run(answer_questions(load_questions(args.questions), args.batch_size))
+
+    output = open(args.output, 'w', encoding='utf-8') if args.output else sys.stdout
+    try:
+        for record in records:
+            output.write(json.dumps(record, ensure_ascii=False) + "\n")
+    finally:
+        if args.output:
+            output.close()
+
+    failed = sum(record["error"] is not None for record in records)
+    logger.info(f"Answered {len(records) - failed} of {len(records)} questions")
+    if failed:
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
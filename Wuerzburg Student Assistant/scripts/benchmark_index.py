@@ -0,0 +1,205 @@
+###########################################################
+# This block appends the root project path to the         #
+# system path for access to project files and modules.    #
+###########################################################
+import sys
+import os
+
+sys.path.insert(0, os.path.abspath(
+    os.path.join(os.path.dirname(__file__), '..')))
+###########################################################
+
+import argparse
+import logging
+import tempfile
+import time
+from typing import List, Optional
+import faiss
+import numpy as np
+
+from app.core.config import get_settings
+from app.services.embeddings import get_vector_store_path
+from app.services.vector_store import CURRENT_FILE, INDEX_FILE, INDEX_TYPES, IndexConfig, MmapVectorStore
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+settings = get_settings()
+
+def load_vectors(path: str, synthetic: int, seed: int) -> np.ndarray:
+    """
+    Loads the stored vectors, optionally grown to a larger synthetic corpus.
+
+    Args:
+        path (str): Vector store directory.
+        synthetic (int): Total number of vectors to benchmark with. Extra vectors
+            are stored vectors with Gaussian noise added. 0 uses the store as is.
+        seed (int): Random seed for the synthetic vectors.
+
+    Returns:
+        np.ndarray: float32 matrix of shape (rows, dimension).
+    """
+    store = MmapVectorStore.load(path)
+    vectors = store.get_vectors(store.ids)
+    if synthetic > len(vectors):
+        rng = np.random.default_rng(seed)
+        base = vectors[rng.integers(0, len(vectors), synthetic - len(vectors))]
+        noise = rng.normal(0.0, vectors.std() * 0.5, base.shape).astype(np.float32)
+        vectors = np.vstack([vectors, base + noise])
+    return vectors
+
+def exact_neighbours(vectors: np.ndarray, queries: np.ndarray, k: int, rows: Optional[np.ndarray] = None) -> np.ndarray:
+    """
+    Finds the exact k nearest rows of each query.
+
+    Args:
+        vectors (np.ndarray): The corpus.
+        queries (np.ndarray): Query vectors.
+        k (int): Number of neighbours per query.
+        rows (Optional[np.ndarray], optional): Only consider these rows. Defaults to all rows.
+
+    Returns:
+        np.ndarray: Row numbers of shape (queries, k), -1 where fewer rows exist.
+    """
+    rows = np.arange(len(vectors)) if rows is None else rows
+    exact = faiss.IndexFlatL2(vectors.shape[1])
+    exact.add(vectors[rows])
+    _, found = exact.search(queries, k)
+    return np.where(found == -1, -1, rows[np.where(found == -1, 0, found)])
+
+def recall(results: List[List[tuple]], truth: np.ndarray) -> float:
+    """Share of the exact neighbours found, ignoring the -1 padding of the truth."""
+    hits = sum(
+        len({int(docstore_id) for docstore_id, _ in found} & set(expected[expected != -1]))
+        for found, expected in zip(results, truth)
+    )
+    return hits / max(1, int((truth != -1).sum()))
+
+def benchmark(
+    vectors: np.ndarray, queries: np.ndarray, config: IndexConfig, truth: np.ndarray, k: int,
+    sources: List[str], filtered_truth: np.ndarray
+) -> Optional[dict]:
+    """
+    Measures build time, memory, latency and recall of one index type.
+
+    The vectors are saved and searched through MmapVectorStore, so the
+    numbers include training, IVF-PQ re-scoring and memory-mapped reads.
+    Searches restricted to the "filtered" source are measured separately,
+    as the store answers them through the index or exactly depending on
+    the share of rows they allow.
+
+    Args:
+        vectors (np.ndarray): The corpus.
+        queries (np.ndarray): Query vectors.
+        config (IndexConfig): Index settings to benchmark.
+        truth (np.ndarray): Exact k nearest rows of each query.
+        k (int): Number of neighbours per query.
+        sources (List[str]): Source of each row, "filtered" or "other".
+        filtered_truth (np.ndarray): Exact k nearest "filtered" rows of each query.
+
+    Returns:
+        Optional[dict]: Report row with build seconds, resident index
+            megabytes, milliseconds per query and recall@k against the exact
+            search, without and with the source filter. None if the corpus is
+            too small to train the index.
+    """
+    with tempfile.TemporaryDirectory() as path:
+        store = MmapVectorStore(vectors.shape[1], config)
+        store.add(
+            [str(row) for row in range(len(vectors))], [""] * len(vectors),
+            [{"source": source} for source in sources], vectors
+        )
+        start = time.perf_counter()
+        store.save(path)
+        build_seconds = time.perf_counter() - start
+        if store.index_type != config.type:
+            return None
+
+        start = time.perf_counter()
+        results = store.search(queries, k)
+        latency_ms = (time.perf_counter() - start) * 1000 / len(queries)
+
+        start = time.perf_counter()
+        filtered_results = store.search(queries, k, {"filtered"})
+        filtered_latency_ms = (time.perf_counter() - start) * 1000 / len(queries)
+
+        # A flat store searches the memory-mapped vectors; other indexes are read into memory
+        with open(os.path.join(path, CURRENT_FILE), "r", encoding="utf-8") as f:
+            index_path = os.path.join(path, f.read(), INDEX_FILE)
+        size = os.path.getsize(index_path) if os.path.exists(index_path) else vectors.nbytes
+
+    return {
+        "type": config.type,
+        "build_s": build_seconds,
+        "size_mb": size / 2 ** 20,
+        "latency_ms": latency_ms,
+        "recall": recall(results, truth),
+        "filtered_latency_ms": filtered_latency_ms,
+        "filtered_recall": recall(filtered_results, filtered_truth)
+    }
+
+def main() -> None:
+    """
+    Main execution function that prints a recall-vs-latency report.
+
+    Builds every index type over the vector store with the current settings
+    and compares each one against exact search on the same queries, over
+    all rows and over a random --filter-fraction of them tagged as one
+    source, as intent routing restricts searches to a few sources.
+
+    Returns:
+        None
+    """
+    parser = argparse.ArgumentParser(description="Compare vector index types against exact search.")
+    parser.add_argument("--path", default=get_vector_store_path(), help="Vector store directory")
+    parser.add_argument("--queries", type=int, default=200, help="Number of sampled query vectors")
+    parser.add_argument("--k", type=int, default=settings.RETRIEVAL_MAX_DOCUMENTS, help="Neighbours per query")
+    parser.add_argument("--synthetic", type=int, default=0, help="Grow the corpus to this many vectors")
+    parser.add_argument("--filter-fraction", type=float, default=0.02, help="Share of rows allowed by the source filter")
+    parser.add_argument("--exact-fraction", type=float, default=settings.FILTER_EXACT_FRACTION,
+                        help="Filtered searches over less than this share scan exactly; 0 always uses the index")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    vectors = load_vectors(args.path, args.synthetic, args.seed)
+    rng = np.random.default_rng(args.seed)
+    queries = vectors[rng.integers(0, len(vectors), args.queries)]
+    queries = queries + rng.normal(0.0, vectors.std() * 0.1, queries.shape).astype(np.float32)
+    logger.info(f"Benchmarking {len(vectors)} vectors of dimension {vectors.shape[1]} with {len(queries)} queries")
+
+    truth = exact_neighbours(vectors, queries, args.k)
+    in_filter = rng.random(len(vectors)) < args.filter_fraction
+    sources = ["filtered" if allowed else "other" for allowed in in_filter]
+    filtered_truth = exact_neighbours(vectors, queries, args.k, np.flatnonzero(in_filter))
+    logger.info(f"Source filter allows {int(in_filter.sum())} rows")
+
+    print(
+        f"{'index':<10}{'build s':>10}{'size MB':>10}{'ms/query':>10}{f'recall@{args.k}':>12}"
+        f"{'filtered ms':>13}{'filtered recall':>17}"
+    )
+    for index_type in INDEX_TYPES:
+        config = IndexConfig(
+            type=index_type,
+            nlist=settings.IVF_NLIST,
+            nprobe=settings.IVF_NPROBE,
+            pq_m=settings.PQ_M,
+            pq_nbits=settings.PQ_NBITS,
+            hnsw_m=settings.HNSW_M,
+            ef_search=settings.HNSW_EF_SEARCH,
+            rerank=settings.PQ_RERANK,
+            exact_fraction=args.exact_fraction
+        )
+        try:
+            row = benchmark(vectors, queries, config, truth, args.k, sources, filtered_truth)
+        except ValueError as e:
+            logger.error(f"Skipping {index_type}: {str(e)}")
+            continue
+        if row is None:
+            continue
+        print(
+            f"{row['type']:<10}{row['build_s']:>10.2f}{row['size_mb']:>10.2f}{row['latency_ms']:>10.3f}{row['recall']:>12.3f}"
+            f"{row['filtered_latency_ms']:>13.3f}{row['filtered_recall']:>17.3f}"
+        )
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,250 @@
+###########################################################
+# This block appends the root project path to the         #
+# system path for access to project files and modules.    #
+###########################################################
+import sys
+import os
+
+sys.path.insert(0, os.path.abspath(
+    os.path.join(os.path.dirname(__file__), '..')))
+###########################################################
+
+import argparse
+import asyncio
+import json
+import logging
+import random
+import socket
+import time
+from collections import defaultdict
+from typing import Dict, List
+from urllib.parse import parse_qs
+
+import httpx
+import numpy as np
+import uvicorn
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+SECRET_TOKEN = "load-test-secret"
+BOT_TOKEN = "123456:LOADTEST"
+
+# Commands that answer with exactly one message, so the n-th reply to a chat
+# belongs to its n-th update (the bot keeps each chat in order)
+COMMANDS = ["/start", "/groups", "/places_cafe", "/places_restaurants", "/lifetips_bank", "/insurance_health"]
+
+def free_port() -> int:
+    """
+    Finds a free local TCP port.
+
+    Returns:
+        int: The port number.
+    """
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+def create_stub_bot_api(replies: Dict[int, List[float]], flood_rate: float) -> FastAPI:
+    """
+    Creates a stand-in for the Telegram Bot API that accepts every request.
+
+    Args:
+        replies (Dict[int, List[float]]): Filled with the arrival times of the
+            messages sent to each chat.
+        flood_rate (float): Share of requests answered with a 429 RetryAfter, to
+            exercise the bot's outbound scheduler.
+
+    Returns:
+        FastAPI: The stub application.
+    """
+    stub = FastAPI()
+    message_ids = iter(range(1, sys.maxsize))
+
+    @stub.post("/bot{token}/{method}")
+    async def bot_method(token: str, method: str, request: Request):
+        body = await request.body()
+        if request.headers.get("content-type", "").startswith("application/json"):
+            params = json.loads(body or b"{}")
+        else:
+            params = {key: values[0] for key, values in parse_qs(body.decode()).items()}
+
+        if method == "getMe":
+            return {"ok": True, "result": {"id": 1, "is_bot": True, "first_name": "Load Test", "username": "load_test_bot"}}
+        if method in ("sendMessage", "sendPhoto", "editMessageText") and "chat_id" in params:
+            if random.random() < flood_rate:
+                return JSONResponse(status_code=429, content={
+                    "ok": False, "error_code": 429, "description": "Too Many Requests: retry after 1",
+                    "parameters": {"retry_after": 1}
+                })
+            chat_id = int(params["chat_id"])
+            replies[chat_id].append(time.perf_counter())
+            return {"ok": True, "result": {
+                "message_id": next(message_ids),
+                "date": int(time.time()),
+                "chat": {"id": chat_id, "type": "private"},
+                "text": params.get("text", "")
+            }}
+        return {"ok": True, "result": True}
+
+    return stub
+
+def make_update(update_id: int, chat_id: int, text: str) -> dict:
+    """
+    Builds a synthetic Telegram update for a private message.
+
+    Args:
+        update_id (int): The update id.
+        chat_id (int): Id of the chat and its user.
+        text (str): The message text; commands get a bot_command entity.
+
+    Returns:
+        dict: The update payload as Telegram would post it.
+    """
+    message = {
+        "message_id": update_id,
+        "date": int(time.time()),
+        "chat": {"id": chat_id, "type": "private", "first_name": f"User {chat_id}"},
+        "from": {"id": chat_id, "is_bot": False, "first_name": f"User {chat_id}"},
+        "text": text
+    }
+    if text.startswith("/"):
+        message["entities"] = [{"type": "bot_command", "offset": 0, "length": len(text)}]
+    return {"update_id": update_id, "message": message}
+
+async def serve(app: FastAPI, port: int) -> uvicorn.Server:
+    """
+    Starts an ASGI app on a local port in the running event loop.
+
+    Args:
+        app (FastAPI): The app to serve.
+        port (int): The port to listen on.
+
+    Returns:
+        uvicorn.Server: The started server; set should_exit to stop it.
+    """
+    server = uvicorn.Server(uvicorn.Config(app, host="127.0.0.1", port=port, log_level="warning"))
+    server.task = asyncio.create_task(server.serve())
+    while not server.started:
+        if server.task.done():
+            server.task.result()
+            raise RuntimeError(f"Server on port {port} exited during startup")
+        await asyncio.sleep(0.05)
+    return server
+
+def percentiles(values: List[float]) -> str:
+    """Formats the p50/p95/max of latencies in seconds as milliseconds."""
+    if not values:
+        return "n/a"
+    p50, p95, top = np.percentile(values, [50, 95, 100]) * 1000
+    return f"p50 {p50:.1f} ms, p95 {p95:.1f} ms, max {top:.1f} ms"
+
+async def run_load_test(args: argparse.Namespace, stub_port: int, app_port: int) -> None:
+    """
+    Posts synthetic updates to the webhook and reports how fast they are answered.
+
+    Args:
+        args (argparse.Namespace): The command line arguments.
+        stub_port (int): Port of the stub Bot API.
+        app_port (int): Port of the API app serving the webhook.
+
+    Returns:
+        None
+    """
+    # Imported here, as settings are read from the environment set up by main()
+    from app.bot.webhook import webhook_bot_stats
+    from app.core.config import get_settings
+    from app.main import app
+
+    replies: Dict[int, List[float]] = defaultdict(list)
+    stub_server = await serve(create_stub_bot_api(replies, args.flood_rate), stub_port)
+    app_server = await serve(app, app_port)
+
+    texts = COMMANDS + args.question
+    sent: Dict[int, List[float]] = defaultdict(list)
+    accept_latencies, failures = [], 0
+    limit = asyncio.Semaphore(args.concurrency)
+
+    async def post(client: httpx.AsyncClient, update_id: int) -> None:
+        nonlocal failures
+        chat_id = 1000 + update_id % args.chats
+        payload = make_update(update_id, chat_id, texts[update_id % len(texts)])
+        async with limit:
+            start = time.perf_counter()
+            sent[chat_id].append(start)
+            response = await client.post(
+                get_settings().WEBHOOK_PATH, json=payload,
+                headers={"X-Telegram-Bot-Api-Secret-Token": SECRET_TOKEN}
+            )
+            accept_latencies.append(time.perf_counter() - start)
+            if response.status_code != 200:
+                failures += 1
+
+    try:
+        logger.info(f"Posting {args.updates} updates from {args.chats} chats, {args.concurrency} at a time")
+        start = time.perf_counter()
+        async with httpx.AsyncClient(base_url=f"http://127.0.0.1:{app_port}") as client:
+            await asyncio.gather(*(post(client, update_id) for update_id in range(1, args.updates + 1)))
+        posted = time.perf_counter() - start
+
+        # Wait for all replies, or give up after --timeout seconds
+        expected = args.updates - failures
+        deadline = time.perf_counter() + args.timeout
+        while sum(len(times) for times in replies.values()) < expected and time.perf_counter() < deadline:
+            await asyncio.sleep(0.1)
+        answered = time.perf_counter() - start
+        stats = webhook_bot_stats()
+    finally:
+        app_server.should_exit = True
+        await app_server.task
+        stub_server.should_exit = True
+        await stub_server.task
+
+    end_to_end = [
+        reply - post_time
+        for chat_id, post_times in sent.items()
+        for post_time, reply in zip(sorted(post_times), replies.get(chat_id, []))
+    ]
+    received = sum(len(times) for times in replies.values())
+    print(f"updates posted     {args.updates} in {posted:.2f} s ({args.updates / posted:.0f}/s), {failures} rejected")
+    print(f"webhook accept     {percentiles(accept_latencies)}")
+    print(f"replies received   {received} of {expected} in {answered:.2f} s ({received / answered:.1f}/s)")
+    print(f"update to reply    {percentiles(end_to_end)}")
+    print(f"bot update queue   {stats}")
+
+def main() -> None:
+    """
+    Main execution function that load-tests the webhook mode offline.
+
+    Starts a stub Telegram Bot API and the API app in webhook mode on local
+    ports, posts synthetic updates with the secret token header and prints
+    webhook and end-to-end latencies. Nothing is sent to Telegram. Commands
+    only read the reference tables; questions (--question) call the LLM.
+
+    Returns:
+        None
+    """
+    parser = argparse.ArgumentParser(description="Load-test the webhook bot against a stub Bot API.")
+    parser.add_argument("--updates", type=int, default=300, help="Updates to post")
+    parser.add_argument("--chats", type=int, default=100, help="Distinct chats sending them")
+    parser.add_argument("--concurrency", type=int, default=50, help="Webhook requests in flight")
+    parser.add_argument("--question", action="append", default=[], help="Free-text question to mix in (calls the LLM)")
+    parser.add_argument("--flood-rate", type=float, default=0.0, help="Share of sends the stub answers with 429")
+    parser.add_argument("--timeout", type=float, default=120.0, help="Seconds to wait for replies")
+    args = parser.parse_args()
+
+    stub_port, app_port = free_port(), free_port()
+    os.environ.update({
+        "BOT_MODE": "webhook",
+        "TELEGRAM_BOT_TOKEN": BOT_TOKEN,
+        "TELEGRAM_BASE_URL": f"http://127.0.0.1:{stub_port}/bot",
+        "WEBHOOK_URL": f"http://127.0.0.1:{app_port}",
+        "WEBHOOK_SECRET_TOKEN": SECRET_TOKEN,
+        "DEVELOPMENT_MODE": "false"
+    })
+    asyncio.run(run_load_test(args, stub_port, app_port))
+
+if __name__ == "__main__":
+    main()
@@ -18,6 +18,7 @@ from sqlalchemy import text
 
 from app.db.base import SessionLocal, engine
 from app.db import models
+from app.db.notifications import notify_table_changed
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
@@ -109,6 +110,8 @@ def upload_data(db: Session, model_class: models.Base, data_list: list) -> None:
             db.add(db_item)
         db.commit()
         logger.info(f"Successfully uploaded {len(data_list)} items to {model_class.__tablename__}")
+        # Let running bots reload their caches
+        notify_table_changed(db, model_class.__tablename__)
     except SQLAlchemyError as e:
         db.rollback()
         logger.error(f"Error uploading to {model_class.__tablename__}: {str(e)}")